@@ -0,0 +1,113 @@
+# import_time.py
+
+"""
+Measures the cold-start import cost of each pipeline stage with `python -X importtime`.
+
+Every stage module is imported in a fresh interpreter, best of --runs, and compared with
+the budget. Exits with status 1 when any stage is over budget, so CI can gate on it:
+
+    python benchmarks/import_time.py --budget-ms 150 --output import-times.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES_DIR = os.path.join(REPO_ROOT, "stages")
+
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "150"))
+DEFAULT_RUNS = 5
+# Modules reported as the biggest contributors for stages over budget
+TOP_IMPORTS = 5
+
+
+def list_stages():
+    """Returns the module names of all stages."""
+    return sorted(name[:-3] for name in os.listdir(STAGES_DIR) if name.endswith(".py") and name != "__init__.py")
+
+
+def measure_import(module_name):
+    """
+    Import a module in a fresh interpreter and parse the -X importtime report.
+
+    Returns:
+        tuple: (total_us, {imported module: cumulative_us}) where total_us is the cumulative
+        time of the requested module.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ValueError(f"Importing {module_name} failed:\n{result.stderr.strip()}")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative.get(module_name, 0), cumulative
+
+
+def top_level_imports(cumulative, module_name, count=TOP_IMPORTS):
+    """Returns the most expensive third-party and stdlib packages pulled in by a module."""
+    packages = {name: us for name, us in cumulative.items()
+                if "." not in name and name != module_name and not name.startswith(("stages", "modules"))}
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def run(stages, budget_ms, runs):
+    """
+    Measures each stage and returns {stage: {"import_ms", "budget_ms", "over_budget", "top_imports"}}.
+    """
+    results = {}
+    for stage in stages:
+        module_name = f"stages.{stage}"
+        best_us, best_cumulative = None, {}
+        for _ in range(runs):
+            total_us, cumulative = measure_import(module_name)
+            if best_us is None or total_us < best_us:
+                best_us, best_cumulative = total_us, cumulative
+        import_ms = best_us / 1000
+        results[stage] = {
+            "import_ms": round(import_ms, 1),
+            "budget_ms": budget_ms,
+            "over_budget": import_ms > budget_ms,
+            "top_imports": {name: round(us / 1000, 1) for name, us in top_level_imports(best_cumulative, stage)},
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check stage import times against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum cumulative import time per stage (default: IMPORT_TIME_BUDGET_MS or 150)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Imports per stage; the fastest is kept")
+    parser.add_argument("--stage", action="append", help="Stage to measure (repeatable, default: all)")
+    parser.add_argument("--output", help="Optional JSON file to write the results to")
+    args = parser.parse_args()
+
+    results = run(args.stage or list_stages(), args.budget_ms, args.runs)
+
+    for stage, result in results.items():
+        status = "OVER BUDGET" if result["over_budget"] else "ok"
+        print(f"{stage:<28} {result['import_ms']:>8.1f} ms  {status}")
+        if result["over_budget"]:
+            for name, ms in result["top_imports"].items():
+                print(f"    {name:<24} {ms:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    over_budget = [stage for stage, result in results.items() if result["over_budget"]]
+    if over_budget:
+        print(f"{len(over_budget)} stage(s) over the {args.budget_ms:.0f} ms import budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
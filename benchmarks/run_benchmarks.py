@@ -0,0 +1,360 @@
+# run_benchmarks.py
+
+"""
+Benchmarks the pipeline stages against local stand-in services and synthetic workspaces.
+
+Every run starts the stand-in services (see stub_services.py), points the pipeline at them
+through its environment variables, and times each benchmark --repeat times. Results are
+written as JSON; given a baseline from an earlier run, a benchmark whose median is more
+than --tolerance slower fails the run with exit status 1, so CI can gate on it:
+
+    python -m benchmarks.run_benchmarks --output benchmark-results.json --baseline benchmark-baseline.json
+
+Run it from the repository root. The pipeline modules read their settings when imported,
+so they are only imported once the environment is set up.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.stub_services import start_services, service_environment
+from benchmarks.workspaces import make_workspace, LAYOUTS
+
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.25"))  # allowed slowdown against the baseline
+REGRESSION_FLOOR_MS = 5.0  # slowdowns smaller than this are treated as noise
+
+# name -> setup(context), which prepares the benchmark and returns the callable that is timed
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _write_properties(context, variables):
+    from modules.env_utils import write_properties_file, PROPERTIES_FILE_PATH
+
+    write_properties_file({**context["base_properties"], **variables}, PROPERTIES_FILE_PATH)
+
+
+def _run_stage(main, *args):
+    """Runs a stage's main, turning the exit(1) stages use to report failure into an exception."""
+    try:
+        main(*args)
+    except SystemExit as e:
+        if e.code:
+            raise RuntimeError(f"{main.__module__} exited with status {e.code}") from None
+
+
+def _workspace(context, layout):
+    root = os.path.join(context["work_dir"], f"workspace-{layout}")
+    if not os.path.isdir(root):
+        make_workspace(root, layout, context["files"], context["file_size"])
+    return root
+
+
+def _detect_build_type_benchmark(layout):
+    def setup(context):
+        from modules import workspace_index
+        from modules.build_utils import detect_build_type
+
+        root = _workspace(context, layout)
+
+        def run():
+            # Drop the in-process index, so every run pays for loading and refreshing it like a new stage does
+            workspace_index._indexes.clear()
+            build_type = detect_build_type(root)
+            if build_type != layout:
+                raise RuntimeError(f"Detected {build_type} for a {layout} workspace")
+        return run
+    return setup
+
+
+for _layout in LAYOUTS:
+    benchmark(f"detect_build_type[{_layout}]")(_detect_build_type_benchmark(_layout))
+
+
+@benchmark("tar_package")
+def tar_package(context):
+    from modules.build.perform_tar_build import create_tar_archive
+
+    root = _workspace(context, "tar")
+    output_dir = os.path.join(context["work_dir"], "archives")
+    os.makedirs(output_dir, exist_ok=True)
+    os.chdir(output_dir)
+
+    def run():
+        create_tar_archive(root, "benchmark", "tar-package")
+    return run
+
+
+@benchmark("properties_read")
+def properties_read(context):
+    from modules import env_utils
+
+    _write_properties(context, {f"VARIABLE_{n}": f"value-{n}" for n in range(context["properties"])})
+
+    def run():
+        env_utils._properties_cache.clear()
+        env_utils.read_properties_file(env_utils.PROPERTIES_FILE_PATH)
+    return run
+
+
+@benchmark("properties_update")
+def properties_update(context):
+    from modules import env_utils
+
+    _write_properties(context, {f"VARIABLE_{n}": f"value-{n}" for n in range(context["properties"])})
+    counter = iter(range(sys.maxsize))
+
+    def run():
+        env_utils.add_variables_to_properties_file({"BENCHMARK_COUNTER": next(counter)},
+                                                   env_utils.PROPERTIES_FILE_PATH)
+    return run
+
+
+@benchmark("perform_scans")
+def perform_scans(context):
+    from stages import perform_scans
+
+    scanner = context["services"]["scanner"].url
+    _write_properties(context, {f"{scan}_{key}": value for scan in ("SAST", "DAST", "SONAR")
+                                for key, value in (("URL", f"{scanner}/scan/{scan.lower()}"), ("API_KEY", "key"))})
+    return lambda: _run_stage(perform_scans.main, "ALL")
+
+
+def _deployment_properties(context):
+    config_dir = os.environ["RUNDECK_CONFIG_DIR"]
+    os.makedirs(config_dir, exist_ok=True)
+    nodes = [f"node{n}" for n in range(context["nodes"])]
+    with open(os.path.join(config_dir, "BENCHMARK.json"), 'w') as file:
+        json.dump({env_name: {"tar": {"jobs": ["stop", "deploy"], "nodes": nodes}} for env_name in ("DEV", "UAT")},
+                  file)
+    os.chdir(_workspace(context, "tar"))
+    # Throttling would measure the rate limit, not the code: dispatch as fast as the stand-in answers
+    _write_properties(context, {"RUNDECK_PROJECT": "BENCHMARK", "ENV_NAME": "DEV,UAT", "DEPLOY_RATE_LIMIT": "0",
+                                "DEPLOY_MAX_CONCURRENCY": "50"})
+
+
+@benchmark("perform_code_deployment")
+def perform_code_deployment(context):
+    from stages import perform_code_deployment
+
+    _deployment_properties(context)
+    return lambda: _run_stage(perform_code_deployment.main)
+
+
+@benchmark("schedule_deployment")
+def schedule_deployment(context):
+    from stages import schedule_deployment
+
+    _deployment_properties(context)
+    return lambda: _run_stage(schedule_deployment.main)
+
+
+@benchmark("nexus_upload")
+def nexus_upload(context):
+    from modules.env_utils import NEXUS_URL
+    from modules.nexus_utils import upload_file
+
+    artifact = os.path.join(context["work_dir"], "artifact.bin")
+    with open(artifact, 'wb') as file:
+        file.write(os.urandom(context["artifact_size"]))
+    return lambda: upload_file(artifact, f"{NEXUS_URL}maven-staging")
+
+
+@benchmark("nexus_versions")
+def nexus_versions(context):
+    from modules.nexus_index import refresh_index
+
+    return lambda: refresh_index("maven-release", "com.example", "service")
+
+
+@benchmark("jira_release")
+def jira_release(context):
+    from modules.build.create_manage_jira import create_jira_issues, issue_fields, transition_jira_issues
+
+    _write_properties(context, {"JIRA_USERNAME": "benchmark", "JIRA_PASSWORD": "benchmark"})
+
+    def run():
+        issue_keys = create_jira_issues([issue_fields(f"Release service-{n}", "Benchmark release", project_key="REL")
+                                         for n in range(context["services_per_release"])])
+        if not all(transition_jira_issues(issue_keys, "In Progress").values()):
+            raise RuntimeError("Not all JIRA issues were transitioned")
+    return run
+
+
+@benchmark("servicenow_change_request")
+def servicenow_change_request(context):
+    from modules.servicenow_utils import create_change_request
+
+    _write_properties(context, {"SERVICENOW_USERNAME": "benchmark", "SERVICENOW_PASSWORD": "benchmark"})
+    counter = iter(range(sys.maxsize))
+
+    def run():
+        # A new change request, then the retried build finding it again
+        correlation_id = f"benchmark-{next(counter)}"
+        created = create_change_request({"short_description": "Benchmark release"}, correlation_id)
+        if create_change_request({"short_description": "Benchmark release"}, correlation_id) != created:
+            raise RuntimeError("The retried change request was not reused")
+    return run
+
+
+@benchmark("prepare_env_lookups")
+def prepare_env_lookups(context):
+    from stages.prepare_env import get_minion_auth_token, fetch_git_info
+
+    os.environ["MINION_TOKEN"] = "benchmark"
+
+    def run():
+        get_minion_auth_token()
+        fetch_git_info()
+    return run
+
+
+def run_benchmark(name, context, repeat):
+    """
+    Set up and time one benchmark.
+
+    Returns:
+        dict: min_ms, median_ms and max_ms over the runs, or the error that stopped it.
+    """
+    cwd = os.getcwd()
+    try:
+        run = BENCHMARKS[name](context)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        os.chdir(cwd)
+    return {"min_ms": round(min(timings), 2), "median_ms": round(statistics.median(timings), 2),
+            "max_ms": round(max(timings), 2), "runs": repeat}
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    Compare medians with a baseline result file.
+
+    Returns:
+        list: (name, baseline_ms, current_ms) for benchmarks more than `tolerance` slower.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("benchmarks", {}).get(name, {})
+        if "median_ms" not in result or "median_ms" not in previous:
+            continue
+        if result["median_ms"] > previous["median_ms"] * (1 + tolerance) \
+                and result["median_ms"] - previous["median_ms"] > REGRESSION_FLOOR_MS:
+            regressions.append((name, previous["median_ms"], result["median_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages against local stand-in services.")
+    parser.add_argument("--benchmark", action="append",
+                        help=f"Benchmark to run (repeatable, default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per benchmark")
+    parser.add_argument("--files", type=int, default=1000, help="Source files per synthetic workspace")
+    parser.add_argument("--file-size", type=int, default=4096, help="Approximate bytes per source file")
+    parser.add_argument("--nodes", type=int, default=50, help="Rundeck nodes per environment")
+    parser.add_argument("--properties", type=int, default=200, help="Variables in env.properties")
+    parser.add_argument("--artifact-size", type=int, default=16 * 1024 ** 2, help="Bytes of the uploaded artifact")
+    parser.add_argument("--services-per-release", type=int, default=40, help="JIRA issues per release")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every stand-in request")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Fraction of stand-in requests failed with a retryable 503")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="Results of an earlier run to check for regressions against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown of a median against the baseline (default: BENCHMARK_TOLERANCE or 0.25)")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's log output")
+    args = parser.parse_args()
+
+    unknown = set(args.benchmark or []) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    work_dir = tempfile.mkdtemp(prefix="pipeline-benchmarks-")
+    services = start_services(latency=args.latency_ms / 1000, failure_rate=args.failure_rate)
+    os.environ.update(service_environment(services))
+    os.environ.update({
+        "WORKSPACE": work_dir,
+        "RUNDECK_CONFIG_DIR": os.path.join(work_dir, "rundeck"),
+        "NEXUS_INDEX_DIR": os.path.join(work_dir, "nexus-index"),
+        "BUILD_TRACE": "false",
+    })
+    # Without a build id every stage rescans its workspace index, as a new build would
+    os.environ.pop("BUILD_TAG", None)
+
+    context = {
+        "work_dir": work_dir,
+        "services": services,
+        "files": args.files,
+        "file_size": args.file_size,
+        "nodes": args.nodes,
+        "properties": args.properties,
+        "artifact_size": args.artifact_size,
+        "services_per_release": args.services_per_release,
+        "base_properties": {"REPO_NAME": "benchmark", "BRANCH_NAME": "develop"},
+    }
+
+    results = {}
+    try:
+        for name in args.benchmark or BENCHMARKS:
+            results[name] = result = run_benchmark(name, context, args.repeat)
+            if "error" in result:
+                print(f"{name:<36} FAILED: {result['error']}")
+            else:
+                print(f"{name:<36} {result['median_ms']:>10.1f} ms median  "
+                      f"({result['min_ms']:.1f} - {result['max_ms']:.1f} ms)")
+    finally:
+        for service in services.values():
+            service.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("benchmark", "output", "baseline", "verbose")},
+        "benchmarks": results,
+        "services": {name: service.stats for name, service in services.items()},
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    failed = [name for name, result in results.items() if "error" in result]
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            regressions = find_regressions(results, json.load(file), args.tolerance)
+        for name, previous_ms, current_ms in regressions:
+            print(f"REGRESSION {name}: {previous_ms:.1f} ms -> {current_ms:.1f} ms "
+                  f"(+{(current_ms / previous_ms - 1) * 100:.0f}%, tolerance {args.tolerance * 100:.0f}%)")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
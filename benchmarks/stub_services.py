@@ -0,0 +1,252 @@
+# stub_services.py
+
+"""
+Local stand-ins for the HTTP services the pipeline talks to, for benchmarks.
+
+Each service is a threaded HTTP/1.1 server on 127.0.0.1 answering just the API calls the
+stages make, with canned or in-memory responses. Latency is added to every request, and
+a fraction of requests can be failed with 503 + Retry-After: 0, which the shared HTTP
+client retries, to measure the cost of retries.
+"""
+
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class StubService:
+    """
+    A local HTTP server dispatching requests to route handlers.
+
+    Args:
+        name (str): Service name, used in reports.
+        routes (list): (method, path regex, handler) tuples. A handler receives the path
+            match, the query parameters and the parsed request body, and returns
+            (status code, JSON payload).
+        latency (float): Seconds added to every request.
+        failure_rate (float): Fraction of requests answered with 503 + Retry-After: 0.
+        seed (int): Seed of the failure injection, so runs are repeatable.
+    """
+
+    def __init__(self, name, routes, latency=0.0, failure_rate=0.0, seed=0):
+        self.name = name
+        self.routes = [(method, re.compile(pattern), handler) for method, pattern, handler in routes]
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "injected_failures": 0}
+        self.server = None
+        self.url = None
+
+    def handle(self, method, raw_path, body):
+        time.sleep(self.latency)
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.failure_rate and self.random.random() < self.failure_rate:
+                self.stats["injected_failures"] += 1
+                return 503, {"error": "injected failure"}
+        parsed = urlsplit(raw_path)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(parsed.path)
+            if route_method == method and match:
+                return handler(match, query, body)
+        return 404, {"error": f"{self.name} stub has no route for {method} {parsed.path}"}
+
+    def start(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse behaves as against the real services
+            # Headers and body go out in separate writes; with Nagle on, delayed ACKs add ~40ms to every response
+            disable_nagle_algorithm = True
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw_body) if raw_body[:1] in (b"{", b"[") else raw_body
+                except ValueError:
+                    body = raw_body
+                status, payload = service.handle(self.command, self.path, body)
+                data = b"" if status == 204 else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 503:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def rundeck_service(**options):
+    """Rundeck: login, job runs (immediate or scheduled) and execution output that completes at once."""
+    execution_ids = itertools.count(1)
+
+    def run_job(match, query, body):
+        return 200, {"id": next(execution_ids), "job": {"id": match.group(1)}}
+
+    def output(match, query, body):
+        return 200, {"entries": [{"log": "deployed"}], "offset": "1", "execCompleted": True, "completed": True,
+                     "execState": "succeeded"}
+
+    return StubService("rundeck", [
+        ("POST", r"/j_security_check", lambda match, query, body: (200, {})),
+        ("POST", r"/api/\d+/job/([^/]+)/run", run_job),
+        ("GET", r"/api/\d+/execution/\d+/output", output),
+        ("GET", r"/api/\d+/execution/\d+", lambda match, query, body: (200, {"status": "succeeded"})),
+    ], **options)
+
+
+def nexus_service(version_count=500, page_size=50, **options):
+    """Nexus: artifact and checksum uploads, and a paginated search over `version_count` versions."""
+    versions = [f"1.{minor}.{patch}" for minor in range(version_count // 10 + 1) for patch in range(10)]
+    versions = sorted(versions[:version_count], key=lambda v: tuple(map(int, v.split("."))), reverse=True)
+
+    def search(match, query, body):
+        offset = int(query.get("continuationToken", 0))
+        page = versions[offset:offset + page_size]
+        token = str(offset + page_size) if offset + page_size < len(versions) else None
+        return 200, {"items": [{"version": version} for version in page], "continuationToken": token}
+
+    return StubService("nexus", [
+        ("PUT", r"/repository/.+", lambda match, query, body: (201, {})),
+        ("GET", r"/service/rest/v1/search", search),
+    ], **options)
+
+
+def jira_service(**options):
+    """JIRA: bulk issue creation, key searches, and transitions from "To Do"."""
+    issue_numbers = itertools.count(1)
+
+    def bulk_create(match, query, body):
+        return 201, {"issues": [{"key": f"REL-{next(issue_numbers)}"} for _ in body["issueUpdates"]], "errors": []}
+
+    def search(match, query, body):
+        keys = re.findall(r"[A-Z]+-\d+", body["jql"])
+        return 200, {"issues": [{"key": key, "fields": {"project": {"key": "REL"}, "issuetype": {"name": "Task"},
+                                                        "status": {"name": "To Do"}}} for key in keys]}
+
+    return StubService("jira", [
+        ("POST", r"/rest/api/2/issue/bulk", bulk_create),
+        ("POST", r"/rest/api/2/search", search),
+        ("GET", r"/rest/api/2/issue/[^/]+/transitions",
+         lambda match, query, body: (200, {"transitions": [{"id": "21", "name": "In Progress"},
+                                                           {"id": "31", "name": "Done"}]})),
+        ("POST", r"/rest/api/2/issue/[^/]+/transitions", lambda match, query, body: (204, {})),
+    ], **options)
+
+
+def servicenow_service(**options):
+    """ServiceNow: change requests kept in memory, found by correlation id and approved on creation."""
+    change_requests = []
+    lock = threading.Lock()
+
+    def query_table(match, query, body):
+        conditions = dict(condition.split("=", 1) for condition in query.get("sysparm_query", "").split("^")
+                          if "=" in condition and "!=" not in condition)
+        with lock:
+            records = [record for record in change_requests
+                       if all(record.get(field) == value for field, value in conditions.items())]
+        return 200, {"result": records[:int(query.get("sysparm_limit", 100))]}
+
+    def create(match, query, body):
+        with lock:
+            number = len(change_requests) + 1
+            record = {**body, "sys_id": f"{number:032x}", "number": f"CHG{number:07d}", "state": "-4",
+                      "approval": "approved", "active": "true"}
+            change_requests.append(record)
+        return 201, {"result": record}
+
+    return StubService("servicenow", [
+        ("GET", r"/api/now/table/change_request", query_table),
+        ("POST", r"/api/now/table/change_request", create),
+    ], **options)
+
+
+def minion_service(**options):
+    """Minion: the auth token endpoint."""
+    return StubService("minion", [
+        ("GET", r"/getAuthToken", lambda match, query, body: (200, {"token": "stub-token"})),
+    ], **options)
+
+
+def github_service(**options):
+    """GitHub: the latest pull request and release of a repository."""
+    return StubService("github", [
+        ("GET", r"/repos/[^/]+/[^/]+/pulls", lambda match, query, body: (200, [{"number": 42}])),
+        ("GET", r"/repos/[^/]+/[^/]+/releases/latest", lambda match, query, body: (200, {"tag_name": "v1.0.0"})),
+    ], **options)
+
+
+def scanner_service(**options):
+    """SAST, DAST and Sonar scan endpoints, which the scan stage POSTs to."""
+    return StubService("scanner", [
+        ("POST", r"/scan/\w+", lambda match, query, body: (200, {"status": "completed", "issues": 0})),
+    ], **options)
+
+
+SERVICES = {
+    "rundeck": rundeck_service,
+    "nexus": nexus_service,
+    "jira": jira_service,
+    "servicenow": servicenow_service,
+    "minion": minion_service,
+    "github": github_service,
+    "scanner": scanner_service,
+}
+
+
+def start_services(latency=0.0, failure_rate=0.0, seed=0):
+    """Starts every stand-in service and returns them by name."""
+    return {name: factory(latency=latency, failure_rate=failure_rate, seed=seed).start()
+            for name, factory in SERVICES.items()}
+
+
+def service_environment(services):
+    """
+    Returns the environment variables pointing the pipeline at the stand-in services.
+
+    They must be set before the pipeline modules are imported, as those read their
+    service URLs at import time.
+    """
+    return {
+        "RUNDECK_URL": services["rundeck"].url,
+        "RD_USR": "benchmark",
+        "RD_PASS": "benchmark",
+        "NEXUS_URL": f"{services['nexus'].url}/repository/",
+        "NEXUS_API_URL": services["nexus"].url,
+        "JIRA_URL": services["jira"].url,
+        "SERVICENOW_URL": services["servicenow"].url,
+        "MINION_TOKEN_URL": f"{services['minion'].url}/getAuthToken",
+        "GIT_BASE_URL": f"{services['github'].url}/repos/example/service",
+    }
@@ -0,0 +1,95 @@
+# workspaces.py
+
+"""
+Synthetic workspaces for benchmarks, laid out like the projects the pipeline builds.
+
+Every layout gets its marker files (pom.xml, package.json, Dockerfile), `files` source
+files of about `file_size` bytes spread over `depth` directory levels, and a .git
+directory that the build tools are expected to skip. Contents are generated from a
+seed, so the same arguments always produce the same workspace.
+"""
+
+import json
+import os
+import random
+
+LAYOUTS = ("maven", "npm", "docker", "tar")
+WORDS = ["build", "deploy", "release", "service", "config", "artifact", "node", "stage", "cache", "index",
+         "request", "response", "version", "module", "package", "layer", "image", "archive", "scan", "report"]
+
+# Per layout: (source directory, file name pattern)
+SOURCE_FILES = {
+    "maven": (os.path.join("src", "main", "java", "com", "example"), "Class{n}.java"),
+    "npm": ("src", "module{n}.js"),
+    "docker": ("app", "handler{n}.py"),
+    "tar": ("scripts", "task{n}.sh"),
+}
+
+
+def _text(rng, size):
+    """Returns about `size` bytes of compressible, source-like text."""
+    lines, length = [], 0
+    while length < size:
+        line = " ".join(rng.choices(WORDS, k=rng.randint(4, 12)))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(content)
+
+
+def _marker_files(layout, name):
+    if layout == "maven":
+        return {"pom.xml": f"<project><groupId>com.example</groupId><artifactId>{name}</artifactId>"
+                           f"<version>1.0.0-SNAPSHOT</version></project>\n"}
+    if layout == "npm":
+        return {"package.json": json.dumps({"name": name, "version": "1.0.0", "dependencies": {"left-pad": "1.3.0"}}),
+                "package-lock.json": json.dumps({"name": name, "lockfileVersion": 3, "packages": {}})}
+    if layout == "docker":
+        return {"Dockerfile": "FROM rhel8-minimal\nRUN microdnf install -y python3 && microdnf clean all\n"
+                              "COPY app /opt/app\nCMD [\"python3\", \"/opt/app/handler0.py\"]\n"}
+    return {}
+
+
+def make_workspace(root, layout="tar", files=200, file_size=2048, depth=3, seed=0):
+    """
+    Create a synthetic workspace under `root`.
+
+    Args:
+        root (str): Directory to create the workspace in; created if missing.
+        layout (str): One of "maven", "npm", "docker" or "tar".
+        files (int): Number of source files.
+        file_size (int): Approximate size of each source file in bytes.
+        depth (int): Directory levels the source files are spread over.
+        seed (int): Seed of the generated contents.
+
+    Returns:
+        str: The workspace root.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown workspace layout: {layout}, expected one of {', '.join(LAYOUTS)}")
+    rng = random.Random(seed)
+    name = f"benchmark-{layout}"
+
+    for file_name, content in _marker_files(layout, name).items():
+        _write(os.path.join(root, file_name), content)
+
+    source_dir, file_pattern = SOURCE_FILES[layout]
+    for n in range(files):
+        # Spread files over `depth` levels with a fan-out of 8 directories per level
+        subdirs = [f"pkg{(n // 8 ** level) % 8}" for level in range(1, depth)]
+        _write(os.path.join(root, source_dir, *subdirs, file_pattern.format(n=n)), _text(rng, file_size))
+
+    if layout == "npm":
+        # Installed dependencies, which packaging excludes
+        for n in range(max(files // 4, 1)):
+            _write(os.path.join(root, "node_modules", f"dep{n % 20}", f"index{n}.js"), _text(rng, file_size))
+
+    for n in range(max(files // 10, 1)):
+        _write(os.path.join(root, ".git", "objects", f"{n % 256:02x}", f"object{n}"), _text(rng, file_size // 2))
+    _write(os.path.join(root, ".git", "HEAD"), "ref: refs/heads/master\n")
+    return root
@@ -0,0 +1,227 @@
+# archive_utils.py
+
+import hashlib
+import os
+import struct
+import tarfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import PROPERTIES_FILE_NAME
+from modules.trace_utils import span
+from modules.workspace_index import is_excluded
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+# Paths left out of archives unless the caller passes its own exclusion globs
+DEFAULT_EXCLUDES = [".git", ".build-tools", "node_modules"]
+# Files at the archive root that are never archived: env.properties holds this build's tag and credentials
+ALWAYS_EXCLUDED_FILES = {PROPERTIES_FILE_NAME}
+ARCHIVE_EXTENSIONS = (".tar.gz", ".tar.zst")
+
+BLOCK_SIZE = 1024 * 1024  # uncompressed bytes per parallel gzip block
+DICTIONARY_SIZE = 32 * 1024  # deflate window primed from the previous block
+CHECKSUM_ALGORITHMS = ["sha1", "md5"]
+
+
+class _HashingWriter:
+    """Writes to a file while computing checksums of everything written."""
+
+    def __init__(self, file, algorithms):
+        self.file = file
+        self.hashes = {name: hashlib.new(name) for name in algorithms}
+
+    def write(self, data):
+        for hasher in self.hashes.values():
+            hasher.update(data)
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+
+def _compress_block(block, dictionary, level, last):
+    """Deflates one block as raw deflate, primed with the tail of the previous block."""
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL,
+                                      zlib.Z_DEFAULT_STRATEGY, dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class ParallelGzipWriter:
+    """
+    File-like writer producing a single gzip member from blocks deflated in parallel (pigz-style).
+
+    Each block is compressed independently with the previous 32 KiB as preset dictionary and
+    ends on a byte boundary, so the concatenated blocks form one valid deflate stream. zlib
+    releases the GIL while compressing, so threads scale across cores. At most two blocks per
+    worker are in flight, which bounds memory regardless of the archive size.
+    """
+
+    def __init__(self, file, level=6, workers=None, block_size=BLOCK_SIZE):
+        self.file = file
+        self.level = level
+        self.block_size = block_size
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.pending = deque()
+        self.buffer = bytearray()
+        self.dictionary = b""
+        self.crc = 0
+        self.size = 0
+        self.closed = False
+        # gzip header: magic, deflate, no flags, mtime, no extra flags, unknown OS
+        self.file.write(b"\x1f\x8b\x08\x00" + struct.pack("<I", int(time.time())) + b"\x00\xff")
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            block = bytes(self.buffer[:self.block_size])
+            del self.buffer[:self.block_size]
+            self._submit(block, last=False)
+        return len(data)
+
+    def _submit(self, block, last):
+        self.pending.append(self.executor.submit(_compress_block, block, self.dictionary, self.level, last))
+        self.dictionary = block[-DICTIONARY_SIZE:]
+        while len(self.pending) > self.workers * 2:
+            self.file.write(self.pending.popleft().result())
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._submit(bytes(self.buffer), last=True)
+            self.buffer = bytearray()
+            while self.pending:
+                self.file.write(self.pending.popleft().result())
+            self.file.write(struct.pack("<II", self.crc, self.size & 0xFFFFFFFF))
+        finally:
+            self.executor.shutdown()
+
+
+def get_archive_excludes(env_variables):
+    """
+    Returns the exclusion globs of workspace archives: ARCHIVE_EXCLUDES, or DEFAULT_EXCLUDES.
+
+    Archives of earlier builds of the repository (and their checksum files) are always left out.
+    """
+    exclude = env_variables.get("ARCHIVE_EXCLUDES", ",".join(DEFAULT_EXCLUDES)).split(",")
+    repo_name = env_variables.get("REPO_NAME")
+    if repo_name:
+        exclude += [f"{repo_name}-*{extension}*" for extension in ARCHIVE_EXTENSIONS]
+    return exclude
+
+
+def archive_extension(archive_path):
+    """Returns the extension of an archive written by create_archive, e.g. ".tar.gz"."""
+    return next((extension for extension in ARCHIVE_EXTENSIONS if archive_path.endswith(extension)),
+                os.path.splitext(archive_path)[1])
+
+
+def iter_archive_members(source_dir, exclude, index=None):
+    """
+    Yields (path, arcname) for every directory and file under source_dir not excluded.
+
+    ALWAYS_EXCLUDED_FILES at the top of source_dir are left out whatever the exclusion globs.
+
+    When a workspace index of source_dir is given, members are taken from it instead of
+    walking the tree again.
+    """
+    if index is not None:
+        for relative_path in sorted(index.entries):
+            if relative_path not in ALWAYS_EXCLUDED_FILES and not is_excluded(relative_path, exclude):
+                yield os.path.join(source_dir, relative_path), relative_path.replace("/", os.sep)
+        return
+
+    for root, dirs, files in os.walk(source_dir):
+        relative_root = os.path.relpath(root, source_dir)
+        relative_root = "" if relative_root == "." else relative_root
+        dirs[:] = sorted(d for d in dirs if not is_excluded(os.path.join(relative_root, d), exclude))
+        for name in dirs:
+            yield os.path.join(root, name), os.path.join(relative_root, name)
+        for name in sorted(files):
+            relative_path = os.path.join(relative_root, name)
+            if relative_path not in ALWAYS_EXCLUDED_FILES and not is_excluded(relative_path, exclude):
+                yield os.path.join(root, name), relative_path
+
+
+def create_archive(output_base, source_dir, arcname_prefix="", exclude=None, compression="gzip",
+                   level=None, workers=None, index=None):
+    """
+    Stream a directory into a compressed tarball and write its checksum sidecar files.
+
+    The tar stream is compressed with parallel gzip (or zstd, when requested and installed)
+    and hashed as it is written, so the artifact and its checksums come out of one pass.
+
+    Args:
+        output_base (str): Archive path without extension.
+        source_dir (str): Directory to archive.
+        arcname_prefix (str): Optional directory name that members are stored under.
+        exclude (list): Exclusion globs, matched against relative paths and path components.
+            Defaults to DEFAULT_EXCLUDES.
+        compression (str): "gzip" or "zstd". Falls back to gzip if zstandard is not installed.
+        level (int): Optional compression level.
+        workers (int): Number of compression threads. Defaults to the CPU count.
+        index (WorkspaceIndex): Optional index of source_dir to list members from. Ignored
+            if the index leaves out paths that the exclusion globs would keep.
+
+    Returns:
+        tuple: (archive_path, checksums) where checksums maps algorithm name to hex digest.
+    """
+    exclude = list(DEFAULT_EXCLUDES if exclude is None else exclude)
+    if compression == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed, falling back to gzip compression")
+        compression = "gzip"
+    archive_path = output_base + ARCHIVE_EXTENSIONS[1 if compression == "zstd" else 0]
+
+    # Never archive the archive itself when it is written inside the source directory
+    archive_relative = os.path.relpath(os.path.abspath(archive_path), os.path.abspath(source_dir))
+    if not archive_relative.startswith(".."):
+        exclude.append(archive_relative.replace(os.sep, "/"))
+
+    if index is not None and not index.covers(exclude):
+        logger.info("Workspace index ignores paths that are archived, walking the directory instead")
+        index = None
+
+    start = time.monotonic()
+    with span("create_archive", "packaging", archive=archive_path, compression=compression), \
+            open(archive_path, 'wb') as file:
+        hashing_writer = _HashingWriter(file, CHECKSUM_ALGORITHMS)
+        if compression == "zstd":
+            compressor = zstandard.ZstdCompressor(level=level or 3, threads=workers or -1)
+            stream = compressor.stream_writer(hashing_writer, closefd=False)
+        else:
+            stream = ParallelGzipWriter(hashing_writer, level=level or 6, workers=workers)
+        try:
+            with tarfile.open(fileobj=stream, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                for path, relative_path in iter_archive_members(source_dir, exclude, index):
+                    tar.add(path, arcname=os.path.join(arcname_prefix, relative_path), recursive=False)
+        finally:
+            stream.close()
+
+    checksums = {name: hasher.hexdigest() for name, hasher in hashing_writer.hashes.items()}
+    for name, digest in checksums.items():
+        with open(f"{archive_path}.{name}", 'w') as file:
+            file.write(digest)
+
+    logger.info(f"Created {archive_path} ({os.path.getsize(archive_path)} bytes, {compression}) "
+                f"in {time.monotonic() - start:.1f}s")
+    return archive_path, checksums
@@ -1,100 +1,222 @@
-import requests
-from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH
+import threading
+
+from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, JIRA_URL, JIRA_BULK_SIZE, JIRA_WORKERS
+from modules.http_client import send_request
+from modules.parallel_utils import run_tasks_concurrently
+
+# Credentials are read once per process; every call then reuses them on the shared, pooled session
+_credentials = None
+_credentials_lock = threading.Lock()
+
+# Transition ids by (project, issue type, status): {transition name (lower case): id}
+_transition_cache = {}
+# One lock per (project, issue type, status); _transition_lock only guards creating them
+_transition_locks = {}
+_transition_lock = threading.Lock()
 
 
 # Function to read JIRA credentials
 def read_jira_credentials():
-    env_variables = read_properties_file(PROPERTIES_FILE_PATH)
-    jira_username = env_variables.get("JIRA_USERNAME")
-    jira_password = env_variables.get("JIRA_PASSWORD")
-    return jira_username, jira_password
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            env_variables = read_properties_file(PROPERTIES_FILE_PATH)
+            _credentials = (env_variables.get("JIRA_USERNAME"), env_variables.get("JIRA_PASSWORD"))
+    return _credentials
 
 
-# Function to create a JIRA issue
-def create_jira_issue(summary, description, issue_type="Task"):
-    try:
-        # Read JIRA credentials
-        jira_username, jira_password = read_jira_credentials()
+# Function to call the JIRA REST API
+def jira_request(method, path, **kwargs):
+    return send_request(method, f"{JIRA_URL.rstrip('/')}/rest/api/2/{path}", auth=read_jira_credentials(),
+                        headers={"Content-Type": "application/json"}, **kwargs)
 
-        # JIRA API endpoint
-        jira_api_url = "https://your-jira-instance.atlassian.net/rest/api/2/issue/"
 
-        # Request headers
-        headers = {
-            "Content-Type": "application/json"
-        }
-
-        # Request body
-        payload = {
-            "fields": {
-                "summary": summary,
-                "description": description,
-                "issuetype": {
-                    "name": issue_type
-                }
-            }
+# Function to parse a JSON response body, failing with the request it belongs to
+def parse_json(response, request):
+    try:
+        return response.json()
+    except ValueError:
+        raise ValueError(f"{request} returned an invalid JSON response (status code {response.status_code}): "
+                         f"{response.text[:200]}") from None
+
+
+# Function to build the create payload of one issue
+def issue_fields(summary, description, issue_type="Task", project_key=None):
+    fields = {
+        "summary": summary,
+        "description": description,
+        "issuetype": {
+            "name": issue_type
         }
+    }
+    if project_key:
+        fields["project"] = {"key": project_key}
+    return fields
+
+
+# Function to match the issues of one bulk create response to the request's elements
+def match_created_issues(batch, result):
+    """
+    Returns the key created for each element of a bulk create request, or None where JIRA rejected it.
+
+    Rejected elements are identified by the failedElementNumber of their error; the created
+    issues come back in request order without them. If the errors cannot be mapped to
+    elements, or the counts do not add up, the position tells nothing, and the created
+    issues are matched to the elements by summary instead.
+    """
+    failed = {}
+    for error in result.get("errors", []):
+        number = error.get("failedElementNumber")
+        failed[int(number) if str(number).isdigit() else None] = error
+    created = [issue.get("key") for issue in result.get("issues", [])]
+
+    for number, error in failed.items():
+        summary = batch[number].get("summary") if number is not None and number < len(batch) else "unknown"
+        print(f"Failed to create JIRA issue '{summary}': {error.get('elementErrors')}")
+
+    accepted = [number for number in range(len(batch)) if number not in failed]
+    if None not in failed and len(accepted) == len(created):
+        keys = [None] * len(batch)
+        for number, key in zip(accepted, created):
+            keys[number] = key
+        return keys
+
+    print(f"JIRA returned {len(created)} issue(s) and {len(failed)} error(s) for {len(batch)} request(s), "
+          f"matching the created issues by summary")
+    summaries = {}
+    for issue in search_issues(created, ["summary"]):
+        summaries.setdefault(issue["fields"]["summary"], []).append(issue["key"])
+    return [(summaries.get(fields.get("summary")) or [None]).pop(0) for fields in batch]
+
+
+# Function to create JIRA issues in bulk
+def create_jira_issues(issues):
+    """
+    Create issues with the bulk create endpoint, JIRA_BULK_SIZE issues per call.
+
+    Args:
+        issues (list): Field dicts as built by issue_fields.
+
+    Returns:
+        list: The key of each created issue, or None where JIRA rejected it, in input order.
+    """
+    issue_keys = [None] * len(issues)
+    for offset in range(0, len(issues), JIRA_BULK_SIZE):
+        batch = issues[offset:offset + JIRA_BULK_SIZE]
+        try:
+            response = jira_request("POST", "issue/bulk", json={"issueUpdates": [{"fields": f} for f in batch]})
+            # JIRA answers 201 when all issues were created and 400 with per-element errors otherwise
+            if response.status_code not in (200, 201, 400):
+                print(f"Failed to create JIRA issues. Status code: {response.status_code}, Error: {response.text}")
+                continue
+            issue_keys[offset:offset + len(batch)] = match_created_issues(batch, parse_json(response,
+                                                                                            "JIRA bulk create"))
+        except Exception as e:
+            print(f"An error occurred while creating JIRA issues: {e}")
+
+    created_count = sum(key is not None for key in issue_keys)
+    print(f"Created {created_count} of {len(issues)} JIRA issue(s) in "
+          f"{(len(issues) + JIRA_BULK_SIZE - 1) // JIRA_BULK_SIZE} call(s)")
+    return issue_keys
 
-        # Make API call to create JIRA issue
-        response = requests.post(
-            jira_api_url,
-            headers=headers,
-            auth=(jira_username, jira_password),
-            json=payload
-        )
-
-        # Check response status
-        if response.status_code == 201:
-            jira_issue_key = response.json().get("key")
-            print(f"JIRA issue created successfully with key: {jira_issue_key}")
-            return jira_issue_key
-        else:
-            print(f"Failed to create JIRA issue. Status code: {response.status_code}, Error: {response.text}")
-            return None
 
-    except Exception as e:
-        print(f"An error occurred while creating JIRA issue: {e}")
-        return None
+# Function to create a JIRA issue
+def create_jira_issue(summary, description, issue_type="Task"):
+    issue_key = create_jira_issues([issue_fields(summary, description, issue_type)])[0]
+    if issue_key:
+        print(f"JIRA issue created successfully with key: {issue_key}")
+    return issue_key
+
+
+# Function to read fields of several issues, JIRA_BULK_SIZE issues per search
+def search_issues(issue_keys, fields):
+    issues = []
+    for offset in range(0, len(issue_keys), JIRA_BULK_SIZE):
+        batch = issue_keys[offset:offset + JIRA_BULK_SIZE]
+        response = jira_request("POST", "search", json={"jql": f"key in ({','.join(batch)})", "fields": fields,
+                                                        "maxResults": len(batch)})
+        if response.status_code != 200:
+            raise ValueError(f"JIRA search failed with status code {response.status_code}: {response.text}")
+        issues += parse_json(response, "JIRA search").get("issues", [])
+    return issues
+
+
+# Function to look up the workflow state of several issues in one search
+def get_issue_states(issue_keys):
+    """
+    Returns:
+        dict: {issue key: (project key, issue type, status)}.
+    """
+    states = {}
+    for issue in search_issues(issue_keys, ["project", "issuetype", "status"]):
+        fields = issue["fields"]
+        states[issue["key"]] = (fields["project"]["key"], fields["issuetype"]["name"], fields["status"]["name"])
+    return states
+
+
+# Function to resolve a transition name to its id, looked up once per project, issue type and status
+def get_transition_id(issue_key, transition, state):
+    if str(transition).isdigit():
+        return str(transition)
+    if state is None:
+        raise ValueError(f"JIRA issue {issue_key} not found")
+    with _transition_lock:
+        state_lock = _transition_locks.setdefault(state, threading.Lock())
+    # Held during the lookup, so issues in the same state wait for one lookup instead of each making it,
+    # while lookups for other states go ahead in parallel
+    with state_lock:
+        transitions = _transition_cache.get(state)
+        if transitions is None:
+            response = jira_request("GET", f"issue/{issue_key}/transitions")
+            if response.status_code != 200:
+                raise ValueError(f"Failed to read transitions of {issue_key}. Status code: {response.status_code}")
+            transitions = {t["name"].lower(): t["id"]
+                           for t in parse_json(response, "JIRA transitions").get("transitions", [])}
+            _transition_cache[state] = transitions
+    transition_id = transitions.get(str(transition).lower())
+    if transition_id is None:
+        raise ValueError(f"No transition '{transition}' from {state[2]} for {state[1]} in {state[0]}, "
+                         f"available: {', '.join(transitions) or 'none'}")
+    return transition_id
+
+
+# Function to transition several JIRA issues
+def transition_jira_issues(issue_keys, transition):
+    """
+    Move issues through a workflow transition, given by name (e.g. "Done") or id.
+
+    The current state of all issues is read with one search, the transition id is looked
+    up once per project, issue type and status and then cached, and the transitions,
+    which JIRA has no bulk endpoint for, run concurrently (JIRA_WORKERS at a time).
+
+    Returns:
+        dict: {issue key: True if transitioned, else False}.
+    """
+    issue_keys = [key for key in issue_keys if key]
+    if not issue_keys:
+        return {}
+    states = {} if str(transition).isdigit() else get_issue_states(issue_keys)
+
+    def make_task(issue_key):
+        def task():
+            transition_id = get_transition_id(issue_key, transition, states.get(issue_key))
+            response = jira_request("POST", f"issue/{issue_key}/transitions",
+                                    json={"transition": {"id": transition_id}})
+            if response.status_code != 204:
+                raise ValueError(f"Status code: {response.status_code}, Error: {response.text}")
+        return task
+
+    _, _, errors = run_tasks_concurrently({key: make_task(key) for key in issue_keys}, max_workers=JIRA_WORKERS)
+    for issue_key, error in errors.items():
+        print(f"Failed to transition JIRA issue {issue_key}: {error}")
+    print(f"Transitioned {len(issue_keys) - len(errors)} of {len(issue_keys)} JIRA issue(s)")
+    return {key: key not in errors for key in issue_keys}
 
 
 # Function to transition JIRA issue status
 def transition_jira_issue_status(issue_key, transition_id):
     try:
-        # Read JIRA credentials
-        jira_username, jira_password = read_jira_credentials()
-
-        # JIRA API endpoint
-        jira_api_url = f"https://your-jira-instance.atlassian.net/rest/api/2/issue/{issue_key}/transitions"
-
-        # Request headers
-        headers = {
-            "Content-Type": "application/json"
-        }
-
-        # Request body
-        payload = {
-            "transition": {
-                "id": transition_id
-            }
-        }
-
-        # Make API call to transition JIRA issue status
-        response = requests.post(
-            jira_api_url,
-            headers=headers,
-            auth=(jira_username, jira_password),
-            json=payload
-        )
-
-        # Check response status
-        if response.status_code == 204:
-            print(f"JIRA issue status transitioned successfully for issue: {issue_key}")
-            return True
-        else:
-            print(
-                f"Failed to transition JIRA issue status. Status code: {response.status_code}, Error: {response.text}")
-            return False
-
+        return transition_jira_issues([issue_key], transition_id).get(issue_key, False)
     except Exception as e:
         print(f"An error occurred while transitioning JIRA issue status: {e}")
         return False
@@ -102,15 +224,13 @@ def transition_jira_issue_status(issue_key, transition_id):
 
 # Example usage
 def main():
-    # Create JIRA issue
-    summary = "Summary of the issue"
-    description = "Description of the issue"
-    issue_key = create_jira_issue(summary, description)
+    # Create one JIRA issue per service of the release in a single call
+    services = ["service-a", "service-b", "service-c"]
+    issue_keys = create_jira_issues([issue_fields(f"Release {service}", f"Deployment of {service}")
+                                     for service in services])
 
-    if issue_key:
-        # Transition JIRA issue status
-        transition_id = "ID_OF_TRANSITION"
-        transition_jira_issue_status(issue_key, transition_id)
+    # Transition them by name; the transition id is looked up once
+    transition_jira_issues(issue_keys, "In Progress")
 
 
 if __name__ == "__main__":
@@ -1,18 +1,206 @@
 # perform_docker_build.py
-import shutil
+import hashlib
+import os
+import re
 import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from modules.custom_logger import setup_custom_logger
-from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, check_variable, get_nexus_url
+from modules.env_utils import (read_properties_file, PROPERTIES_FILE_PATH, check_variable, get_nexus_url,
+                               DOCKER_BASE_IMAGE, DOCKER_LAYER_CACHE_ENABLED, DOCKER_LAYER_CACHE_REPO)
+from modules.process_utils import run_process
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
 
+DOCKERFILE = "Dockerfile"
+DEFAULT_PACKAGES = "required_packages"
+# Local name of the package layer images when no shared cache repository is configured
+LOCAL_CACHE_REPO = "localhost/build-cache/packages"
+
+# Instructions that read the build context; the cached prefix of the Dockerfile stops at the first one
+CONTEXT_INSTRUCTIONS = {"COPY", "ADD"}
+
+# Buildah's step banner, e.g. "STEP 3/7: RUN make", and its cache hit line
+STEP_PATTERN = re.compile(r"^STEP (\d+)(?:/\d+)?: (.*)$")
+CACHE_HIT_PATTERN = re.compile(r"^--> Using cache ")
+
+
+def parse_dockerfile(path):
+    """
+    Returns the Dockerfile as a list of (INSTRUCTION, text) with continuation lines joined
+    and comments dropped.
+    """
+    instructions = []
+    current = ""
+    with open(path, 'r') as file:
+        for line in file:
+            stripped = line.strip()
+            if not current and (not stripped or stripped.startswith("#")):
+                continue
+            if stripped.endswith("\\"):
+                current += stripped[:-1] + " "
+                continue
+            current += stripped
+            instructions.append((current.split(None, 1)[0].upper(), current))
+            current = ""
+    if current:
+        instructions.append((current.split(None, 1)[0].upper(), current))
+    return instructions
+
+
+def split_dockerfile(instructions):
+    """
+    Split a single-stage Dockerfile into its base image, the instructions before the first
+    COPY/ADD (which don't depend on the build context) and the remaining instructions.
+
+    Returns:
+        tuple: (base_image, prefix, rest). base_image is None if the Dockerfile has no FROM.
+
+    Raises:
+        ValueError: If the Dockerfile has several stages or a templated base image, which the
+            layer cache does not handle.
+    """
+    from_instructions = [text for instruction, text in instructions if instruction == "FROM"]
+    if len(from_instructions) > 1:
+        raise ValueError("multi-stage Dockerfile")
+    base_image = from_instructions[0].split()[1] if from_instructions else None
+    if base_image and "$" in base_image:
+        raise ValueError("templated base image")
+
+    body = [(instruction, text) for instruction, text in instructions if instruction != "FROM"]
+    split_at = next((i for i, (instruction, _) in enumerate(body) if instruction in CONTEXT_INSTRUCTIONS), len(body))
+    return base_image, [text for _, text in body[:split_at]], [text for _, text in body[split_at:]]
+
+
+def resolve_base_digest(base_image):
+    """Pulls the base image if a newer one is available and returns its manifest digest."""
+    run_process(["buildah", "pull", "--quiet", "--policy", "newer", base_image])
+    result = run_process(["buildah", "inspect", "--type", "image", "--format", "{{.FromImageDigest}}", base_image],
+                         capture_output=True, log_output=False)
+    return result.stdout.strip()
+
+
+def compute_layer_cache_key(base_digest, packages, prefix):
+    """Hashes the base image digest, the package list and the context-free Dockerfile prefix."""
+    hasher = hashlib.sha256(f"base={base_digest}\0".encode())
+    hasher.update(("packages=" + " ".join(packages) + "\0").encode())
+    for text in prefix:
+        hasher.update(text.encode() + b"\0")
+    return hasher.hexdigest()
 
-def perform_docker_build():
+
+def image_exists(image):
+    return run_process(["buildah", "inspect", "--type", "image", image], check=False, log_output=False).returncode == 0
+
+
+def find_cached_image(cache_image):
+    """Looks for the package layer image locally, then in the shared cache repository."""
+    if image_exists(cache_image):
+        return True
+    if DOCKER_LAYER_CACHE_REPO:
+        return run_process(["buildah", "pull", "--quiet", cache_image], check=False).returncode == 0
+    return False
+
+
+def run_buildah_bud(containerfile, tag, context_dir):
+    """
+    Run `buildah bud --layers`, logging its output, and return the time spent per step.
+
+    Returns:
+        list: (step number, instruction, seconds, cache hit) for every step.
+
+    Raises:
+        subprocess.CalledProcessError: If the build fails or exceeds PROCESS_TIMEOUT.
+    """
+    command = ["buildah", "bud", "--layers", "--format", "docker", "-f", containerfile, "-t", tag, context_dir]
+    steps = []
+    current = None  # [step, instruction, start time, cache hit]
+
+    def finish(now):
+        steps.append((current[0], current[1], now - current[2], current[3]))
+
+    def on_line(stream, line):
+        nonlocal current
+        match = STEP_PATTERN.match(line)
+        if match:
+            now = time.monotonic()
+            if current:
+                finish(now)
+            current = [int(match.group(1)), match.group(2).strip(), now, False]
+        elif current and not current[3] and CACHE_HIT_PATTERN.match(line):
+            current[3] = True
+            trace_args["cached_steps"] += 1
+
+    trace_args = {"tag": tag, "cached_steps": 0}
+    try:
+        run_process(command, on_line=on_line, trace_args=trace_args)
+    finally:
+        if current:
+            finish(time.monotonic())
+        for step, instruction, seconds, cached in steps:
+            logger.info(f"Layer {step}: {instruction[:80]} {seconds:.1f}s{' (cache hit)' if cached else ''}")
+    return steps
+
+
+def _write_containerfile(directory, lines):
+    path = os.path.join(directory, "Containerfile")
+    with open(path, 'w') as file:
+        file.write("\n".join(lines) + "\n")
+    return path
+
+
+def build_package_image(base_image, packages, prefix, cache_image):
+    """Builds the base image plus packages plus the context-free Dockerfile prefix as cache_image."""
+    with tempfile.TemporaryDirectory(prefix="layer-cache-") as context_dir:
+        lines = [f"FROM {base_image}"]
+        if packages:
+            lines.append(f"RUN yum -y install {' '.join(packages)} && yum clean all")
+        run_buildah_bud(_write_containerfile(context_dir, lines + prefix), cache_image, context_dir)
+
+
+def build_plain_image(instructions, split, packages, target_image, build_tag):
+    """
+    Builds the image without the package layer cache.
+
+    The packages are installed into an image of their own and the Dockerfile body is built
+    on top of it, as on the cached path. A Dockerfile that cannot be split (several stages,
+    a templated base image) is built as it is, and the packages are installed on top.
+
+    Args:
+        split (tuple): (base image, instructions after FROM) of a split Dockerfile, or None.
+    """
+    package_image = f"{LOCAL_CACHE_REPO}:uncached-{build_tag}"
+    if not instructions:
+        build_package_image(DOCKER_BASE_IMAGE, packages, [], target_image)
+    elif split is not None:
+        base_image, body = split
+        build_package_image(base_image or DOCKER_BASE_IMAGE, packages, [], package_image)
+        with tempfile.TemporaryDirectory(prefix="layer-cache-") as temp_dir:
+            run_buildah_bud(_write_containerfile(temp_dir, [f"FROM {package_image}"] + body), target_image, ".")
+    else:
+        run_buildah_bud(DOCKERFILE, package_image, ".")
+        build_package_image(package_image, packages, [], target_image)
+
+
+def perform_docker_build(branch_name: str = "", build_tag: str = ""):
     """
     Build a Docker image using Buildah, install RHEL 8 Minimal,
     add the required code and libraries using a Dockerfile,
     and commit the image to the Nexus repository.
+
+    The base image, the packages from DOCKER_PACKAGES and the Dockerfile instructions before
+    the first COPY/ADD are built once into a package layer image, keyed by the base image
+    digest, the package list and those instructions. Later builds start from that image and
+    only run the rest of the Dockerfile, with Buildah's own layer cache on top. When
+    DOCKER_LAYER_CACHE_REPO is set, new package images are pushed there in the background
+    while the application layers build, so other agents can reuse them. The push of the
+    final image overlaps with that push but is awaited: the stage process ends with the
+    builder, and the deploy stages pull the image from the registry.
+
+    Returns an empty artifact list: the image lives in the registry, not in the workspace.
     """
     try:
         logger.info("Building Docker image and committing to Nexus repository")
@@ -21,24 +209,60 @@ def perform_docker_build():
         env_variables = read_properties_file(PROPERTIES_FILE_PATH)
 
         # Determine the Nexus URL based on the branch name and build tag
-        branch_name = env_variables.get("BRANCH_NAME", "")
+        branch_name = branch_name or env_variables.get("BRANCH_NAME", "")
         check_variable(branch_name, "BRANCH_NAME")
-        build_tag = env_variables.get("BUILD_TAG", "")
+        build_tag = build_tag or env_variables.get("BUILD_TAG", "")
         check_variable(build_tag, "BUILD_TAG")
         nexus_url = get_nexus_url(branch_name, build_tag)
+        # Image references carry no URL scheme
+        target_image = f"{nexus_url.split('://', 1)[-1].rstrip('/')}/{build_tag}"
+        packages = sorted(set(env_variables.get("DOCKER_PACKAGES", DEFAULT_PACKAGES).split()))
+
+        instructions = parse_dockerfile(DOCKERFILE) if os.path.isfile(DOCKERFILE) else []
+        use_layer_cache = DOCKER_LAYER_CACHE_ENABLED
+        base_image, prefix, rest = None, [], []
+        split = None
+        try:
+            base_image, prefix, rest = split_dockerfile(instructions)
+            split = (base_image, prefix + rest)
+        except ValueError as e:
+            logger.info(f"Layer cache not used for this Dockerfile ({e})")
+            use_layer_cache = False
+
+        if not use_layer_cache:
+            # Plain build, still with Buildah's per-instruction layer cache. DOCKER_PACKAGES are
+            # installed either way, so the image contents don't depend on the layer cache.
+            build_plain_image(instructions, split, packages, target_image, build_tag)
+            run_process(["buildah", "push", target_image])
+            logger.info("Docker image built and committed to Nexus repository successfully")
+            return []
 
-        # Build Docker image using Buildah
-        subprocess.run(["buildah", "from", "rhel8-minimal"], check=True)
+        base_image = base_image or DOCKER_BASE_IMAGE
+        start = time.monotonic()
+        base_digest = resolve_base_digest(base_image)
+        cache_key = compute_layer_cache_key(base_digest, packages, prefix)
+        cache_image = f"{DOCKER_LAYER_CACHE_REPO or LOCAL_CACHE_REPO}:{cache_key[:32]}"
 
-        # Run commands to set up the Docker image
-        subprocess.run(["buildah", "run", "rhel8-minimal", "yum", "-y", "install", "required_packages"], check=True)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pushes = []
+            if find_cached_image(cache_image):
+                logger.info(f"Layer cache hit: {cache_image} ({time.monotonic() - start:.1f}s)")
+            else:
+                logger.info(f"Layer cache miss, building {cache_image} from {base_image}")
+                build_package_image(base_image, packages, prefix, cache_image)
+                logger.info(f"Package layers built in {time.monotonic() - start:.1f}s")
+                if DOCKER_LAYER_CACHE_REPO:
+                    # Share the new package image while the application layers build
+                    pushes.append(executor.submit(run_process, ["buildah", "push", cache_image]))
 
-        # Copy the required code and libraries using a Dockerfile
-        shutil.copy("Dockerfile", "docker_build")
-        subprocess.run(["buildah", "commit", "--format", "docker", "rhel8-minimal", f"{nexus_url}/{build_tag}"],
-                       check=True)
+            with tempfile.TemporaryDirectory(prefix="layer-cache-") as temp_dir:
+                run_buildah_bud(_write_containerfile(temp_dir, [f"FROM {cache_image}"] + rest), target_image, ".")
+            pushes.append(executor.submit(run_process, ["buildah", "push", target_image]))
+            for push in pushes:
+                push.result()
 
         logger.info("Docker image built and committed to Nexus repository successfully")
+        return []
 
     except subprocess.CalledProcessError as e:
         logger.error(f"Error occurred during Docker image build and commit: {e}")
@@ -1,34 +1,15 @@
-import json
-from typing import Dict, Any
 from modules.env_utils import read_properties_file
 from modules.request_utils import call_api
 from modules.custom_logger import setup_custom_logger
+from modules.template_utils import Template, load_template
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
 
 
-def read_json_with_placeholders(file_path: str) -> Dict[str, Any]:
-    """Reads JSON file with placeholders."""
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    return data
-
-
-def replace_placeholders(data: Dict[str, Any], env_variables: Dict[str, str]) -> Dict[str, Any]:
-    """Replaces placeholders with actual values."""
-    replaced_data = {}
-    for key, value in data.items():
-        if isinstance(value, str):
-            if value in env_variables:
-                replaced_data[key] = env_variables[value]
-            else:
-                replaced_data[key] = value  # Placeholder not found in environment variables, keep it as is
-        elif isinstance(value, dict):
-            replaced_data[key] = replace_placeholders(value, env_variables)
-        else:
-            replaced_data[key] = value
-    return replaced_data
+def read_json_with_placeholders(file_path: str) -> Template:
+    """Reads JSON file with placeholders, compiled once per change of the file."""
+    return load_template(file_path, bare_values=True)
 
 
 def perform_ice_update(json_file_path: str, ice_api_url: str, properties_file_path: str) -> None:
@@ -38,10 +19,13 @@ def perform_ice_update(json_file_path: str, ice_api_url: str, properties_file_pa
         env_variables = read_properties_file(properties_file_path)
 
         # Read JSON file with placeholders
-        json_data = read_json_with_placeholders(json_file_path)
+        template = read_json_with_placeholders(json_file_path)
 
         # Replace placeholders with actual values
-        updated_json_data = replace_placeholders(json_data, env_variables)
+        missing = template.missing(env_variables)
+        if missing:
+            logger.warning(f"No value for {', '.join(sorted(missing))}, leaving the placeholders in place")
+        updated_json_data = template.render(env_variables, strict=False)
 
         # Call ICE API to update build information
         response = call_api(ice_api_url, method='POST', data=updated_json_data)
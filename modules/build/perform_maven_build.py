@@ -1,27 +1,205 @@
 # perform_maven_build.py
 
+import glob
+import hashlib
+import json
 import os
+import re
+import shutil
 import subprocess
+import time
 
+from modules.build_cache import compute_source_hash
 from modules.custom_logger import setup_custom_logger
-from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, get_nexus_url, file_exists, check_variable
+from modules.env_utils import (read_properties_file, PROPERTIES_FILE_PATH, get_nexus_url, file_exists, check_variable,
+                               MAVEN_FAST_MODE, MAVEN_THREADS, MAVEN_REPO_CACHE_DIR, MAVEN_REPO_CACHE_KEEP)
+from modules.process_utils import run_process
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
 
+# Build outputs collected after a successful build
+ARTIFACT_PATTERNS = ["target/*.jar", "target/*.war", "target/*.ear", "target/*.zip", "target/*.tar.gz"]
 
-def set_java_home(java_version: str):
+# Remembers what the last build in this workspace was built from, to decide whether `clean` is needed
+BUILD_STATE_FILE = os.path.join(".build-tools", "maven-state.json")
+
+# Matches Maven's mojo banner, e.g. "[INFO] --- maven-compiler-plugin:3.11.0:compile (default-compile) @ app ---"
+MOJO_PATTERN = re.compile(r"--- ([\w.-]+):[\w.-]+:([\w.-]+) (?:\([^)]*\) )?@ ([\w.-]+) ---")
+
+
+def set_java_home(java_version: str, environment: dict):
     """
-    Set the JAVA_HOME environment variable based on the JAVA_VERSION.
+    Set the JAVA_HOME variable of the Maven process environment based on the JAVA_VERSION.
+
+    The variable is set in the given dict rather than in os.environ, which other pipeline stages
+    running in the same process share.
     """
     # Check if the JDK directory exists
     if file_exists(java_version):
-        os.environ["JAVA_HOME"] = java_version
+        environment["JAVA_HOME"] = java_version
         logger.info(f"Set JAVA_HOME to: {java_version}")
     else:
         raise FileNotFoundError(f"JAVA_HOME directory not found: {java_version}")
 
 
+def compute_pom_hash(workspace_dir: str = ".") -> str:
+    """
+    Hash the committed pom.xml files, which determine the dependencies the build resolves.
+
+    The committed content is used because versions:set rewrites the poms on every build.
+    """
+    try:
+        # ":(glob)" makes ** match any number of directories, including none, whatever git's pathspec defaults
+        return hashlib.sha256(run_process(["git", "ls-files", "-s", "-z", "--", ":(glob)**/pom.xml"],
+                                          cwd=workspace_dir, capture_output=True,
+                                          log_output=False).stdout.encode()).hexdigest()
+    except (OSError, subprocess.CalledProcessError):
+        hasher = hashlib.sha256()
+        for pom_file in sorted(glob.glob(os.path.join(workspace_dir, "**", "pom.xml"), recursive=True)):
+            with open(pom_file, 'rb') as file:
+                hasher.update(file.read())
+        return hasher.hexdigest()
+
+
+def compute_versionless_source_hash(version: str, workspace_dir: str = ".") -> str:
+    """Hash the workspace sources, ignoring the project version that versions:set wrote into the poms."""
+    version_tag = f"<version>{version}</version>".encode()
+
+    def normalise(relative_path, content):
+        if os.path.basename(relative_path) == "pom.xml":
+            return content.replace(version_tag, b"<version></version>")
+        return content
+
+    return compute_source_hash(workspace_dir, normalise)
+
+
+def only_version_changed() -> bool:
+    """Checks whether the previous build in this workspace had the same sources apart from its version."""
+    if not os.path.isdir("target"):
+        return True  # Nothing to clean
+    try:
+        with open(BUILD_STATE_FILE, 'r') as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return False
+    return compute_versionless_source_hash(state["build_tag"]) == state["source_hash"]
+
+
+def save_build_state(build_tag: str) -> None:
+    """Records the sources of a successful build for the next only_version_changed() check."""
+    os.makedirs(os.path.dirname(BUILD_STATE_FILE), exist_ok=True)
+    with open(BUILD_STATE_FILE, 'w') as file:
+        json.dump({"build_tag": build_tag, "source_hash": compute_versionless_source_hash(build_tag)}, file)
+
+
+def remove_stale_artifacts() -> None:
+    """
+    Deletes the artifacts of the previous build from target/.
+
+    Without `clean` they would stay next to the new ones, named after the old version, and be
+    collected as artifacts of this build.
+    """
+    for path in (path for pattern in ARTIFACT_PATTERNS for path in glob.glob(pattern)):
+        logger.info(f"Removing artifact of the previous build: {path}")
+        os.remove(path)
+
+
+def run_maven(maven_command, env=None):
+    """
+    Run Maven, logging its output, and return the time spent per plugin goal.
+
+    Goal boundaries are taken from Maven's "--- plugin:version:goal @ module ---" banners; a
+    goal runs until the next banner for the same module. With -T, modules build in parallel,
+    so the per-goal figures add up to more than the wall-clock time. env holds the variables
+    added to the environment of the Maven process.
+
+    Raises:
+        subprocess.CalledProcessError: If Maven exits with a non-zero status or exceeds PROCESS_TIMEOUT.
+    """
+    timings = {}
+    running = {}  # module -> (goal, start time)
+
+    def finish(module, now):
+        goal, started = running.pop(module)
+        timings[goal] = timings.get(goal, 0.0) + now - started
+
+    def on_line(stream, line):
+        match = MOJO_PATTERN.search(line)
+        if match:
+            plugin, goal, module = match.groups()
+            now = time.monotonic()
+            if module in running:
+                finish(module, now)
+            running[module] = (f"{plugin.replace('maven-', '').replace('-plugin', '')}:{goal}", now)
+
+    try:
+        run_process(maven_command, env=env, on_line=on_line, trace_args={"goal_seconds": timings})
+    finally:
+        now = time.monotonic()
+        for module in list(running):
+            finish(module, now)
+        for goal, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+            logger.info(f"Maven {goal}: {seconds:.1f}s")
+    return timings
+
+
+def evict_local_repositories(current: str, keep: int = MAVEN_REPO_CACHE_KEEP) -> None:
+    """
+    Remove the least recently used local repositories, keeping `current` and the newest others up to `keep`.
+
+    Every change to the committed poms starts a new repository, so without eviction they pile
+    up. A repository's mtime records its last use (see build_fast_mode_options).
+    """
+    repositories = []
+    try:
+        for name in os.listdir(MAVEN_REPO_CACHE_DIR):
+            path = os.path.join(MAVEN_REPO_CACHE_DIR, name)
+            if not name.startswith(".") and path != current and os.path.isdir(path):
+                repositories.append((os.path.getmtime(path), name))
+    except OSError:
+        return
+
+    for _, name in sorted(repositories, reverse=True)[max(keep - 1, 0):]:
+        # Rename first so other agents stop picking the repository before it is deleted
+        trash_dir = os.path.join(MAVEN_REPO_CACHE_DIR, f".trash-{name}-{os.getpid()}")
+        try:
+            os.rename(os.path.join(MAVEN_REPO_CACHE_DIR, name), trash_dir)
+        except OSError:
+            continue
+        shutil.rmtree(trash_dir, ignore_errors=True)
+        logger.info(f"Evicted Maven local repository {name}")
+
+
+def build_fast_mode_options(goals):
+    """
+    Options for the Maven acceleration mode.
+
+    The reactor runs with MAVEN_THREADS threads against a local repository shared by all builds
+    with the same committed poms. When that repository already exists the build tries offline
+    first; builds that deploy cannot run offline and skip snapshot update checks instead. Only
+    the MAVEN_REPO_CACHE_KEEP most recently used repositories are kept.
+
+    Returns:
+        tuple: (options, try_offline_first)
+    """
+    local_repository = os.path.join(MAVEN_REPO_CACHE_DIR, compute_pom_hash())
+    repository_cached = os.path.isdir(local_repository)
+    if repository_cached:
+        try:
+            # Record the use for LRU eviction
+            os.utime(local_repository)
+        except OSError as e:
+            logger.warning(f"Could not record use of {local_repository}: {e}")
+    evict_local_repositories(local_repository)
+    options = ["-T", MAVEN_THREADS, f"-Dmaven.repo.local={local_repository}"]
+    logger.info(f"Maven acceleration mode: {MAVEN_THREADS} thread(s), local repository {local_repository} "
+                f"({'cached' if repository_cached else 'new'})")
+    if repository_cached and "deploy" in goals:
+        options.append("--no-snapshot-updates")
+    return options, repository_cached and "deploy" not in goals
+
+
 def perform_maven_build(branch_name, build_tag):
     """
     Perform Maven build and upload the artifact to Nexus.
@@ -36,7 +214,7 @@ def perform_maven_build(branch_name, build_tag):
     - build_tag (str): The build tag.
 
     Returns:
-    - None
+    - list: Paths of the artifacts produced under target/.
     """
     try:
         logger.info("Performing Maven build and uploading artifact to Nexus")
@@ -49,7 +227,8 @@ def perform_maven_build(branch_name, build_tag):
         check_variable(java_version, "JAVA_VERSION")
 
         # Set JAVA_HOME based on JAVA_VERSION
-        set_java_home(java_version)
+        maven_environment = {}
+        set_java_home(java_version, maven_environment)
 
         # Determine the Nexus URL based on the branch name and build tag
         nexus_url = get_nexus_url(branch_name, build_tag)
@@ -62,19 +241,38 @@ def perform_maven_build(branch_name, build_tag):
             raise FileNotFoundError(f"Maven executable not found at: {maven_executable}")
 
         # Determine the Maven command
-        maven_command = [maven_executable, "versions:set", "-DnewVersion=" + build_tag]
         if os.path.exists("assembly.xml"):
-            maven_command.extend(["clean", "package", "assembly:single"])
+            goals = ["clean", "package", "assembly:single"]
         else:
-            maven_command.extend(["clean", "package", "deploy"])
+            goals = ["clean", "package", "deploy"]
+
+        options, try_offline_first = [], False
+        if MAVEN_FAST_MODE:
+            options, try_offline_first = build_fast_mode_options(goals)
+            if only_version_changed():
+                logger.info("Sources unchanged apart from the version, skipping 'clean'")
+                goals.remove("clean")
+                remove_stale_artifacts()
+        maven_command = [maven_executable, *options, "versions:set", "-DnewVersion=" + build_tag, *goals]
 
         # Set the overridden Nexus URL for the Maven build
-        os.environ["MAVEN_OPTS"] = "-DaltDeploymentRepository=releases::default::" + nexus_url
+        maven_environment["MAVEN_OPTS"] = "-DaltDeploymentRepository=releases::default::" + nexus_url
 
         # Execute Maven build using the configured Maven executable
-        subprocess.run(maven_command, check=True)
+        if try_offline_first:
+            try:
+                run_maven(maven_command[:1] + ["--offline"] + maven_command[1:], maven_environment)
+            except subprocess.CalledProcessError:
+                logger.warning("Offline Maven build failed, retrying online")
+                run_maven(maven_command, maven_environment)
+        else:
+            run_maven(maven_command, maven_environment)
+
+        if MAVEN_FAST_MODE:
+            save_build_state(build_tag)
 
         logger.info("Maven build completed successfully")
+        return sorted(path for pattern in ARTIFACT_PATTERNS for path in glob.glob(pattern))
 
     except subprocess.CalledProcessError as e:
         logger.error(f"Error occurred during Maven build: {e}")
@@ -3,42 +3,58 @@ import os
 import subprocess
 import shutil
 
+from modules.archive_utils import create_archive
 from modules.custom_logger import setup_custom_logger
-from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, check_variable, get_nexus_url, file_exists
+from modules.env_utils import (read_properties_file, PROPERTIES_FILE_PATH, check_variable, get_nexus_url, file_exists,
+                               NPM_CACHE_ENABLED)
+from modules.nexus_utils import deploy_file, get_coordinates
+from modules.npm_cache import install_dependencies
+from modules.process_utils import run_process
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
 
 
-def set_node_environment(node_version: str):
+def set_node_environment(node_version: str, environment: dict):
     """
-    Set the Node.js environment variables based on the NODE_VERSION.
+    Set the Node.js variables of the npm process environment based on the NODE_VERSION.
+
+    The variables are set in the given dict rather than in os.environ, which other pipeline
+    stages running in the same process share.
     """
     # Set NODE_VERSION and NODE_HOME environment variables
-    os.environ["NODE_VERSION"] = node_version
-    os.environ["NODE_HOME"] = f"/opt/node/{node_version}"
+    environment["NODE_VERSION"] = node_version
+    environment["NODE_HOME"] = f"/opt/node/{node_version}"
 
     logger.info(f"Set NODE_VERSION to: {node_version}")
-    logger.info(f"Set NODE_HOME to: {os.environ['NODE_HOME']}")
+    logger.info(f"Set NODE_HOME to: {environment['NODE_HOME']}")
 
 
-def create_tar_archive(repo_name: str, build_tag: str):
+def create_tar_archive(workspace_dir: str, repo_name: str, build_tag: str, compression="gzip"):
     """
     Create a TAR archive with REPO-NAME and BUILD_TAG combination.
     """
-    tar_file = f"{repo_name}-{build_tag}.tar"
-    shutil.make_archive(tar_file, "gztar", ".", build_tag)
+    tar_file, _ = create_archive(os.path.join(workspace_dir, f"{repo_name}-{build_tag}"),
+                                 os.path.join(workspace_dir, build_tag), arcname_prefix=build_tag,
+                                 compression=compression)
     return tar_file
 
 
-def perform_npm_build():
+def perform_npm_build(branch_name: str = "", build_tag: str = ""):
     """
     Perform npm and Node.js build and upload the artifact to Nexus.
 
     This function reads environment variables from the env.properties file,
     sets the Node.js environment variables based on the NODE_VERSION,
     installs npm dependencies, renames the build directory to BUILD_TAG,
-    creates a TAR archive, and uploads it to Nexus using mvn deploy:file command.
+    creates a TAR archive, and uploads it to Nexus with its checksum files.
+
+    Args:
+    - branch_name (str): The name of the branch. Defaults to BRANCH_NAME from env.properties.
+    - build_tag (str): The build tag. Defaults to BUILD_TAG from env.properties.
+
+    Returns:
+    - list: The path of the uploaded TAR archive.
     """
     try:
         logger.info("Performing npm and Node.js build and uploading artifact to Nexus")
@@ -52,31 +68,40 @@ def perform_npm_build():
         node_version = env_variables.get("NODE_VERSION", "")
         check_variable(node_version, "NODE_VERSION")
 
+        # Resolve the workspace once, so the paths below never depend on the process working directory
+        workspace_dir = os.path.abspath(env_variables.get("WORKSPACE_DIR") or ".")
+
         # Set Node.js environment variables
-        set_node_environment(node_version)
+        npm_environment = {}
+        set_node_environment(node_version, npm_environment)
 
-        # Install npm dependencies
-        subprocess.run(["npm", "install"], check=True)
+        # Install npm dependencies, reusing the cached node_modules when package-lock.json is unchanged
+        if NPM_CACHE_ENABLED:
+            install_dependencies(node_version, npm_version, workspace_dir, npm_environment)
+        else:
+            run_process(["npm", "install"], cwd=workspace_dir, env=npm_environment)
 
         # Rename the build directory to BUILD_TAG
-        build_tag = env_variables.get("BUILD_TAG", "")
+        build_tag = build_tag or env_variables.get("BUILD_TAG", "")
         check_variable(build_tag, "BUILD_TAG")
-        shutil.move("build", build_tag)
+        shutil.move(os.path.join(workspace_dir, "build"), os.path.join(workspace_dir, build_tag))
 
         # Create a TAR archive with REPO-NAME and BUILD_TAG combination
         repo_name = env_variables.get("REPO_NAME", "")
         check_variable(repo_name, "REPO_NAME")
-        tar_file = create_tar_archive(repo_name, build_tag)
+        tar_file = create_tar_archive(workspace_dir, repo_name, build_tag,
+                                      env_variables.get("ARCHIVE_COMPRESSION", "gzip"))
 
         # Determine the Nexus URL based on the branch name and build tag
-        branch_name = env_variables.get("BRANCH_NAME", "")
+        branch_name = branch_name or env_variables.get("BRANCH_NAME", "")
         check_variable(branch_name, "BRANCH_NAME")
         nexus_url = get_nexus_url(branch_name, build_tag)
 
-        # Upload the TAR file to Nexus using mvn deploy:file command
-        subprocess.run(["mvn", "deploy:deploy-file", "-Dfile=" + tar_file, "-Durl=" + nexus_url], check=True)
+        # Upload the TAR file and its checksum files to Nexus
+        deploy_file(tar_file, nexus_url, get_coordinates(env_variables, build_tag))
 
         logger.info("npm and Node.js build completed successfully")
+        return [tar_file]
 
     except subprocess.CalledProcessError as e:
         logger.error(f"Error occurred during npm and Node.js build: {e}")
@@ -1,31 +1,44 @@
 # perform_tar_build.py
 import os
 import subprocess
-import shutil
 
+from modules.archive_utils import create_archive, get_archive_excludes
 from modules.custom_logger import setup_custom_logger
-from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, check_variable
+from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, check_variable, get_nexus_url
+from modules.nexus_utils import deploy_file, get_coordinates
+from modules.workspace_index import get_workspace_index
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
 
 
-def create_tar_archive(workspace_dir: str, repo_name: str, build_tag: str):
+def create_tar_archive(workspace_dir: str, repo_name: str, build_tag: str, exclude=None, compression="gzip"):
     """
     Create a TAR archive of all files under WORKSPACE and rename it as REPO-NAME and BUILD_TAG combination.
+
+    Files matching the exclusion globs (by default .git, .build-tools and node_modules) are left out.
+    Members are listed from the workspace index, refreshed first to pick up files the build wrote.
     """
-    tar_file = f"{repo_name}-{build_tag}.tar"
-    shutil.make_archive(tar_file, "gztar", workspace_dir)
+    index = get_workspace_index(workspace_dir, refresh=True)
+    tar_file, _ = create_archive(f"{repo_name}-{build_tag}", workspace_dir, exclude=exclude, compression=compression,
+                                 index=index)
     return tar_file
 
 
-def perform_tar_build():
+def perform_tar_build(branch_name: str = "", build_tag: str = ""):
     """
     Create a TAR archive of all files under WORKSPACE and upload the TAR file to Nexus.
 
     This function reads environment variables from the env.properties file,
     creates a TAR archive with the combination of REPO_NAME and BUILD_TAG,
-    and uploads the TAR file to Nexus using the mvn deploy:file command.
+    and uploads the TAR file to Nexus with its checksum files.
+
+    Args:
+    - branch_name (str): The name of the branch. Defaults to BRANCH_NAME from env.properties.
+    - build_tag (str): The build tag. Defaults to BUILD_TAG from env.properties.
+
+    Returns:
+    - list: The path of the uploaded TAR archive.
     """
     try:
         logger.info("Creating TAR archive of Jenkins Workspace and uploading to Nexus")
@@ -38,16 +51,21 @@ def perform_tar_build():
         check_variable(workspace_dir, "WORKSPACE_DIR")
         repo_name = env_variables.get("REPO_NAME", "")
         check_variable(repo_name, "REPO_NAME")
-        build_tag = env_variables.get("BUILD_TAG", "")
+        build_tag = build_tag or env_variables.get("BUILD_TAG", "")
         check_variable(build_tag, "BUILD_TAG")
+        branch_name = branch_name or env_variables.get("BRANCH_NAME", "")
+        check_variable(branch_name, "BRANCH_NAME")
 
         # Create a TAR archive of all files under WORKSPACE
-        tar_file = create_tar_archive(workspace_dir, repo_name, build_tag)
+        exclude = get_archive_excludes(env_variables)
+        compression = env_variables.get("ARCHIVE_COMPRESSION", "gzip")
+        tar_file = create_tar_archive(workspace_dir, repo_name, build_tag, exclude, compression)
 
-        # Upload the TAR file to Nexus using mvn deploy:file command
-        subprocess.run(["mvn", "deploy:deploy-file", "-Dfile=" + tar_file, "-Durl=nexus_url"], check=True)
+        # Upload the TAR file and its checksum files to Nexus
+        deploy_file(tar_file, get_nexus_url(branch_name, build_tag), get_coordinates(env_variables, build_tag))
 
         logger.info("TAR archive creation and upload completed successfully")
+        return [tar_file]
 
     except subprocess.CalledProcessError as e:
         logger.error(f"Error occurred during TAR archive creation and upload: {e}")
@@ -0,0 +1,258 @@
+# build_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import subprocess
+import tempfile
+import time
+
+from modules.archive_utils import archive_extension, get_archive_excludes, iter_archive_members
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import BUILD_CACHE_DIR, PROPERTIES_FILE_NAME, get_nexus_url
+from modules.nexus_utils import get_coordinates, upload_files
+from modules.process_utils import run_process
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; the statistics are then updated without a lock
+    fcntl = None
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+# Tool versions that change the build output for the same sources
+TOOL_VERSION_VARIABLES = ["JAVA_VERSION", "NODE_VERSION", "NPM_VERSION"]
+# Builders whose artifact is an archive of the workspace itself, keyed on the archived files
+ARCHIVE_BUILDERS = {"perform_tar_build"}
+# Settings that change what an archive build produces for the same files
+ARCHIVE_VARIABLES = ["REPO_NAME", "ARCHIVE_COMPRESSION"]
+
+# Builders whose artifact is a plain archive that can be re-published under a new build tag.
+# Maven and Docker bake the version into the artifact itself, and the npm archive stores its
+# members under a directory named after the build tag, so for those only an identical tag is a hit.
+RETAGGABLE_BUILDERS = {"perform_tar_build"}
+
+# Directories skipped when hashing a workspace that is not a git checkout
+IGNORED_DIRECTORIES = {".git", ".build-tools", "node_modules", "target", "build", "__pycache__"}
+# Workspace files rewritten by every pipeline run, which are never part of the sources
+IGNORED_FILES = {PROPERTIES_FILE_NAME}
+
+MANIFEST_FILE_NAME = "manifest.json"
+STATS_FILE_NAME = "stats.json"
+
+
+def _hash_file(hasher, file_path, relative_path=None, normalise=None):
+    if normalise is not None:
+        with open(file_path, 'rb') as file:
+            hasher.update(normalise(relative_path, file.read()))
+        return
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            hasher.update(chunk)
+
+
+def compute_source_hash(workspace_dir: str, normalise=None) -> str:
+    """
+    Hash the tracked sources of a workspace.
+
+    In a git checkout the blob ids from `git ls-files -s` identify committed content without
+    reading any file; tracked files with uncommitted changes are hashed from disk on top.
+    Outside git, every file not under IGNORED_DIRECTORIES is hashed. IGNORED_FILES at the
+    workspace root are left out either way.
+
+    Args:
+        workspace_dir (str): The workspace to hash.
+        normalise (callable): Optional `normalise(relative_path, content) -> bytes` applied to
+            files read from disk, e.g. to ignore a version string rewritten by the build.
+    """
+    hasher = hashlib.sha256()
+    try:
+        tracked = run_process(["git", "ls-files", "-s", "-z"], cwd=workspace_dir, capture_output=True,
+                              log_output=False).stdout
+        modified = run_process(["git", "diff", "--name-only", "-z", "HEAD"], cwd=workspace_dir,
+                               capture_output=True, log_output=False).stdout
+    except (OSError, subprocess.CalledProcessError):
+        for root, dirs, files in os.walk(workspace_dir):
+            dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRECTORIES)
+            for file_name in sorted(files):
+                file_path = os.path.join(root, file_name)
+                relative_path = os.path.relpath(file_path, workspace_dir)
+                if relative_path in IGNORED_FILES:
+                    continue
+                hasher.update(relative_path.encode() + b"\0")
+                _hash_file(hasher, file_path, relative_path, normalise)
+        return hasher.hexdigest()
+
+    hasher.update(tracked.encode())
+    for relative_path in sorted(filter(None, modified.split("\0"))):
+        if relative_path in IGNORED_FILES:
+            continue
+        file_path = os.path.join(workspace_dir, relative_path)
+        hasher.update(relative_path.encode() + b"\0")
+        if os.path.isfile(file_path):
+            _hash_file(hasher, file_path, relative_path, normalise)
+    return hasher.hexdigest()
+
+
+def compute_archive_hash(source_dir: str, exclude) -> str:
+    """
+    Hash exactly the members that archive_utils.create_archive() would store for source_dir.
+
+    Untracked and generated files count as much as committed ones, since they end up in the
+    archive. Each member contributes its path, type, permission bits and content (or link target).
+    """
+    hasher = hashlib.sha256()
+    for path, relative_path in iter_archive_members(source_dir, exclude):
+        mode = os.lstat(path).st_mode
+        hasher.update(f"{relative_path.replace(os.sep, '/')}\0{stat.S_IFMT(mode)}\0{stat.S_IMODE(mode)}\0".encode())
+        if stat.S_ISLNK(mode):
+            hasher.update(os.readlink(path).encode())
+        elif stat.S_ISREG(mode):
+            _hash_file(hasher, path)
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def compute_cache_key(workspace_dir: str, builder_name: str, env_variables: dict) -> str:
+    """
+    Builds the cache key from the source hash, the builder and the relevant tool versions.
+
+    Archive builds are keyed on the files they archive rather than on the tracked sources.
+    """
+    hasher = hashlib.sha256()
+    if builder_name in ARCHIVE_BUILDERS:
+        source_dir = env_variables.get("WORKSPACE_DIR") or workspace_dir
+        hasher.update(compute_archive_hash(source_dir, get_archive_excludes(env_variables)).encode())
+        for name in ARCHIVE_VARIABLES:
+            hasher.update(f"\0{name}={env_variables.get(name, '')}".encode())
+    else:
+        hasher.update(compute_source_hash(workspace_dir).encode())
+    hasher.update(builder_name.encode())
+    for name in TOOL_VERSION_VARIABLES:
+        version = env_variables.get(name) or os.environ.get(name, "")
+        hasher.update(f"\0{name}={version}".encode())
+    return hasher.hexdigest()
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    """Hardlinks a file when source and destination share a filesystem, otherwise copies it."""
+    os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+    if os.path.exists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def lookup(cache_key: str):
+    """Returns the manifest of a cached build, or None on a miss."""
+    manifest_path = os.path.join(BUILD_CACHE_DIR, cache_key, MANIFEST_FILE_NAME)
+    try:
+        with open(manifest_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def store(cache_key: str, builder_name: str, build_tag: str, artifacts) -> None:
+    """
+    Store the artifacts of a successful build under its cache key.
+
+    The entry is assembled in a temporary directory and renamed into place, so concurrent
+    builds sharing the cache never see a partial entry.
+    """
+    entry_dir = os.path.join(BUILD_CACHE_DIR, cache_key)
+    if os.path.isdir(entry_dir):
+        return
+    os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=BUILD_CACHE_DIR, prefix=".tmp-")
+    try:
+        stored = []
+        for index, artifact in enumerate(artifacts or []):
+            stored_name = f"{index}-{os.path.basename(artifact)}"
+            _link_or_copy(artifact, os.path.join(temp_dir, stored_name))
+            stored.append({"path": artifact, "stored_name": stored_name})
+        manifest = {"key": cache_key, "builder": builder_name, "build_tag": build_tag,
+                    "artifacts": stored, "created": time.time()}
+        with open(os.path.join(temp_dir, MANIFEST_FILE_NAME), 'w') as file:
+            json.dump(manifest, file, indent=2)
+        os.rename(temp_dir, entry_dir)
+        logger.info(f"Stored build {build_tag} in build cache ({len(stored)} artifact(s))")
+    except OSError as e:
+        # Another agent may have stored the same key first; the cache is best-effort either way
+        logger.warning(f"Could not store build in build cache: {e}")
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def restore(manifest: dict, branch_name: str, build_tag: str, env_variables: dict) -> bool:
+    """
+    Restore a cached build instead of running the builder.
+
+    For the same build tag the artifacts are put back into the workspace; they are already
+    published. For a new tag, archive builds are copied under the name that the builder would
+    give them ("<REPO_NAME>-<build_tag>" plus the archive extension) and re-published.
+
+    Returns:
+        bool: True if the cached build satisfied this build, False if it has to be rebuilt.
+    """
+    cached_tag = manifest["build_tag"]
+    if cached_tag != build_tag and manifest["builder"] not in RETAGGABLE_BUILDERS:
+        logger.info(f"Build cache entry for {cached_tag} cannot be re-tagged as {build_tag} "
+                    f"for {manifest['builder']}")
+        return False
+
+    entry_dir = os.path.join(BUILD_CACHE_DIR, manifest["key"])
+    restored = []
+    for artifact in manifest["artifacts"]:
+        destination = artifact["path"]
+        if cached_tag != build_tag:
+            file_name = f"{env_variables['REPO_NAME']}-{build_tag}{archive_extension(destination)}"
+            destination = os.path.join(os.path.dirname(destination), file_name)
+        _link_or_copy(os.path.join(entry_dir, artifact["stored_name"]), destination)
+        restored.append(destination)
+        logger.info(f"Restored {destination} from build cache")
+    if cached_tag != build_tag and restored:
+        upload_files(restored, get_nexus_url(branch_name, build_tag), get_coordinates(env_variables, build_tag))
+    return True
+
+
+def _update_stats(stats_path: str, hit: bool) -> dict:
+    try:
+        with open(stats_path, 'r') as file:
+            stats = json.load(file)
+    except (OSError, ValueError):
+        stats = {"hits": 0, "misses": 0}
+    stats["hits" if hit else "misses"] += 1
+
+    fd, temp_path = tempfile.mkstemp(dir=BUILD_CACHE_DIR, prefix=".stats-")
+    with os.fdopen(fd, 'w') as file:
+        json.dump(stats, file)
+    os.replace(temp_path, stats_path)
+    return stats
+
+
+def record_result(hit: bool) -> dict:
+    """
+    Updates and logs the persistent hit/miss counters of the build cache.
+
+    Agents sharing the cache serialise the read-modify-write on a lock file next to the counters.
+    """
+    stats_path = os.path.join(BUILD_CACHE_DIR, STATS_FILE_NAME)
+    try:
+        os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+        with open(stats_path + ".lock", 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            stats = _update_stats(stats_path, hit)
+    except OSError as e:
+        logger.warning(f"Could not update build cache statistics: {e}")
+        stats = {"hits": int(hit), "misses": int(not hit)}
+
+    total = stats["hits"] + stats["misses"]
+    logger.info(f"Build cache {'hit' if hit else 'miss'} "
+                f"(hits: {stats['hits']}, misses: {stats['misses']}, hit rate: {stats['hits'] / total:.0%})")
+    return stats
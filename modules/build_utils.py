@@ -1,34 +1,59 @@
 # build_utils.py
 
-import os
+import importlib
 from modules.custom_logger import setup_custom_logger
-
-from modules.build.perform_maven_build import perform_maven_build
-from modules.build.perform_npm_build import perform_npm_build
-from modules.build.perform_docker_build import perform_docker_build
-from modules.build.perform_tar_build import perform_tar_build
+from modules.workspace_index import get_workspace_index
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
 
-# Map file patterns to build functions
+# Build type name -> (module, function). Builders are imported on first use, so stages that only
+# need to know the build type don't pay for importing every builder and its dependencies.
+BUILDERS = {
+    "maven": ("modules.build.perform_maven_build", "perform_maven_build"),
+    "npm": ("modules.build.perform_npm_build", "perform_npm_build"),
+    "docker": ("modules.build.perform_docker_build", "perform_docker_build"),
+    "tar": ("modules.build.perform_tar_build", "perform_tar_build"),
+}
+
+DEFAULT_BUILD_TYPE = "tar"
+
+# Map file patterns to build types
 build_mapping = {
-    ("pom.xml", "Dockerfile"): perform_maven_build,
-    ("package.json", "Dockerfile"): perform_npm_build,
-    ("pom.xml",): perform_maven_build,
-    ("package.json",): perform_npm_build,
-    ("Dockerfile",): perform_docker_build,
-    (): perform_tar_build,
+    ("pom.xml", "Dockerfile"): "maven",
+    ("package.json", "Dockerfile"): "npm",
+    ("pom.xml",): "maven",
+    ("package.json",): "npm",
+    ("Dockerfile",): "docker",
+    (): "tar",
 }
 
 
-def check_build_type(workspace_dir: str):
-    """Checks the build type based on files in the Jenkins Workspace."""
-    present_files = set(os.listdir(workspace_dir))
+def get_builder(build_type: str):
+    """
+    Returns the build function for a build type, importing its module on first use.
+
+    Raises:
+        ValueError: If the build type is unknown.
+    """
+    if build_type not in BUILDERS:
+        raise ValueError(f"Unknown build type: {build_type}")
+    module_name, function_name = BUILDERS[build_type]
+    return getattr(importlib.import_module(module_name), function_name)
 
-    for fileset, build_function in build_mapping.items():
+
+def detect_build_type(workspace_dir: str) -> str:
+    """Returns the build type name matching the files in the Jenkins Workspace."""
+    present_files = get_workspace_index(workspace_dir).top_level_names()
+
+    for fileset, build_type in build_mapping.items():
         if all(file in present_files for file in fileset):
-            return build_function  # Return the function object directly
+            return build_type
 
     logger.info("No matching build type detected in the workspace directory. Defaulting to 'tar' build.")
-    return perform_tar_build  # Return the default build function
+    return DEFAULT_BUILD_TYPE
+
+
+def check_build_type(workspace_dir: str):
+    """Checks the build type based on files in the Jenkins Workspace."""
+    return get_builder(detect_build_type(workspace_dir))  # Return the function object directly
@@ -0,0 +1,237 @@
+# deploy_fanout.py
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from modules.custom_logger import setup_custom_logger
+from modules.request_utils import trigger_rundeck_job, watch_rundeck_execution
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+# Fan-out defaults, overridable via env.properties (rate limits also per environment, e.g. DEPLOY_RATE_LIMIT_UAT)
+DEFAULT_MAX_CONCURRENCY = 50  # node jobs in flight across all environments
+DEFAULT_RATE_LIMIT = 5.0  # job dispatches per second, per environment
+DEFAULT_CANARY_COUNT = 1
+DEFAULT_WAVE_SIZE = "25%"  # nodes per wave after the canary, as a count or a percentage
+DEFAULT_MAX_FAILURES = 0  # failed nodes tolerated per wave before the rollout halts
+DEFAULT_WAVE_INTERVAL = 10  # minutes between scheduled waves
+
+SUCCEEDED = "succeeded"
+SKIPPED = "skipped"
+
+
+class RateLimiter:
+    """Spaces out calls so that at most `rate` happen per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            delay = self.next_slot - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_slot = max(self.next_slot, loop.time()) + self.interval
+
+
+def get_fanout_settings(env_variables, env_name=""):
+    """
+    Read the fan-out settings for an environment.
+
+    Returns:
+        dict: max_concurrency, rate_limit, canary_count, wave_size, max_failures and wave_interval.
+    """
+    return {
+        "max_concurrency": int(env_variables.get("DEPLOY_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+        "rate_limit": float(env_variables.get(f"DEPLOY_RATE_LIMIT_{env_name}",
+                                              env_variables.get("DEPLOY_RATE_LIMIT", DEFAULT_RATE_LIMIT))),
+        "canary_count": int(env_variables.get("DEPLOY_CANARY_COUNT", DEFAULT_CANARY_COUNT)),
+        "wave_size": env_variables.get("DEPLOY_WAVE_SIZE", DEFAULT_WAVE_SIZE),
+        "max_failures": int(env_variables.get("DEPLOY_MAX_FAILURES", DEFAULT_MAX_FAILURES)),
+        "wave_interval": float(env_variables.get("DEPLOY_WAVE_INTERVAL", DEFAULT_WAVE_INTERVAL)),
+    }
+
+
+def node_name(node):
+    """Nodes come either as plain names or as {"url": ..., "token": ...} entries."""
+    return node["url"] if isinstance(node, dict) else node
+
+
+def plan_waves(nodes, canary_count=DEFAULT_CANARY_COUNT, wave_size=DEFAULT_WAVE_SIZE):
+    """
+    Split nodes into a canary wave followed by waves of `wave_size` nodes.
+
+    Args:
+        nodes (list): The nodes of one environment.
+        canary_count (int): Nodes in the first wave. 0 disables the canary.
+        wave_size (str|int): Nodes per later wave, or a percentage of all nodes such as "25%".
+
+    Returns:
+        list: Lists of nodes, in rollout order.
+    """
+    nodes = list(nodes)
+    waves = [nodes[:canary_count]] if canary_count > 0 and nodes else []
+    remaining = nodes[len(waves[0]) if waves else 0:]
+    wave_size = str(wave_size).strip()
+    if wave_size.endswith("%"):
+        size = max(1, round(len(nodes) * float(wave_size[:-1]) / 100))
+    else:
+        size = int(wave_size) if int(wave_size) > 0 else len(remaining)
+    waves += [remaining[i:i + size] for i in range(0, len(remaining), max(size, 1))]
+    return waves
+
+
+def environment_jobs(env_config):
+    """Returns the job ids of a deploy plan entry, which has either "jobs" or a single "job_name"."""
+    return env_config.get("jobs") or [env_config.get("job_name")]
+
+
+async def _deploy_node(session, env_name, jobs, node, semaphore, rate_limiter, run_at=None):
+    """
+    Dispatch the jobs for one node in order and, unless they are scheduled, watch each to
+    completion, stopping at the first one that does not succeed.
+
+    Scheduled jobs all get the same run time, so Rundeck does not order them.
+    """
+    name = node_name(node)
+    execution_ids = []
+    state = SUCCEEDED
+    async with semaphore:
+        start = time.monotonic()
+        for job_id in jobs:
+            await rate_limiter.acquire()
+            execution_id = await asyncio.to_thread(trigger_rundeck_job, session, job_id, name, run_at)
+            if execution_id is None:
+                state = "not_triggered"
+                break
+            execution_ids.append(execution_id)
+            if run_at:
+                state = "scheduled"
+                continue
+            state = await watch_rundeck_execution(session, execution_id, f"{env_name}/{name}")
+            if state != SUCCEEDED:
+                break
+    return {"env": env_name, "node": name, "execution_ids": execution_ids, "state": state,
+            "duration": round(time.monotonic() - start, 3)}
+
+
+async def _roll_out_environment(session, env_name, env_config, settings, semaphore, on_result):
+    jobs = environment_jobs(env_config)
+    nodes = env_config.get("nodes", [])
+    waves = plan_waves(nodes, settings["canary_count"], settings["wave_size"])
+    rate_limiter = RateLimiter(settings["rate_limit"])
+    summary = {"succeeded": 0, "failed": 0, "skipped": 0, "halted": False, "nodes": {}}
+
+    for wave_number, wave in enumerate(waves):
+        if summary["halted"]:
+            for node in wave:
+                summary["nodes"][node_name(node)] = SKIPPED
+                summary["skipped"] += 1
+            continue
+
+        label = "canary" if wave_number == 0 and settings["canary_count"] > 0 else f"wave {wave_number}"
+        logger.info(f"[{env_name}] Deploying {label}: {len(wave)} node(s)")
+        wave_failures = 0
+        tasks = [asyncio.create_task(_deploy_node(session, env_name, jobs, node, semaphore, rate_limiter))
+                 for node in wave]
+        # Results are aggregated as each node finishes, not when the whole wave does
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            succeeded = result["state"] == SUCCEEDED
+            summary["nodes"][result["node"]] = result["state"]
+            summary["succeeded" if succeeded else "failed"] += 1
+            wave_failures += not succeeded
+            done = summary["succeeded"] + summary["failed"]
+            log = logger.info if succeeded else logger.error
+            log(f"[{env_name}] {result['node']}: {result['state']} in {result['duration']:.1f}s "
+                f"({done}/{len(nodes)} done, {summary['failed']} failed)")
+            if on_result:
+                on_result(result)
+
+        allowed_failures = 0 if label == "canary" else settings["max_failures"]
+        if wave_failures > allowed_failures:
+            logger.error(f"[{env_name}] {label} had {wave_failures} failure(s), halting the rollout")
+            summary["halted"] = True
+    return summary
+
+
+async def fan_out(session, deploy_plan, env_variables, on_result=None):
+    """
+    Deploy every environment's nodes as individual Rundeck executions.
+
+    Environments roll out concurrently. Within an environment, the canary wave must succeed
+    before the next wave starts, and a wave with more than DEPLOY_MAX_FAILURES failed nodes
+    halts the remaining waves. All nodes of a wave run at once, bounded by the global
+    DEPLOY_MAX_CONCURRENCY and the environment's dispatch rate limit, so the deploy time
+    grows with the number of waves rather than the number of nodes.
+
+    Args:
+        session: The authenticated Rundeck session.
+        deploy_plan (dict): {env_name: {"jobs": [...], "nodes": [...]}}. Each node runs the jobs in order.
+        env_variables (dict): The environment variables read from env.properties.
+        on_result (callable): Optional callback receiving each node's result as it finishes.
+
+    Returns:
+        dict: {env_name: {"succeeded", "failed", "skipped", "halted", "nodes": {node: state}}}.
+    """
+    semaphore = asyncio.Semaphore(get_fanout_settings(env_variables)["max_concurrency"])
+    rollouts = {env_name: _roll_out_environment(session, env_name, env_config,
+                                                get_fanout_settings(env_variables, env_name), semaphore, on_result)
+                for env_name, env_config in deploy_plan.items()}
+    summaries = await asyncio.gather(*rollouts.values())
+    return dict(zip(rollouts, summaries))
+
+
+async def schedule_fan_out(session, deploy_plan, env_variables, start_time):
+    """
+    Schedule per-node executions, staggering waves by DEPLOY_WAVE_INTERVAL minutes.
+
+    The canary runs at start_time and each later wave one interval after the previous one.
+    Scheduled waves cannot be gated on earlier results; the interval is the window in which
+    a failed canary can be noticed and the remaining executions cancelled.
+
+    Returns:
+        dict: {env_name: {node: [execution ids] or None if scheduling failed}}.
+    """
+    semaphore = asyncio.Semaphore(get_fanout_settings(env_variables)["max_concurrency"])
+
+    async def schedule_environment(env_name, env_config):
+        settings = get_fanout_settings(env_variables, env_name)
+        rate_limiter = RateLimiter(settings["rate_limit"])
+        tasks = []
+        waves = plan_waves(env_config.get("nodes", []), settings["canary_count"], settings["wave_size"])
+        for wave_number, wave in enumerate(waves):
+            run_at = (start_time + timedelta(minutes=settings["wave_interval"] * wave_number)).isoformat()
+            tasks += [_deploy_node(session, env_name, environment_jobs(env_config), node, semaphore, rate_limiter,
+                                   run_at) for node in wave]
+        results = await asyncio.gather(*tasks)
+        return {result["node"]: result["execution_ids"] if result["state"] == "scheduled" else None
+                for result in results}
+
+    scheduled = {env_name: schedule_environment(env_name, env_config)
+                 for env_name, env_config in deploy_plan.items()}
+    results = await asyncio.gather(*scheduled.values())
+    return dict(zip(scheduled, results))
+
+
+def deployment_start_time(deploy_delay):
+    """Returns the time-zone aware start of a deployment `deploy_delay` hours from now."""
+    return datetime.now().astimezone() + timedelta(hours=int(deploy_delay))
+
+
+def summary_to_properties(summaries):
+    """Flattens fan-out summaries into DEPLOY_<ENV>_* variables for env.properties."""
+    variables = {}
+    for env_name, summary in summaries.items():
+        prefix = f"DEPLOY_{env_name or 'DEFAULT'}"
+        status = "halted" if summary["halted"] else "failed" if summary["failed"] else SUCCEEDED
+        variables[f"{prefix}_STATUS"] = status
+        for count in ("succeeded", "failed", "skipped"):
+            variables[f"{prefix}_{count.upper()}"] = summary[count]
+    return variables
+
@@ -1,7 +1,9 @@
 # env_utils.py
 
 import os
-import subprocess
+import stat
+import tempfile
+import threading
 from modules.custom_logger import setup_custom_logger
 
 # Setup custom logger
@@ -17,15 +19,89 @@ FILES_TO_CONVERT = [
     os.path.join(WORKSPACE_DIR, "build-tools", "tools", "sonar", "bin", "sonar-scanner")
 ]
 
-MINION_TOKEN_URL = 'https://example.com/getAuthToken'
-GIT_BASE_URL = 'https://api.github.com/repos/your_org/your_repo'
+MINION_TOKEN_URL = os.getenv("MINION_TOKEN_URL", 'https://example.com/getAuthToken')
+GIT_BASE_URL = os.getenv("GIT_BASE_URL", 'https://api.github.com/repos/your_org/your_repo')
 JIRA_KEY_PATTERN = r'[A-Z]+-\d+'
 NEXUS_URL = os.getenv("NEXUS_URL", "http://example.com/repository/")
+NEXUS_USERNAME = os.getenv("NEXUS_USERNAME")
+NEXUS_PASSWORD = os.getenv("NEXUS_PASSWORD")
+NEXUS_UPLOAD_WORKERS = int(os.getenv("NEXUS_UPLOAD_WORKERS", "4"))
+# Nexus server root for the REST API, e.g. http://example.com for http://example.com/repository/
+NEXUS_API_URL = os.getenv("NEXUS_API_URL", NEXUS_URL.split("/repository")[0])
+
+# JIRA settings
+JIRA_URL = os.getenv("JIRA_URL", "https://your-jira-instance.atlassian.net")
+JIRA_BULK_SIZE = int(os.getenv("JIRA_BULK_SIZE", "50"))  # issues per bulk create call; JIRA's own limit is 50
+JIRA_WORKERS = int(os.getenv("JIRA_WORKERS", "8"))  # concurrent transition calls
+
+# ServiceNow settings
+SERVICENOW_URL = os.getenv("SERVICENOW_URL", "https://your-servicenow-instance.service-now.com")
+SERVICENOW_APPROVAL_TIMEOUT = int(os.getenv("SERVICENOW_APPROVAL_TIMEOUT", "3600"))  # seconds
 
 # Rundeck Variables
 RUNDECK_CONFIG = os.path.join(WORKSPACE_DIR, "config", "rundeck_config.json")
 RUNDECK_DEPLOY_URL = 'https://rundeck.example.com/api/37/execution'
 RUNDECK_SCHEDULE_URL = 'https://rundeck.example.com/api/37/execution'
+RUNDECK_CONFIG_DIR = os.getenv("RUNDECK_CONFIG_DIR", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "rundeck"))
+
+# Build tracing: a Chrome trace (chrome://tracing, Perfetto) written next to env.properties
+TRACE_ENABLED = os.getenv("BUILD_TRACE", "false").lower() == "true"
+TRACE_FILE_PATH = os.getenv("BUILD_TRACE_FILE", os.path.join(WORKSPACE_DIR, "build-trace.json"))
+
+# Build cache settings
+BUILD_CACHE_ENABLED = os.getenv("BUILD_CACHE_ENABLED", "true").lower() == "true"
+BUILD_CACHE_DIR = os.getenv("BUILD_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".build-tools", "build-cache"))
+
+# npm dependency cache settings
+NPM_CACHE_ENABLED = os.getenv("NPM_CACHE_ENABLED", "true").lower() == "true"
+NPM_CACHE_DIR = os.getenv("NPM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".build-tools", "npm-cache"))
+NPM_CACHE_MAX_BYTES = int(os.getenv("NPM_CACHE_MAX_BYTES", str(20 * 1024 ** 3)))
+
+# Maven acceleration mode settings
+MAVEN_FAST_MODE = os.getenv("MAVEN_FAST_MODE", "false").lower() == "true"
+MAVEN_THREADS = os.getenv("MAVEN_THREADS", str(os.cpu_count() or 1))
+MAVEN_REPO_CACHE_DIR = os.getenv("MAVEN_REPO_CACHE_DIR",
+                                 os.path.join(os.path.expanduser("~"), ".build-tools", "maven-repositories"))
+# Number of local repositories (one per set of committed poms) kept, least recently used evicted first
+MAVEN_REPO_CACHE_KEEP = int(os.getenv("MAVEN_REPO_CACHE_KEEP", "5"))
+
+# HTTP client settings
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# Pylint result cache settings
+PYLINT_INCREMENTAL = os.getenv("PYLINT_INCREMENTAL", "true").lower() == "true"
+PYLINT_CACHE_DIR = os.getenv("PYLINT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".build-tools", "pylint-cache"))
+PYLINT_JOBS = int(os.getenv("PYLINT_JOBS", str(os.cpu_count() or 1)))
+
+# Scan result cache settings, overridable per build via SCAN_CACHE_TTL and FORCE_RESCAN in env.properties
+SCAN_CACHE_ENABLED = os.getenv("SCAN_CACHE_ENABLED", "true").lower() == "true"
+SCAN_CACHE_DIR = os.getenv("SCAN_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".build-tools", "scan-cache"))
+SCAN_CACHE_TTL = int(os.getenv("SCAN_CACHE_TTL", str(7 * 24 * 3600)))  # seconds a stored verdict stays valid
+
+# External process settings: wall-clock timeout, grace period between SIGTERM and SIGKILL, and
+# optional per-process CPU time (seconds) and address space (bytes) limits; 0 means no limit
+PROCESS_TIMEOUT = int(os.getenv("PROCESS_TIMEOUT", str(2 * 3600)))
+PROCESS_KILL_GRACE = int(os.getenv("PROCESS_KILL_GRACE", "10"))
+PROCESS_CPU_LIMIT = int(os.getenv("PROCESS_CPU_LIMIT", "0"))
+PROCESS_MEMORY_LIMIT = int(os.getenv("PROCESS_MEMORY_LIMIT", "0"))
+
+# Workspace index settings
+WORKSPACE_INDEX_IGNORES = os.getenv("WORKSPACE_INDEX_IGNORES", ".git,.build-tools,node_modules").split(",")
+WORKSPACE_INDEX_HASH = os.getenv("WORKSPACE_INDEX_HASH", "false").lower() == "true"
+
+# Nexus version index settings
+NEXUS_INDEX_DIR = os.getenv("NEXUS_INDEX_DIR", os.path.join(os.path.expanduser("~"), ".build-tools", "nexus-index"))
+NEXUS_INDEX_TTL = int(os.getenv("NEXUS_INDEX_TTL", "300"))  # seconds before the index is refreshed
+
+# Docker (Buildah) layer cache settings
+DOCKER_BASE_IMAGE = os.getenv("DOCKER_BASE_IMAGE", "rhel8-minimal")
+DOCKER_LAYER_CACHE_ENABLED = os.getenv("DOCKER_LAYER_CACHE_ENABLED", "true").lower() == "true"
+# Optional registry repository the package layer images are shared through, e.g. nexus.example.com/build-cache
+DOCKER_LAYER_CACHE_REPO = os.getenv("DOCKER_LAYER_CACHE_REPO", "")
 
 
 def get_nexus_url(branch_name: str, build_tag: str) -> str:
@@ -39,9 +115,8 @@ def get_nexus_url(branch_name: str, build_tag: str) -> str:
 def write_properties_file(env_variables: dict, file_path: str) -> None:
     """Writes environment variables to a properties file."""
     try:
-        with open(file_path, 'w') as file:
-            for key, value in env_variables.items():
-                file.write(f"{key}={value}\n")
+        with _properties_lock:
+            _write_properties_atomically(_normalise_properties(env_variables), file_path)
         logger.info("Environment variables written to file successfully")
     except Exception as e:
         logger.error(f"Error writing environment variables to file: {e}")
@@ -50,8 +125,11 @@ def write_properties_file(env_variables: dict, file_path: str) -> None:
 
 def run_dos2unix(file_path: str) -> None:
     """Runs the dos2unix command on the specified file."""
+    # Imported here because process_utils reads its limits from this module
+    from modules.process_utils import run_process
+
     try:
-        subprocess.run(["dos2unix", file_path])
+        run_process(["dos2unix", file_path])
         logger.info(f"Converted file '{file_path}' to Unix format")
     except Exception as e:
         logger.error(f"Error converting file '{file_path}' to Unix format: {e}")
@@ -82,27 +160,78 @@ def check_variable(variable, name):
             raise ValueError(f"{name} does not contain valid values")
 
 
-# env_utils.py
+# In-process cache of parsed properties files: {absolute path: (file signature, variables)}
+_properties_cache = {}
+_properties_lock = threading.RLock()
+
+
+def _file_signature(file_path):
+    """Returns the (mtime, inode, size) triple used to detect changes to a cached file."""
+    file_stat = os.stat(file_path)
+    return file_stat.st_mtime_ns, file_stat.st_ino, file_stat.st_size
+
+
+def _normalise_properties(variables):
+    """Converts keys and values to the stripped strings that reading the file back would produce."""
+    return {str(key).strip(): str(value).strip() for key, value in variables.items()}
+
+
+def _write_properties_atomically(env_variables, file_path):
+    """
+    Write a properties file through a temporary file and rename, so readers never see a torn file.
+
+    The cache entry for the file is refreshed from the written values, so the next read
+    does not need to parse the file again.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".env.properties.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as file:
+            file.write("".join(f"{key}={value}\n" for key, value in env_variables.items()))
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    _properties_cache[os.path.abspath(file_path)] = (_file_signature(file_path), dict(env_variables))
+
 
 def add_variables_to_properties_file(variables, file_path):
     """
     Add or update variables in the environment properties file.
 
+    The file is only rewritten (atomically) when at least one value actually changes.
+
     Args:
         variables (dict): A dictionary containing the variables to be added or updated.
         file_path (str): The path to the properties file.
     """
     try:
-        # Read existing variables from the properties file
-        existing_variables = read_properties_file(file_path)
+        with _properties_lock:
+            # Read existing variables from the properties file
+            existing_variables = read_properties_file(file_path)
+
+            # Update existing variables with new values
+            updated_variables = dict(existing_variables)
+            updated_variables.update(_normalise_properties(variables))
 
-        # Update existing variables with new values
-        existing_variables.update(variables)
+            if updated_variables == existing_variables:
+                logger.info("Environment properties file already up to date, skipping write")
+                return
 
-        # Write updated variables to the properties file
-        with open(file_path, 'w') as file:
-            for key, value in existing_variables.items():
-                file.write(f"{key}={value}\n")
+            # Write updated variables to the properties file
+            _write_properties_atomically(updated_variables, file_path)
 
         logger.info("Variables added or updated in environment properties file successfully")
     except Exception as e:
@@ -113,25 +242,35 @@ def read_properties_file(file_path):
     """
     Read environment variables from a properties file.
 
+    Parsed files are cached in-process and only re-read when their mtime, inode or size changes.
+
     Args:
         file_path (str): The path to the properties file.
 
     Returns:
         dict: A dictionary containing the environment variables read from the file.
     """
-    env_variables = {}
+    cache_key = os.path.abspath(file_path)
     try:
-        with open(file_path, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    key, value = line.split("=", 1)
-                    env_variables[key.strip()] = value.strip()
+        with _properties_lock:
+            signature = _file_signature(file_path)
+            cached = _properties_cache.get(cache_key)
+            if cached and cached[0] == signature:
+                return dict(cached[1])
+
+            env_variables = {}
+            with open(file_path, 'r') as file:
+                for line in file:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        key, value = line.split("=", 1)
+                        env_variables[key.strip()] = value.strip()
+            _properties_cache[cache_key] = (signature, env_variables)
         logger.info("Environment variables read from file successfully")
     except Exception as e:
         logger.error(f"Error reading environment variables from file: {e}")
         raise  # Raise exception to indicate failure
-    return env_variables
+    return dict(env_variables)
 
 
 def file_exists(file_path: str) -> bool:
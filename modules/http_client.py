@@ -0,0 +1,195 @@
+# http_client.py
+
+import atexit
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES, HTTP_POOL_SIZE
+from modules.trace_utils import span
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+# Retry policy
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_MAX = 30  # seconds
+RETRY_AFTER_MAX = 120  # seconds
+
+# requests is imported on first use, keeping it out of stage start-up for stages that make no HTTP calls
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_host_stats = {}
+
+
+def get_session():
+    """Returns the process-wide Session, creating it with keep-alive connection pools on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                # urllib3 keeps one pool per host; pool_maxsize bounds the idle connections kept per host
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+                atexit.register(log_http_stats)
+    return _session
+
+
+def _record(host, latency, retried=False, failed=False):
+    with _stats_lock:
+        stats = _host_stats.setdefault(host, {"requests": 0, "retries": 0, "errors": 0,
+                                              "total_latency": 0.0, "max_latency": 0.0})
+        stats["requests"] += 1
+        stats["retries"] += int(retried)
+        stats["errors"] += int(failed)
+        stats["total_latency"] += latency
+        stats["max_latency"] = max(stats["max_latency"], latency)
+
+
+def _retry_after_seconds(response):
+    """Parses a Retry-After header given either as seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), RETRY_AFTER_MAX)
+
+
+def _backoff_seconds(attempt):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def send_request(method, url, timeout=None, retries=None, session=None, **kwargs):
+    """
+    Send an HTTP request through the shared, pooled Session with timeouts and retries.
+
+    Connection errors and 429/502/503/504 responses are retried with jittered exponential
+    backoff, honouring Retry-After when the server sends it. Non-idempotent methods (POST,
+    PATCH) are only retried when the request provably did not reach the server: a connect
+    timeout, or a 429/503 response carrying Retry-After. File-like request bodies are
+    rewound before each retry.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The request URL.
+        timeout (tuple): Optional (connect, read) timeout in seconds.
+        retries (int): Optional number of retries; defaults to HTTP_MAX_RETRIES.
+        session (requests.Session): Optional session to use instead of the shared one.
+        **kwargs: Passed through to requests.Session.request.
+
+    Returns:
+        requests.Response: The final response. Status codes are not checked.
+
+    Raises:
+        requests.exceptions.RequestException: If the request still fails after all retries.
+    """
+    session = session or get_session()
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    retries = HTTP_MAX_RETRIES if retries is None else retries
+    method = method.upper()
+    parsed_url = urlsplit(url)
+
+    # Only host and path go into the trace; query strings may carry credentials
+    with span(f"{method} {parsed_url.netloc}", "http", path=parsed_url.path) as span_args:
+        response = _send_with_retries(session, method, url, timeout, retries, parsed_url.netloc, kwargs)
+        span_args["status"] = response.status_code
+        return response
+
+
+def _send_with_retries(session, method, url, timeout, retries, host, kwargs):
+    import requests
+
+    idempotent = method in IDEMPOTENT_METHODS
+    body = kwargs.get("data")
+    attempt = 0
+    while True:
+        # A file-like body was consumed by the failed attempt; send it again from the start
+        if attempt and hasattr(body, "seek"):
+            body.seek(0)
+        start = time.monotonic()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            retryable = isinstance(e, requests.exceptions.ConnectTimeout) or (
+                idempotent and isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)))
+            _record(host, time.monotonic() - start, retried=attempt > 0, failed=True)
+            if not retryable or attempt >= retries:
+                raise
+            delay = _backoff_seconds(attempt)
+            logger.warning(f"{method} {url} failed ({e}), retrying in {delay:.1f}s")
+        else:
+            _record(host, time.monotonic() - start, retried=attempt > 0)
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                return response
+            retry_after = _retry_after_seconds(response)
+            if not idempotent and not (retry_after is not None and response.status_code in (429, 503)):
+                return response
+            delay = retry_after if retry_after is not None else _backoff_seconds(attempt)
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+            response.close()
+
+        attempt += 1
+        time.sleep(delay)
+
+
+def get_http_stats():
+    """
+    Returns connection-reuse and latency counters for the shared Session.
+
+    Returns:
+        dict: Totals for connections opened and reused, plus per-host request, retry,
+        error and latency figures.
+    """
+    with _stats_lock:
+        hosts = {host: dict(stats) for host, stats in _host_stats.items()}
+    for stats in hosts.values():
+        stats["avg_latency"] = stats["total_latency"] / stats["requests"] if stats["requests"] else 0.0
+
+    connections_opened = requests_sent = 0
+    if _session is not None:
+        for adapter in {id(a): a for a in _session.adapters.values()}.values():
+            for manager in [adapter.poolmanager, *adapter.proxy_manager.values()]:
+                for key in manager.pools.keys():
+                    pool = manager.pools.get(key)
+                    if pool is not None:
+                        connections_opened += pool.num_connections
+                        requests_sent += pool.num_requests
+
+    return {
+        "connections_opened": connections_opened,
+        "requests_sent": requests_sent,
+        "connections_reused": max(requests_sent - connections_opened, 0),
+        "hosts": hosts,
+    }
+
+
+def log_http_stats():
+    """Logs a one-line summary of connection reuse and a latency line per host."""
+    stats = get_http_stats()
+    if not stats["hosts"]:
+        return
+    logger.info(f"HTTP: {stats['requests_sent']} request(s) over {stats['connections_opened']} connection(s), "
+                f"{stats['connections_reused']} reused")
+    for host, host_stats in stats["hosts"].items():
+        logger.info(f"HTTP {host}: {host_stats['requests']} request(s), {host_stats['retries']} retried, "
+                    f"{host_stats['errors']} error(s), avg {host_stats['avg_latency'] * 1000:.0f}ms, "
+                    f"max {host_stats['max_latency'] * 1000:.0f}ms")
@@ -0,0 +1,219 @@
+# iqs_report.py
+
+import json
+import re
+
+from modules.custom_logger import setup_custom_logger
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+# Keys holding lists of findings, and the key older reports use for a plain vulnerability count
+FINDING_KEYS = {"issues", "findings", "vulnerabilities"}
+COUNT_KEY = "vulnerabilities"
+MAX_NESTING = 3  # object levels searched for finding lists
+MAX_TRACKED = 10000  # distinct rules or components counted individually; the rest go under OTHER
+OTHER = "(other)"
+TOTAL = "total"
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+
+class _StreamReader:
+    """Reads JSON from a file in chunks, keeping only the unread part of the current chunk."""
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self):
+        """Skips whitespace and returns the next character, or "" at the end of the file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Malformed report: expected '{char}' near offset {self.pos}")
+        self.pos += 1
+
+    def decode(self):
+        """Decodes the next complete value, reading further chunks until it is whole."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A number ending exactly at the buffer end may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Malformed report: {e}") from None
+            self.fill()
+
+    def skip(self):
+        """Skips the next value without decoding it, so large unrelated sections cost no memory."""
+        if self.peek() not in ("{", "["):
+            self.decode()
+            return
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buffer, self.pos)
+            if match and match.group() == '"':
+                # Strings are skipped whole, so brackets inside them are never counted
+                string = _STRING.match(self.buffer, match.start())
+                if string:
+                    self.pos = string.end()
+                    continue
+                self.pos = match.start()
+            elif match:
+                self.pos = match.end()
+                depth += 1 if match.group() in "{[" else -1
+                if depth == 0:
+                    return
+                continue
+            else:
+                self.pos = len(self.buffer)
+            # The value, or a string in it, continues in the next chunk
+            if not self.fill():
+                raise ValueError("Malformed report: unexpected end of file")
+
+
+def _walk_object(reader, depth):
+    reader.expect("{")
+    while reader.peek() != "}":
+        key = reader.decode()
+        reader.expect(":")
+        kind = reader.peek()
+        if kind == "[" and key in FINDING_KEYS:
+            reader.expect("[")
+            while reader.peek() != "]":
+                yield "finding", reader.decode()
+                if reader.peek() == ",":
+                    reader.pos += 1
+            reader.expect("]")
+        elif kind == "{" and depth < MAX_NESTING:
+            yield from _walk_object(reader, depth + 1)
+        elif key == COUNT_KEY and kind not in ("{", "["):
+            yield "count", reader.decode()
+        else:
+            reader.skip()
+        if reader.peek() == ",":
+            reader.pos += 1
+    reader.expect("}")
+
+
+def iter_report(file_path, chunk_size=CHUNK_SIZE):
+    """
+    Stream the findings of a Sonar IQS JSON report.
+
+    Only one chunk of the file and one finding are held in memory at a time. Findings are
+    read from "issues", "findings" or "vulnerabilities" lists, at the top level or in
+    nested objects; other sections are skipped without being decoded.
+
+    Yields:
+        tuple: ("finding", dict) for each finding, or ("count", int) for the plain
+        "vulnerabilities" count of older reports.
+
+    Raises:
+        ValueError: If the report is not a well-formed JSON object.
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        yield from _walk_object(_StreamReader(file, chunk_size), 0)
+
+
+def parse_thresholds(spec):
+    """
+    Parse a threshold policy such as "critical=0,high=5,total=50".
+
+    Each entry is the highest count allowed for a severity, or for all findings with "total".
+
+    Returns:
+        dict: {severity or "total": limit}.
+    """
+    thresholds = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, separator, limit = entry.partition("=")
+        if not separator or not limit.strip().isdigit():
+            raise ValueError(f"Invalid threshold '{entry}', expected <severity>=<count>")
+        thresholds[name.strip().lower()] = int(limit)
+    return thresholds
+
+
+def _count(counter, key):
+    if key in counter or len(counter) < MAX_TRACKED:
+        counter[key] = counter.get(key, 0) + 1
+    else:
+        counter[OTHER] = counter.get(OTHER, 0) + 1
+
+
+def _breaches(summary, thresholds):
+    counts = {TOTAL: summary[TOTAL], **summary["by_severity"]}
+    return [f"{counts.get(name, 0)} {name} finding(s), limit {limit}"
+            for name, limit in thresholds.items() if counts.get(name, 0) > limit]
+
+
+def evaluate_report(file_path, thresholds, stop_on_breach=True):
+    """
+    Aggregate a report's findings by severity, rule and component and check them against a policy.
+
+    Counts only grow while parsing, so once a limit is exceeded the verdict cannot change:
+    with stop_on_breach the rest of the report is not read.
+
+    Args:
+        file_path (str): The report.
+        thresholds (dict): Limits as returned by parse_thresholds.
+        stop_on_breach (bool): Stop at the first exceeded limit.
+
+    Returns:
+        dict: {"total", "by_severity", "by_rule", "by_component", "breaches", "complete"};
+        when stopped early, complete is False and the counts are lower bounds.
+    """
+    summary = {TOTAL: 0, "by_severity": {}, "by_rule": {}, "by_component": {}, "breaches": [], "complete": True}
+    by_severity = summary["by_severity"]
+    total_limit = thresholds.get(TOTAL)
+    counted = reported_count = 0
+    report = iter_report(file_path)
+    for kind, value in report:
+        if kind == "count":
+            reported_count = int(value or 0)
+            breached = total_limit is not None and reported_count > total_limit
+        elif isinstance(value, dict):
+            severity = str(value.get("severity") or value.get("level") or "unknown").lower()
+            by_severity[severity] = by_severity.get(severity, 0) + 1
+            counted += 1
+            _count(summary["by_rule"], str(value.get("rule") or value.get("ruleId") or "unknown"))
+            _count(summary["by_component"], str(value.get("component") or value.get("file") or "unknown"))
+            limit = thresholds.get(severity)
+            breached = (limit is not None and by_severity[severity] > limit) or \
+                (total_limit is not None and counted > total_limit)
+        else:
+            continue
+
+        if breached and stop_on_breach:
+            summary["complete"] = False
+            report.close()
+            break
+
+    summary[TOTAL] = max(counted, reported_count)
+    summary["breaches"] = _breaches(summary, thresholds)
+    return summary
@@ -0,0 +1,173 @@
+# nexus_index.py
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import NEXUS_API_URL, NEXUS_USERNAME, NEXUS_PASSWORD, NEXUS_INDEX_DIR, NEXUS_INDEX_TTL
+from modules.http_client import send_request
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+SEARCH_PATH = "/service/rest/v1/search"
+INDEX_VERSION = 1
+
+# Qualifier ranks, lowest first; a plain release sorts after all of these
+QUALIFIER_RANKS = {"alpha": 0, "a": 0, "beta": 1, "b": 1, "milestone": 2, "m": 2, "rc": 3, "cr": 3, "snapshot": 4}
+_TOKEN_PATTERN = re.compile(r"\d+|[a-zA-Z]+")
+# Token kinds, in sort order: qualifier < release < other text < number
+_QUALIFIER, _RELEASE, _TEXT, _NUMBER = range(4)
+
+
+def version_key(version):
+    """
+    Sort key ordering versions the way Maven does, closely enough for picking the latest.
+
+    Numbers compare numerically (1.10 > 1.9), trailing zeros are ignored (1.0 == 1), and
+    pre-release qualifiers sort before the release (1.0-rc1 < 1.0-SNAPSHOT < 1.0 < 1.0.1).
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(version):
+        if token.isdigit():
+            tokens.append((_NUMBER, int(token), ""))
+        elif token.lower() in QUALIFIER_RANKS:
+            tokens.append((_QUALIFIER, QUALIFIER_RANKS[token.lower()], ""))
+        else:
+            tokens.append((_TEXT, 0, token.lower()))
+    # Trailing zeros of the leading numeric part don't count: 1.0 == 1 and 1.0-rc1 < 1
+    numeric_length = next((i for i, token in enumerate(tokens) if token[0] != _NUMBER), len(tokens))
+    while numeric_length > 1 and tokens[numeric_length - 1] == (_NUMBER, 0, ""):
+        del tokens[numeric_length - 1]
+        numeric_length -= 1
+    # Missing tokens count as a release marker, so 1.0 sorts after 1.0-SNAPSHOT but before 1.0.1
+    return tuple(tokens) + ((_RELEASE, 0, ""),)
+
+
+def is_snapshot(version):
+    return version.upper().endswith("SNAPSHOT")
+
+
+def iter_versions(repository, group, name):
+    """
+    Walk the Nexus search API page by page, following continuationToken.
+
+    Only one page is held in memory at a time.
+
+    Yields:
+        str: The version of each matching component, in the order Nexus returns them.
+    """
+    params = {"repository": repository, "group": group, "name": name, "sort": "version", "direction": "desc"}
+    auth = (NEXUS_USERNAME, NEXUS_PASSWORD) if NEXUS_USERNAME else None
+    while True:
+        response = send_request("GET", f"{NEXUS_API_URL.rstrip('/')}{SEARCH_PATH}", params=params, auth=auth)
+        if response.status_code != 200:
+            raise ValueError(f"Nexus search failed with HTTP {response.status_code}: {response.text[:200]}")
+        page = response.json()
+        versions = [item["version"] for item in page.get("items", []) if item.get("version")]
+        yield from versions
+        token = page.get("continuationToken")
+        if not token:
+            return
+        params["continuationToken"] = token
+
+
+def _index_path(repository, group, name):
+    digest = hashlib.sha256(f"{NEXUS_API_URL}\0{repository}\0{group}\0{name}".encode()).hexdigest()[:32]
+    return os.path.join(NEXUS_INDEX_DIR, f"{repository}-{name}-{digest}.json")
+
+
+def load_index(repository, group, name):
+    """Returns the persisted index for an artifact, or None if there is none yet."""
+    try:
+        with open(_index_path(repository, group, name), 'r') as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def _save_index(repository, group, name, index):
+    index_path = _index_path(repository, group, name)
+    os.makedirs(NEXUS_INDEX_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=NEXUS_INDEX_DIR, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(index, file)
+        os.replace(temp_path, index_path)
+    except OSError as e:
+        logger.warning(f"Could not save Nexus version index: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def refresh_index(repository, group, name):
+    """
+    Bring the local version index of an artifact up to date.
+
+    Every page is walked: Nexus can only sort search results by version, not by upload
+    time, so a new version lower than the newest one (a hotfix) may land on any page, and
+    stopping at the first page of known versions would miss it. Versions deleted from
+    Nexus drop out of the index on the same walk. Only one page is held in memory at a
+    time; get_versions() answers from the index without walking while it is fresh.
+
+    Returns:
+        dict: The index: {"versions": [oldest ... newest], "refreshed_at"}.
+    """
+    previous = load_index(repository, group, name)
+    known = set(previous["versions"]) if previous else set()
+    now = time.time()
+
+    start = time.monotonic()
+    versions = set(iter_versions(repository, group, name))
+    index = {
+        "version": INDEX_VERSION,
+        "versions": sorted(versions, key=version_key),
+        "refreshed_at": now,
+    }
+    _save_index(repository, group, name, index)
+    logger.info(f"Refreshed Nexus version index for {group}:{name} in {repository}: "
+                f"{len(index['versions'])} version(s), {len(versions - known)} new, "
+                f"{len(known - versions)} removed, in {time.monotonic() - start:.1f}s")
+    return index
+
+
+def get_versions(repository, group, name, max_age=NEXUS_INDEX_TTL, refresh=False):
+    """
+    Returns the known versions of an artifact, newest first.
+
+    The local index is answered from directly while younger than max_age seconds;
+    otherwise it is refreshed first.
+    """
+    index = load_index(repository, group, name)
+    if refresh or index is None or time.time() - index["refreshed_at"] > max_age:
+        index = refresh_index(repository, group, name)
+    return list(reversed(index["versions"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the versions of an artifact in Nexus, newest first.")
+    parser.add_argument("--repository", required=True, help="Repository name, e.g. maven-release")
+    parser.add_argument("--group", required=True, help="Group id")
+    parser.add_argument("--name", required=True, help="Artifact id")
+    parser.add_argument("--latest", action="store_true", help="Only print the newest version")
+    parser.add_argument("--releases-only", action="store_true", help="Leave out SNAPSHOT versions")
+    parser.add_argument("--refresh", action="store_true", help="Refresh the local index first")
+    parser.add_argument("--max-age", type=int, default=NEXUS_INDEX_TTL,
+                        help="Seconds the local index is used without refreshing it")
+    args = parser.parse_args()
+
+    versions = get_versions(args.repository, args.group, args.name, args.max_age, args.refresh)
+    if args.releases_only:
+        versions = [version for version in versions if not is_snapshot(version)]
+    for version in versions[:1] if args.latest else versions:
+        print(version)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# nexus_utils.py
+
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import NEXUS_USERNAME, NEXUS_PASSWORD, NEXUS_UPLOAD_WORKERS, check_variable
+from modules.http_client import send_request
+from modules.trace_utils import span
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+CHECKSUM_ALGORITHMS = ["sha1", "md5"]
+CHUNK_SIZE = 1024 * 1024
+UPLOADED_STATUS_CODES = {200, 201, 204}
+# Extensions made of several parts, which os.path.splitext would cut short
+COMPOUND_EXTENSIONS = (".tar.gz", ".tar.zst")
+
+
+class _HashingReader:
+    """
+    Read-only file wrapper that hashes the bytes as requests streams them to the server.
+
+    len() gives requests the Content-Length, so the body is sent as-is rather than chunked.
+    Rewinding restarts the hashes along with the stream, so a retried upload hashes once.
+    """
+
+    def __init__(self, file_path, algorithms=CHECKSUM_ALGORITHMS):
+        self.file = open(file_path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.algorithms = algorithms
+        self.hashes = {}
+        self.seek(0)
+
+    def __len__(self):
+        return self.size
+
+    def read(self, size=CHUNK_SIZE):
+        data = self.file.read(CHUNK_SIZE if size is None or size < 0 else size)
+        for hasher in self.hashes.values():
+            hasher.update(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if (offset, whence) != (0, os.SEEK_SET):
+            raise ValueError("Upload streams can only be rewound to the start")
+        self.hashes = {name: hashlib.new(name) for name in self.algorithms}
+        return self.file.seek(0)
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+    def hexdigests(self):
+        return {name: hasher.hexdigest() for name, hasher in self.hashes.items()}
+
+
+def _put(url, data):
+    auth = (NEXUS_USERNAME, NEXUS_PASSWORD) if NEXUS_USERNAME else None
+    response = send_request("PUT", url, data=data, auth=auth)
+    if response.status_code not in UPLOADED_STATUS_CODES:
+        raise ValueError(f"Upload to {url} failed with HTTP {response.status_code}: {response.text[:200]}")
+
+
+def get_coordinates(env_variables: dict, version: str) -> tuple:
+    """
+    Returns the Maven coordinates artifacts of this build are published under.
+
+    GROUP_ID is required; ARTIFACT_ID defaults to REPO_NAME, which the archives are named after.
+
+    Returns:
+        tuple: (group id, artifact id, version)
+    """
+    group_id = env_variables.get("GROUP_ID", "")
+    check_variable(group_id, "GROUP_ID")
+    artifact_id = env_variables.get("ARTIFACT_ID") or env_variables.get("REPO_NAME", "")
+    check_variable(artifact_id, "ARTIFACT_ID")
+    return group_id, artifact_id, version
+
+
+def maven_repository_path(file_path: str, coordinates: tuple) -> str:
+    """
+    Returns the Maven layout path of an artifact, e.g. com/example/app/1.0/app-1.0.tar.gz.
+
+    Hosted Maven repositories with a strict layout policy reject anything else, and the
+    search API only finds components by group and name when they are laid out this way.
+    """
+    group_id, artifact_id, version = coordinates
+    file_name = os.path.basename(file_path)
+    extension = next((extension for extension in COMPOUND_EXTENSIONS if file_name.endswith(extension)),
+                     os.path.splitext(file_name)[1])
+    return f"{group_id.replace('.', '/')}/{artifact_id}/{version}/{artifact_id}-{version}{extension}"
+
+
+def upload_file(file_path: str, nexus_url: str, repository_path: str = None) -> dict:
+    """
+    Stream one artifact to Nexus with an HTTP PUT and upload its .sha1 and .md5 sidecars.
+
+    The file is read in fixed-size chunks and hashed as it is sent, so memory use does not
+    grow with the artifact. Connection failures are retried through the shared HTTP client,
+    restarting the stream: Nexus repositories have no ranged upload to resume from.
+
+    Args:
+        file_path (str): The artifact to upload.
+        nexus_url (str): The repository URL.
+        repository_path (str): Path of the artifact in the repository. Defaults to the file name.
+
+    Returns:
+        dict: The checksums of the uploaded file, by algorithm.
+
+    Raises:
+        ValueError: If Nexus does not accept the upload.
+    """
+    url = f"{nexus_url.rstrip('/')}/{(repository_path or os.path.basename(file_path)).lstrip('/')}"
+    start = time.monotonic()
+    with span("nexus upload", "http", file=os.path.basename(file_path)):
+        reader = _HashingReader(file_path)
+        try:
+            _put(url, reader)
+        finally:
+            reader.close()
+        checksums = reader.hexdigests()
+        for name, digest in checksums.items():
+            _put(f"{url}.{name}", digest.encode())
+
+    elapsed = time.monotonic() - start
+    logger.info(f"Uploaded {file_path} to {url} ({reader.size} bytes in {elapsed:.1f}s, "
+                f"{reader.size / max(elapsed, 1e-6) / 1024 ** 2:.1f} MiB/s)")
+    return checksums
+
+
+def upload_files(file_paths: list, nexus_url: str, coordinates: tuple, max_workers: int = NEXUS_UPLOAD_WORKERS) -> dict:
+    """
+    Upload several artifacts of one build, each with its checksum sidecars, in parallel.
+
+    Each artifact goes to its Maven layout path for `coordinates`, so they must differ in extension.
+
+    Returns:
+        dict: {file path: checksums}.
+
+    Raises:
+        ValueError: If any upload fails, after all the others have finished.
+    """
+    repository_paths = {file_path: maven_repository_path(file_path, coordinates) for file_path in file_paths}
+    if len(set(repository_paths.values())) < len(repository_paths):
+        raise ValueError(f"Artifacts would overwrite each other in Nexus: {', '.join(file_paths)}")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(file_paths)))) as executor:
+        futures = {file_path: executor.submit(upload_file, file_path, nexus_url, repository_path)
+                   for file_path, repository_path in repository_paths.items()}
+    results, errors = {}, []
+    for file_path, future in futures.items():
+        try:
+            results[file_path] = future.result()
+        except Exception as e:
+            logger.error(f"Uploading {file_path} failed: {e}")
+            errors.append(file_path)
+    if errors:
+        raise ValueError(f"Upload to Nexus failed for: {', '.join(errors)}")
+    return results
+
+
+def deploy_file(file_path: str, nexus_url: str, coordinates: tuple) -> None:
+    """Uploads a single artifact file, with its checksum files, to its Maven layout path in Nexus."""
+    logger.info(f"Uploading {file_path} to {nexus_url}")
+    upload_file(file_path, nexus_url, maven_repository_path(file_path, coordinates))
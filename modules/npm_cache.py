@@ -0,0 +1,170 @@
+# npm_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import NPM_CACHE_DIR, NPM_CACHE_MAX_BYTES
+from modules.process_utils import run_process
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+LOCK_FILE_NAME = "package-lock.json"
+MODULES_DIR_NAME = "node_modules"
+META_FILE_NAME = "meta.json"
+ENTRIES_DIR = os.path.join(NPM_CACHE_DIR, "entries")
+# npm's own tarball cache, shared by all entries and used for offline installs
+NPM_TARBALL_CACHE = os.path.join(NPM_CACHE_DIR, "_cacache")
+
+
+def compute_cache_key(lock_file: str, node_version: str, npm_version: str) -> str:
+    """Hashes package-lock.json together with the Node.js and npm versions."""
+    hasher = hashlib.sha256()
+    with open(lock_file, 'rb') as file:
+        hasher.update(file.read())
+    hasher.update(f"\0node={node_version}\0npm={npm_version}".encode())
+    return hasher.hexdigest()
+
+
+def _clone_tree(source: str, destination: str) -> None:
+    """
+    Copy a directory tree as reflinks (copy-on-write clones) where the filesystem supports them.
+
+    Clones cost no data copy, yet writes in the workspace (postinstall scripts, npm rebuild,
+    patch-package) never reach the cache entry, as they would through hardlinks. `cp` copies
+    the data itself on filesystems without reflinks; without a usable `cp`, shutil copies it.
+    """
+    try:
+        result = run_process(["cp", "-a", "--reflink=auto", source, destination], check=False,
+                             capture_output=True, log_output=False)
+        if result.returncode == 0:
+            return
+        logger.warning(f"Reflink copy failed, copying node_modules instead: {result.stderr.strip()}")
+    except OSError as e:
+        logger.warning(f"Reflink copy not available, copying node_modules instead: {e}")
+    shutil.rmtree(destination, ignore_errors=True)
+    shutil.copytree(source, destination, symlinks=True)
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                total += os.path.getsize(file_path)
+    return total
+
+
+def restore(cache_key: str, workspace_dir: str = ".") -> bool:
+    """
+    Restore node_modules from the cache.
+
+    Returns:
+        bool: True on a hit, False if the entry is missing or could not be restored.
+    """
+    entry_dir = os.path.join(ENTRIES_DIR, cache_key)
+    cached_modules = os.path.join(entry_dir, MODULES_DIR_NAME)
+    if not os.path.isdir(cached_modules):
+        return False
+
+    target = os.path.join(workspace_dir, MODULES_DIR_NAME)
+    start = time.monotonic()
+    try:
+        shutil.rmtree(target, ignore_errors=True)
+        _clone_tree(cached_modules, target)
+        # Record the use for LRU eviction
+        os.utime(os.path.join(entry_dir, META_FILE_NAME))
+    except OSError as e:
+        # The entry may have been evicted by another agent while we were copying it
+        logger.warning(f"Could not restore node_modules from cache: {e}")
+        shutil.rmtree(target, ignore_errors=True)
+        return False
+
+    logger.info(f"Restored node_modules from npm cache in {time.monotonic() - start:.1f}s")
+    return True
+
+
+def store(cache_key: str, workspace_dir: str = ".") -> None:
+    """Copy a freshly installed node_modules into the cache, then evict entries over budget."""
+    entry_dir = os.path.join(ENTRIES_DIR, cache_key)
+    if os.path.isdir(entry_dir):
+        return
+    os.makedirs(ENTRIES_DIR, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=ENTRIES_DIR, prefix=".tmp-")
+    try:
+        # Copy rather than link, so later changes in the workspace cannot alter the cache entry
+        shutil.copytree(os.path.join(workspace_dir, MODULES_DIR_NAME), os.path.join(temp_dir, MODULES_DIR_NAME),
+                        symlinks=True)
+        size = _tree_size(temp_dir)
+        with open(os.path.join(temp_dir, META_FILE_NAME), 'w') as file:
+            json.dump({"key": cache_key, "size": size, "created": time.time()}, file)
+        os.rename(temp_dir, entry_dir)
+        logger.info(f"Stored node_modules in npm cache ({size} bytes)")
+    except OSError as e:
+        logger.warning(f"Could not store node_modules in npm cache: {e}")
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        return
+    evict()
+
+
+def evict(max_bytes: int = NPM_CACHE_MAX_BYTES) -> None:
+    """Remove least recently used entries until the cache fits in the disk budget."""
+    entries = []
+    for name in os.listdir(ENTRIES_DIR):
+        meta_path = os.path.join(ENTRIES_DIR, name, META_FILE_NAME)
+        try:
+            with open(meta_path, 'r') as file:
+                size = json.load(file)["size"]
+            entries.append((os.path.getmtime(meta_path), size, name))
+        except (OSError, ValueError, KeyError):
+            continue
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        # Rename first so other agents stop seeing the entry before it is deleted
+        trash_dir = os.path.join(ENTRIES_DIR, f".trash-{name}-{os.getpid()}")
+        try:
+            os.rename(os.path.join(ENTRIES_DIR, name), trash_dir)
+        except OSError:
+            continue
+        shutil.rmtree(trash_dir, ignore_errors=True)
+        total -= size
+        logger.info(f"Evicted npm cache entry {name} ({size} bytes)")
+
+
+def install_dependencies(node_version: str, npm_version: str, workspace_dir: str = ".", env=None) -> None:
+    """
+    Install npm dependencies, reusing a cached node_modules when package-lock.json is unchanged.
+
+    On a miss, `npm ci --offline` is tried against the shared tarball cache first, with a
+    normal `npm ci` as fallback, and the result is stored for the next build. Without a
+    lock file there is nothing to key on, so a plain `npm install` is run. env holds the
+    variables added to the environment of the npm processes.
+    """
+    lock_file = os.path.join(workspace_dir, LOCK_FILE_NAME)
+    if not os.path.isfile(lock_file):
+        logger.info("No package-lock.json found, running npm install without the dependency cache")
+        run_process(["npm", "install"], cwd=workspace_dir, env=env)
+        return
+
+    cache_key = compute_cache_key(lock_file, node_version, npm_version)
+    if restore(cache_key, workspace_dir):
+        logger.info("npm cache hit")
+        return
+
+    logger.info("npm cache miss, installing dependencies")
+    try:
+        run_process(["npm", "ci", "--offline", "--cache", NPM_TARBALL_CACHE], cwd=workspace_dir, env=env)
+    except subprocess.CalledProcessError:
+        logger.info("Offline install failed, installing from the registry")
+        run_process(["npm", "ci", "--prefer-offline", "--cache", NPM_TARBALL_CACHE], cwd=workspace_dir, env=env)
+    store(cache_key, workspace_dir)
@@ -0,0 +1,120 @@
+# parallel_utils.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from modules.custom_logger import setup_custom_logger
+from modules.process_utils import cancellation_scope
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+# How often (in seconds) the scheduler wakes up to check task deadlines
+POLL_INTERVAL = 1.0
+
+
+class TaskTimeoutError(TimeoutError):
+    """Raised (and recorded) when a task exceeds its timeout."""
+
+
+def run_tasks_concurrently(tasks, max_workers=None, timeouts=None, default_timeout=None, gating=()):
+    """
+    Run independent tasks in a thread pool and collect their results.
+
+    A task's timeout is measured from the moment it starts running, not from submission,
+    so tasks queued behind the concurrency cap are not penalised. A task that times out is
+    recorded as failed and cancelled: every run_process() call it makes, now or later, is
+    stopped, so its tools do not keep holding the agent. Python code of the task itself
+    cannot be interrupted and is left to finish in the background. A failing gating task
+    cancels the running tasks the same way and drops the queued ones.
+
+    Args:
+        tasks (dict): Mapping of task name to a zero-argument callable.
+        max_workers (int): Maximum number of tasks running at once. Defaults to all tasks.
+        timeouts (dict): Optional per-task timeout in seconds, keyed by task name.
+        default_timeout (float): Timeout for tasks without an entry in `timeouts`.
+        gating (iterable): Names of tasks whose failure cancels all remaining tasks.
+
+    Returns:
+        tuple: (results, durations, errors) dictionaries keyed by task name.
+
+    Raises:
+        Exception: The error of the first failing gating task, after cancelling pending tasks.
+    """
+    timeouts = timeouts or {}
+    gating = set(gating)
+    results, durations, errors = {}, {}, {}
+    started = {}
+    cancel_events = {name: threading.Event() for name in tasks}
+    # Set as soon as a gating task fails, so no queued task starts before the scheduler notices
+    aborted = threading.Event()
+
+    if not tasks:
+        return results, durations, errors
+
+    def make_runner(name, func):
+        def runner():
+            if aborted.is_set():
+                return None
+            started[name] = time.monotonic()
+            try:
+                with cancellation_scope(cancel_events[name]):
+                    return func()
+            except Exception:
+                if name in gating:
+                    aborted.set()
+                raise
+            finally:
+                durations.setdefault(name, time.monotonic() - started[name])
+        return runner
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(tasks))
+    futures = {executor.submit(make_runner(name, func)): name for name, func in tasks.items()}
+    pending = set(futures)
+
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    errors[name] = e
+                    results[name] = None
+                    logger.error(f"Task '{name}' failed: {e}")
+                    if name in gating:
+                        raise
+
+            now = time.monotonic()
+            for future in list(pending):
+                name = futures[future]
+                timeout = timeouts.get(name, default_timeout)
+                if timeout is None or name not in started or now - started[name] < timeout:
+                    continue
+                pending.discard(future)
+                cancel_events[name].set()
+                errors[name] = TaskTimeoutError(f"Task '{name}' timed out after {timeout} seconds")
+                results[name] = None
+                durations[name] = now - started[name]
+                logger.error(str(errors[name]))
+                if name in gating:
+                    raise errors[name]
+    except Exception:
+        aborted.set()
+        cancelled = [futures[future] for future in pending if future.cancel()]
+        if cancelled:
+            logger.warning(f"Cancelled pending tasks: {', '.join(sorted(cancelled))}")
+        stopped = sorted(futures[future] for future in pending if not future.cancelled())
+        if stopped:
+            logger.warning(f"Stopping running tasks: {', '.join(stopped)}")
+        for name in stopped:
+            cancel_events[name].set()
+        raise
+    finally:
+        # Don't block on cancelled tasks; their processes are stopped by the cancellation events
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results, durations, errors
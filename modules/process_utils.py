@@ -0,0 +1,243 @@
+# process_utils.py
+
+import atexit
+import contextlib
+import os
+import shlex
+import signal
+import subprocess
+import threading
+import time
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import PROCESS_TIMEOUT, PROCESS_KILL_GRACE, PROCESS_CPU_LIMIT, PROCESS_MEMORY_LIMIT
+from modules.trace_utils import span
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; CPU and memory limits are then not applied
+    resource = None
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+# How often (in seconds) a running process is checked against its deadline and for cancellation
+POLL_INTERVAL = 0.5
+REDACTED = "****"
+
+# Processes started by run_process() that have not exited yet
+_active = set()
+_active_lock = threading.Lock()
+# The cancellation event of the task running on each thread, see cancellation_scope()
+_scope = threading.local()
+
+
+class ProcessTimeoutError(subprocess.CalledProcessError):
+    """Raised when a process exceeds its wall-clock timeout and is killed."""
+
+    def __init__(self, returncode, cmd, timeout, output=None, stderr=None):
+        super().__init__(returncode, cmd, output, stderr)
+        self.timeout = timeout
+
+    def __str__(self):
+        return f"Command '{self.cmd}' timed out after {self.timeout} seconds and was killed"
+
+
+class ProcessCancelledError(subprocess.CalledProcessError):
+    """Raised when a process is killed because it was cancelled."""
+
+    def __str__(self):
+        return f"Command '{self.cmd}' was cancelled"
+
+
+def _redact(text, secrets):
+    for secret in secrets:
+        text = text.replace(secret, REDACTED)
+    return text
+
+
+def _apply_limits(pid, cpu_seconds, memory_bytes):
+    """Sets RLIMIT_CPU and RLIMIT_AS on a started process. The kernel enforces them from then on."""
+    if not (cpu_seconds or memory_bytes):
+        return
+    if resource is None or not hasattr(resource, "prlimit"):
+        logger.warning("CPU and memory limits are not supported on this platform, running without them")
+        return
+    if cpu_seconds:
+        # The soft limit sends SIGXCPU, the hard limit a few seconds later SIGKILL
+        resource.prlimit(pid, resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + PROCESS_KILL_GRACE))
+    if memory_bytes:
+        resource.prlimit(pid, resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def _signal_group(process, sig):
+    try:
+        if hasattr(os, "killpg"):
+            # The process leads its own session, so this reaches the tools it started too
+            os.killpg(process.pid, sig)
+        elif sig == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _stop(process):
+    """SIGTERM the process group, then SIGKILL it if it is still running after PROCESS_KILL_GRACE seconds."""
+    _signal_group(process, signal.SIGTERM)
+    try:
+        return process.wait(timeout=PROCESS_KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        _signal_group(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+        return process.wait()
+
+
+def terminate_all():
+    """Stops every process still running, e.g. when a stage fails and its remaining tools are not needed."""
+    with _active_lock:
+        processes = list(_active)
+    for process in processes:
+        if process.poll() is None:
+            logger.warning(f"Terminating process {process.pid}")
+            _stop(process)
+
+
+atexit.register(terminate_all)
+
+
+@contextlib.contextmanager
+def cancellation_scope(cancel_event):
+    """
+    Makes run_process() calls on this thread that have no cancel_event of their own stop when
+    cancel_event is set, however deep in the call stack they are.
+
+    Used by parallel_utils.run_tasks_concurrently() to stop the tools of a task that timed out
+    or was cancelled, without threading the event through every function signature.
+    """
+    previous = getattr(_scope, "cancel_event", None)
+    _scope.cancel_event = cancel_event
+    try:
+        yield cancel_event
+    finally:
+        _scope.cancel_event = previous
+
+
+def _read_lines(stream, name, prefix, secrets, log_output, on_line, lines):
+    for line in stream:
+        line = line.rstrip("\r\n")
+        if secrets:
+            line = _redact(line, secrets)
+        if log_output:
+            logger.info(f"[{prefix}] {line}")
+        if on_line:
+            on_line(name, line)
+        if lines is not None:
+            lines.append(line)
+    stream.close()
+
+
+def run_process(command, cwd=None, env=None, timeout=PROCESS_TIMEOUT, cpu_seconds=PROCESS_CPU_LIMIT,
+                memory_bytes=PROCESS_MEMORY_LIMIT, check=True, capture_output=False, log_output=True,
+                on_line=None, secrets=(), cancel_event=None, trace_args=None):
+    """
+    Run an external tool without a shell, streaming its output into the log line by line.
+
+    The tool runs in its own session, so on timeout or cancellation the whole process group
+    (including anything the tool started) gets SIGTERM and, after PROCESS_KILL_GRACE
+    seconds, SIGKILL. CPU and memory limits are applied with prlimit where the platform
+    supports it.
+
+    Args:
+        command (list): The program and its arguments.
+        cwd (str): Working directory.
+        env (dict): Environment variables added to the current environment.
+        timeout (float): Wall-clock limit in seconds; 0 or None for none.
+        cpu_seconds (int): CPU time limit; 0 or None for none.
+        memory_bytes (int): Address space limit; 0 or None for none.
+        check (bool): Raise on a non-zero exit status.
+        capture_output (bool): Also return the output lines in the result.
+        log_output (bool): Log the output lines.
+        on_line (callable): Called with ("stdout" or "stderr", line) for every output line.
+        secrets (iterable): Strings replaced with "****" in the logged command, output and trace.
+        cancel_event (threading.Event): Stops the process when set. Defaults to the event of the
+            enclosing cancellation_scope(), if any.
+        trace_args (dict): Extra arguments recorded on the trace span once the process exits.
+
+    Returns:
+        subprocess.CompletedProcess: With stdout and stderr as text if capture_output is set.
+
+    Raises:
+        ProcessTimeoutError: If the timeout is exceeded.
+        ProcessCancelledError: If cancel_event is set before the process exits.
+        subprocess.CalledProcessError: If check is set and the exit status is non-zero.
+    """
+    secrets = [secret for secret in secrets if secret]
+    display = _redact(shlex.join(command), secrets)
+    prefix = os.path.basename(command[0])
+    if cancel_event is None:
+        cancel_event = getattr(_scope, "cancel_event", None)
+    if cancel_event is not None and cancel_event.is_set():
+        raise ProcessCancelledError(None, display)
+    output = {"stdout": [] if capture_output else None, "stderr": [] if capture_output else None}
+    killed = None
+
+    with span(_redact(" ".join(command[:2]), secrets), "subprocess", command=display) as span_args:
+        logger.info(f"Running: {display}")
+        process = subprocess.Popen(command, cwd=cwd, env={**os.environ, **env} if env else None,
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, errors="replace", bufsize=1, start_new_session=True)
+        with _active_lock:
+            _active.add(process)
+        try:
+            _apply_limits(process.pid, cpu_seconds, memory_bytes)
+            readers = [threading.Thread(target=_read_lines, daemon=True,
+                                        args=(stream, name, prefix, secrets, log_output, on_line, output[name]))
+                       for name, stream in (("stdout", process.stdout), ("stderr", process.stderr))]
+            for reader in readers:
+                reader.start()
+
+            deadline = time.monotonic() + timeout if timeout else None
+            while process.poll() is None:
+                if cancel_event is not None and cancel_event.is_set():
+                    killed = "cancelled"
+                elif deadline is not None and time.monotonic() >= deadline:
+                    killed = "timeout"
+                if killed:
+                    logger.error(f"Stopping {prefix} (pid {process.pid}): {killed}")
+                    _stop(process)
+                    break
+                wait_time = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.monotonic())
+                try:
+                    process.wait(timeout=max(wait_time, 0))
+                except subprocess.TimeoutExpired:
+                    pass
+
+            # A tool that forked into a new session may keep the pipes open; don't wait for it forever
+            for reader in readers:
+                reader.join(timeout=PROCESS_KILL_GRACE)
+        finally:
+            with _active_lock:
+                _active.discard(process)
+            if process.poll() is None:
+                _stop(process)
+
+        returncode = process.returncode
+        span_args["exit_code"] = returncode
+        if killed:
+            span_args["killed"] = killed
+        if trace_args:
+            span_args.update(trace_args)
+
+    stdout = "\n".join(output["stdout"]) if capture_output else None
+    stderr = "\n".join(output["stderr"]) if capture_output else None
+    if killed == "timeout":
+        raise ProcessTimeoutError(returncode, display, timeout, stdout, stderr)
+    if killed == "cancelled":
+        raise ProcessCancelledError(returncode, display, stdout, stderr)
+    if resource is not None and returncode == -getattr(signal, "SIGXCPU", 0):
+        logger.error(f"{prefix} exceeded its CPU time limit of {cpu_seconds} seconds")
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, display, stdout, stderr)
+    return subprocess.CompletedProcess(display, returncode, stdout, stderr)
+
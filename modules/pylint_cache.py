@@ -0,0 +1,90 @@
+# pylint_cache.py
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import PYLINT_CACHE_DIR
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+# Files pylint may read its configuration from; any change to them invalidates every entry
+CONFIG_FILE_NAMES = ["pylintrc", ".pylintrc", "pyproject.toml", "setup.cfg", "tox.ini"]
+
+# Bits of pylint's exit status, by message type
+MESSAGE_TYPE_STATUS = {"fatal": 1, "error": 2, "warning": 4, "refactor": 8, "convention": 16}
+
+
+def compute_config_hash(source_dir: str, pylint_version: str, pylint_args=()) -> str:
+    """Hashes everything besides a file's content that can change its messages."""
+    hasher = hashlib.sha256()
+    hasher.update(f"pylint={pylint_version}\0python={sys.version_info[:2]}\0args={list(pylint_args)}".encode())
+    for name in CONFIG_FILE_NAMES:
+        path = os.path.join(source_dir, name)
+        if os.path.isfile(path):
+            with open(path, 'rb') as file:
+                hasher.update(f"\0{name}\0".encode() + file.read())
+    return hasher.hexdigest()
+
+
+def compute_file_key(config_hash: str, relative_path: str, content_hash: str) -> str:
+    """
+    Keys a file's result on its content hash, its path and the pylint configuration.
+
+    The path is part of the key because messages carry the module name and path.
+    """
+    return hashlib.sha256(f"{config_hash}\0{relative_path}\0{content_hash}".encode()).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(PYLINT_CACHE_DIR, key[:2], f"{key}.json")
+
+
+def load(key: str, source_dir: str):
+    """
+    Returns the cached messages for a file key.
+
+    Message paths are stored relative to the repository root and rebased onto the current
+    working directory, where pylint itself reports them, so entries are shared by agents
+    that check out the repository in different places.
+
+    Returns:
+        list: The pylint messages (possibly empty), or None on a miss.
+    """
+    try:
+        with open(_entry_path(key), 'r') as file:
+            messages = json.load(file)
+    except (OSError, ValueError):
+        return None
+    for message in messages:
+        message["path"] = os.path.relpath(os.path.join(source_dir, *message["path"].split("/")))
+    return messages
+
+
+def store(key: str, messages: list, source_dir: str) -> None:
+    """Writes the messages for a file key atomically, so concurrent agents never read partial entries."""
+    messages = [{**message, "path": os.path.relpath(os.path.abspath(message["path"]), source_dir).replace(os.sep, "/")}
+                for message in messages]
+    entry_path = _entry_path(key)
+    os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), prefix=".tmp-")
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            json.dump(messages, file)
+        os.replace(temp_path, entry_path)
+    except OSError as e:
+        logger.warning(f"Could not store pylint results in cache: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def compute_exit_status(messages: list) -> int:
+    """Rebuilds pylint's bit-encoded exit status from a list of messages."""
+    status = 0
+    for message in messages:
+        status |= MESSAGE_TYPE_STATUS.get(message.get("type"), 0)
+    return status
@@ -1,7 +1,9 @@
 import os
 import json
-import time
-import requests
+
+from modules.custom_logger import setup_custom_logger
+from modules.http_client import send_request, get_session
+from modules.workspace_index import get_workspace_index
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
@@ -11,6 +13,12 @@ RUNDECK_USERNAME = os.getenv("RD_USR")
 RUNDECK_PASSWORD = os.getenv("RD_PASS")
 RUNDECK_URL = os.getenv("RUNDECK_URL")
 
+# Rundeck execution watching: poll quickly while output flows, back off while the job is quiet
+RUNDECK_JOB_TIMEOUT = int(os.getenv("RUNDECK_JOB_TIMEOUT", "600"))  # seconds
+RUNDECK_POLL_MIN_INTERVAL = 2  # seconds
+RUNDECK_POLL_MAX_INTERVAL = 30  # seconds
+RUNDECK_POLL_BACKOFF = 1.5
+
 def call_api(url, method='GET', params=None, data=None, headers=None):
     """
     Function to make an HTTP request to the specified URL using the given method.
@@ -25,8 +33,10 @@ def call_api(url, method='GET', params=None, data=None, headers=None):
     Returns:
         dict: The JSON response received from the API, or None if an error occurs.
     """
+    import requests
+
     try:
-        response = requests.request(method, url, params=params, data=data, headers=headers)
+        response = send_request(method, url, params=params, data=data, headers=headers)
         response.raise_for_status()  # Raise an error for bad status codes
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -39,9 +49,10 @@ def determine_deploy_type():
     You can customize this logic based on your project's requirements.
     """
     # Example: Check for the presence of pom.xml, package.json, etc.
-    if os.path.exists("pom.xml"):
+    index = get_workspace_index(os.getcwd())
+    if index.exists("pom.xml"):
         return "maven"
-    elif os.path.exists("package.json"):
+    elif index.exists("package.json"):
         return "npm"
     else:
         return "tar"
@@ -49,28 +60,38 @@ def determine_deploy_type():
 def authenticate_with_rundeck(username, password, rundeck_url):
     """
     Authenticate with Rundeck and return the session object.
+
+    The shared pooled session is used, so the login cookie is reused by later Rundeck calls.
     """
     try:
-        session = requests.Session()
+        session = get_session()
         login_data = {
             "j_username": username,
             "j_password": password
         }
-        response = session.post(f"{rundeck_url}/j_security_check", data=login_data)
+        response = send_request("POST", f"{rundeck_url}/j_security_check", data=login_data, session=session)
         response.raise_for_status()
         return session
     except Exception as e:
         logger.error(f"Error authenticating with Rundeck: {e}")
         return None
 
-def trigger_rundeck_job(session, job_id, argstring):
+def trigger_rundeck_job(session, job_id, argstring, run_at=None):
     """
     Trigger a Rundeck job with the provided job ID and arguments.
+
+    With run_at (an ISO-8601 date-time), the execution is scheduled for that time instead.
     """
     try:
-        response = session.post(
-            f"{RUNDECK_URL}/api/14/job/{job_id}/run",
-            json={"argString": argstring},
+        body = {"argString": argstring}
+        api_version = 14
+        if run_at:
+            # runAtTime needs API 18; older versions would ignore it and run the job straight away
+            body["runAtTime"] = run_at
+            api_version = 18
+        response = send_request(
+            "POST", f"{RUNDECK_URL}/api/{api_version}/job/{job_id}/run", session=session,
+            json=body,
             headers={"Content-Type": "application/json"}
         )
         response.raise_for_status()
@@ -85,8 +106,8 @@ def check_job_status(session, job_execution_id):
     Check the status of a Rundeck job execution.
     """
     try:
-        response = session.get(
-            f"{RUNDECK_URL}/api/14/execution/{job_execution_id}",
+        response = send_request(
+            "GET", f"{RUNDECK_URL}/api/14/execution/{job_execution_id}", session=session,
             headers={"Content-Type": "application/json"}
         )
         response.raise_for_status()
@@ -96,36 +117,111 @@ def check_job_status(session, job_execution_id):
         logger.error(f"Error checking job status: {e}")
         return None
 
-def main():
+def fetch_execution_output(session, job_execution_id, offset=0):
+    """
+    Fetch the execution output written after `offset` from Rundeck's output API.
+
+    The response carries the new log entries, the offset to continue from, and the
+    execution state, so a single call both tails the log and detects completion.
+    """
     try:
-        # Determine the deploy type based on the files in the workspace directory
-        deploy_type = determine_deploy_type()
+        response = send_request(
+            "GET", f"{RUNDECK_URL}/api/14/execution/{job_execution_id}/output", session=session,
+            params={"offset": offset},
+            headers={"Accept": "application/json"}
+        )
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        logger.error(f"Error fetching job output: {e}")
+        return None
 
-        # Load the JSON configuration file
-        with open("path/to/config.json", "r") as json_file:
-            config = json.load(json_file)
 
-        # Get the nodes and job mappings for the deploy type
-        deploy_config = config.get(deploy_type, {})
-        if not deploy_config:
-            logger.error("No configuration found for the deploy type.")
-            return
+async def watch_rundeck_execution(session, job_execution_id, label, timeout=RUNDECK_JOB_TIMEOUT):
+    """
+    Tail a Rundeck execution's output until it completes and return its final state.
 
-        # Get the list of environments from the ENV_NAME variable
-        env_names = os.getenv("ENV_NAME", "").split(",")
+    The poll interval starts at RUNDECK_POLL_MIN_INTERVAL, grows by RUNDECK_POLL_BACKOFF
+    while no new output arrives, and resets as soon as it does.
+    """
+    import asyncio
 
-        # Authenticate with Rundeck
-        session = authenticate_with_rundeck(RUNDECK_USERNAME, RUNDECK_PASSWORD, RUNDECK_URL)
-        if not session:
-            logger.error("Failed to authenticate with Rundeck.")
-            return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    offset = 0
+    interval = RUNDECK_POLL_MIN_INTERVAL
+
+    while loop.time() < deadline:
+        output = await asyncio.to_thread(fetch_execution_output, session, job_execution_id, offset)
+        if output:
+            for entry in output.get("entries", []):
+                logger.info(f"[{label}] {entry.get('log', '')}")
+
+            new_offset = int(output.get("offset", offset))
+            if output.get("execCompleted"):
+                if output.get("completed") or new_offset == offset:
+                    return output.get("execState")
+                # Execution finished but log output is still being read; fetch the rest straight away
+                offset = new_offset
+                continue
+
+            if new_offset != offset:
+                interval = RUNDECK_POLL_MIN_INTERVAL
+                offset = new_offset
+            else:
+                interval = min(interval * RUNDECK_POLL_BACKOFF, RUNDECK_POLL_MAX_INTERVAL)
+        await asyncio.sleep(min(interval, max(deadline - loop.time(), 0)))
+
+    return "timeout"
+
+
+async def deploy_environment(session, env_name, env_config):
+    """Trigger the Rundeck job for one environment and watch it to completion."""
+    import asyncio
+
+    nodes = env_config.get("nodes", [])
+    job_name = env_config.get("job_name", "")
+
+    # Construct the argstring with all nodes for the job
+    argstring = ",".join([node["url"] for node in nodes])
+
+    # Trigger the Rundeck job for the environment
+    job_execution_id = await asyncio.to_thread(trigger_rundeck_job, session, job_name, argstring)
+    if not job_execution_id:
+        logger.error(f"Failed to trigger job for environment: {env_name}")
+        return "not_triggered"
+
+    logger.info(f"Triggered Rundeck job '{job_name}' for environment '{env_name}'")
+
+    job_status = await watch_rundeck_execution(session, job_execution_id, env_name)
+    if job_status == "succeeded":
+        logger.info(f"Job '{job_name}' in '{env_name}' completed successfully.")
+    elif job_status == "timeout":
+        logger.error(f"Timeout exceeded while waiting for job '{job_name}' in '{env_name}'")
+    else:
+        logger.error(f"Job '{job_name}' in '{env_name}' failed or terminated ({job_status}).")
+    return job_status
+
+
+async def deploy_environments(session, deploy_config, env_names):
+    """Trigger and watch all environments concurrently, returning {env_name: final state}."""
+    import asyncio
+
+    deployments = {}
+    for env_name in env_names:
+        env_config = deploy_config.get(env_name, {})
+        if not env_config:
+            logger.error(f"No configuration found for environment: {env_name}")
+            continue
+        deployments[env_name] = deploy_environment(session, env_name, env_config)
+
+    results = await asyncio.gather(*deployments.values())
+    return dict(zip(deployments, results))
 
-        for env_name in env_names:
-            env_config = deploy_config.get(env_name, {})
-            if not env_config:
-                logger.error(f"No configuration found for
 
 def main():
+    import asyncio
+
     try:
         # Determine the deploy type based on the files in the workspace directory
         deploy_type = determine_deploy_type()
@@ -149,44 +245,8 @@ def main():
             logger.error("Failed to authenticate with Rundeck.")
             return
 
-        for env_name in env_names:
-            env_config = deploy_config.get(env_name, {})
-            if not env_config:
-                logger.error(f"No configuration found for environment: {env_name}")
-                continue
-
-            nodes = env_config.get("nodes", [])
-            job_name = env_config.get("job_name", "")
-
-            # Construct the argstring with all nodes for the job
-            argstring = ",".join([node["url"] for node in nodes])
-
-            # Trigger the Rundeck job for the environment
-            job_execution_id = trigger_rundeck_job(session, job_name, argstring)
-            if not job_execution_id:
-                logger.error(f"Failed to trigger job for environment: {env_name}")
-                continue
-
-            logger.info(f"Triggered Rundeck job '{job_name}' for environment '{env_name}'")
-
-            # Check the status of the triggered job
-            job_status = None
-            timeout = 600  # Timeout in seconds (10 minutes)
-            interval = 60   # Check status every 1 minute
-            while timeout > 0:
-                job_status = check_job_status(session, job_execution_id)
-                if job_status in ["running", "scheduled"]:
-                    logger.info(f"Job '{job_name}' in '{env_name}' is {job_status}, waiting...")
-                    time.sleep(interval)
-                    timeout -= interval
-                elif job_status == "succeeded":
-                    logger.info(f"Job '{job_name}' in '{env_name}' completed successfully.")
-                    break
-                else:
-                    logger.error(f"Job '{job_name}' in '{env_name}' failed or terminated.")
-                    break
-            else:
-                logger.error(f"Timeout exceeded while waiting for job '{job_name}' in '{env_name}'")
+        # Trigger every environment at once and watch them concurrently
+        return asyncio.run(deploy_environments(session, deploy_config, env_names))
 
     except Exception as e:
         logger.exception(f"An error occurred during code deployment: {e}")
@@ -1,14 +1,103 @@
 import json
-from modules.env_utils import file_exists
+import os
+import threading
+
+from modules.build_utils import BUILDERS
+from modules.env_utils import RUNDECK_CONFIG_DIR
+
+# Key used in the index for entries that apply to every environment
+ALL_ENVIRONMENTS = "*"
+ENTRY_KEYS = {"jobs", "job_name", "nodes"}
+
+# Compiled project configs: {file path: ((mtime_ns, size), {(env_name, build_type): entry})}
+_config_index = {}
+_config_lock = threading.Lock()
+
+
+class RundeckConfigError(ValueError):
+    """Raised when a Rundeck config file does not match the expected schema."""
+
+
+def _compile_entry(entry, where):
+    """Validates one build type entry and normalises it to {"jobs": [...], "nodes": [...]}."""
+    if not isinstance(entry, dict):
+        raise RundeckConfigError(f"{where}: expected an object with 'jobs' (or 'job_name') and 'nodes'")
+    unknown = set(entry) - ENTRY_KEYS
+    if unknown:
+        raise RundeckConfigError(f"{where}: unknown key(s) {', '.join(sorted(unknown))}")
+    if ("jobs" in entry) == ("job_name" in entry):
+        raise RundeckConfigError(f"{where}: set exactly one of 'jobs' (a list) or 'job_name' (a string)")
+
+    jobs = entry["jobs"] if "jobs" in entry else [entry["job_name"]]
+    if not isinstance(jobs, list) or not jobs or not all(isinstance(job, str) and job for job in jobs):
+        raise RundeckConfigError(f"{where}: 'jobs' must be a non-empty list of job ids")
+
+    nodes = entry.get("nodes")
+    if not isinstance(nodes, list) or not nodes:
+        raise RundeckConfigError(f"{where}: 'nodes' must be a non-empty list")
+    for node in nodes:
+        if not (isinstance(node, str) and node) and not (isinstance(node, dict) and node.get("url")):
+            raise RundeckConfigError(f"{where}: nodes must be names or objects with a 'url', got {node!r}")
+    return {"jobs": list(jobs), "nodes": list(nodes)}
+
+
+def compile_rundeck_config(config, source=""):
+    """
+    Compile a project config into an index keyed by (env_name, build_type).
+
+    Two layouts are accepted: build types at the top level, which apply to every
+    environment, or environments at the top level, each holding build types.
+
+    Raises:
+        RundeckConfigError: If the config does not follow either layout.
+    """
+    if not isinstance(config, dict) or not config:
+        raise RundeckConfigError(f"{source}: expected a non-empty JSON object")
+
+    if all(key in BUILDERS for key in config):
+        sections = {ALL_ENVIRONMENTS: config}
+    else:
+        sections = config
+
+    index = {}
+    for env_name, build_types in sections.items():
+        if not isinstance(build_types, dict):
+            raise RundeckConfigError(f"{source}: {env_name}: expected an object of build types")
+        for build_type, entry in build_types.items():
+            if build_type not in BUILDERS:
+                raise RundeckConfigError(f"{source}: {env_name}: unknown build type '{build_type}', "
+                                         f"expected one of {', '.join(BUILDERS)}")
+            index[(env_name, build_type)] = _compile_entry(entry, f"{source}: {env_name}.{build_type}")
+    return index
 
 
 def load_rundeck_config(project):
-    config_file_path = f'{project}.json'
-    if file_exists(config_file_path):
+    """
+    Returns the compiled config index of a project, re-reading the file only when it changed.
+
+    Raises:
+        FileNotFoundError: If the project has no config file.
+        RundeckConfigError: If the config file is invalid JSON or does not match the schema.
+    """
+    config_file_path = os.path.join(RUNDECK_CONFIG_DIR, f'{project}.json')
+    try:
+        file_stat = os.stat(config_file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Rundeck config not found for project: {project}") from None
+    signature = (file_stat.st_mtime_ns, file_stat.st_size)
+
+    with _config_lock:
+        cached = _config_index.get(config_file_path)
+        if cached and cached[0] == signature:
+            return cached[1]
         with open(config_file_path, 'r') as f:
-            return json.load(f)
-    else:
-        raise FileNotFoundError(f"Rundeck config not found for project: {project}")
+            try:
+                config = json.load(f)
+            except ValueError as e:
+                raise RundeckConfigError(f"{config_file_path}: invalid JSON: {e}") from e
+        index = compile_rundeck_config(config, config_file_path)
+        _config_index[config_file_path] = (signature, index)
+        return index
 
 
 def determine_rundeck_config(env_variables):
@@ -16,3 +105,17 @@ def determine_rundeck_config(env_variables):
         return load_rundeck_config(env_variables["RUNDECK_PROJECT"])
     else:
         return None
+
+
+def resolve_deployment(rundeck_config, env_name, build_type):
+    """
+    Returns {"jobs", "nodes"} for an environment and build type, preferring an
+    environment-specific entry over one for all environments.
+
+    Raises:
+        RundeckConfigError: If neither is configured.
+    """
+    entry = rundeck_config.get((env_name, build_type)) or rundeck_config.get((ALL_ENVIRONMENTS, build_type))
+    if entry is None:
+        raise RundeckConfigError(f"No Rundeck jobs configured for build type '{build_type}' in {env_name}")
+    return entry
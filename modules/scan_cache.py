@@ -0,0 +1,96 @@
+# scan_cache.py
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import SCAN_CACHE_DIR
+from modules.process_utils import run_process
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+PASSED = "passed"
+FAILED = "failed"
+
+
+class ScanFailedError(ValueError):
+    """Raised when a scan ran and its findings fail the build. Only these failures are stored as verdicts."""
+
+
+def get_commit(workspace_dir: str, env_variables: dict):
+    """
+    Returns the commit SHA the workspace is checked out at, or None if it cannot be trusted.
+
+    A workspace with uncommitted changes to tracked files is not the commit, so it gets
+    None and is always scanned.
+    """
+    try:
+        commit = run_process(["git", "rev-parse", "HEAD"], cwd=workspace_dir, capture_output=True,
+                             log_output=False).stdout.strip()
+        dirty = run_process(["git", "status", "--porcelain", "--untracked-files=no"], cwd=workspace_dir,
+                            capture_output=True, log_output=False).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        # Not a git checkout; Jenkins still tells us the commit it built
+        return env_variables.get("GIT_COMMIT") or None
+    return None if dirty else commit
+
+
+def get_scanner_version(scan_type: str, env_variables: dict):
+    """
+    Returns the scanner and ruleset version of a scan type from env.properties.
+
+    Reads <SCAN>_SCANNER_VERSION and the optional <SCAN>_RULESET_VERSION. Without a scanner
+    version there is no telling whether a stored verdict still applies, so None is returned
+    and the scan always runs.
+    """
+    scanner_version = env_variables.get(f"{scan_type}_SCANNER_VERSION")
+    if not scanner_version:
+        return None
+    ruleset_version = env_variables.get(f"{scan_type}_RULESET_VERSION")
+    return f"{scanner_version}/{ruleset_version}" if ruleset_version else scanner_version
+
+
+def compute_key(repo: str, commit: str, scan_type: str, scanner_version: str) -> str:
+    """Keys a verdict on the repository, commit, scan type and scanner/ruleset version."""
+    return hashlib.sha256(f"{repo}\0{commit}\0{scan_type}\0{scanner_version}".encode()).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(SCAN_CACHE_DIR, key[:2], f"{key}.json")
+
+
+def load(key: str, ttl: float):
+    """
+    Returns the stored entry for a key if it is younger than `ttl` seconds.
+
+    Returns:
+        dict: {"verdict", "result", "error", "scanned_at", ...}, or None on a miss.
+    """
+    try:
+        with open(_entry_path(key), 'r') as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get("scanned_at", 0) > ttl:
+        return None
+    return entry
+
+
+def store(key: str, entry: dict) -> None:
+    """Writes an entry atomically, so concurrent agents never read partial entries."""
+    entry_path = _entry_path(key)
+    os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), prefix=".tmp-")
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            json.dump({**entry, "scanned_at": time.time()}, file)
+        os.replace(temp_path, entry_path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not store scan result in cache: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
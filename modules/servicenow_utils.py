@@ -0,0 +1,167 @@
+# servicenow_utils.py
+
+import threading
+import time
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, SERVICENOW_URL, SERVICENOW_APPROVAL_TIMEOUT
+from modules.http_client import send_request
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+CHANGE_REQUEST_TABLE = "api/now/table/change_request"
+# Only these fields are returned by lookups, instead of the full change request record
+CR_FIELDS = ["sys_id", "number", "state", "approval", "correlation_id"]
+APPROVAL_FIELDS = ["approval", "state"]
+FINAL_APPROVAL_STATES = {"approved", "rejected"}
+
+# Approval polling: fast right after a change, backing off while the approval is untouched
+SERVICENOW_POLL_MIN_INTERVAL = 5  # seconds
+SERVICENOW_POLL_MAX_INTERVAL = 60  # seconds
+SERVICENOW_POLL_BACKOFF = 1.5
+
+_credentials = None
+_credentials_lock = threading.Lock()
+
+
+def read_servicenow_credentials():
+    """Returns the (username, password) from env.properties, read once per process."""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            env_variables = read_properties_file(PROPERTIES_FILE_PATH)
+            _credentials = (env_variables.get("SERVICENOW_USERNAME"), env_variables.get("SERVICENOW_PASSWORD"))
+    return _credentials
+
+
+def servicenow_request(method, path, **kwargs):
+    """Sends a Table API request through the shared, pooled session."""
+    return send_request(method, f"{SERVICENOW_URL.rstrip('/')}/{path}", auth=read_servicenow_credentials(),
+                        headers={"Content-Type": "application/json", "Accept": "application/json"}, **kwargs)
+
+
+def _query_value(name, value):
+    """
+    Returns a value to embed in an encoded query, refusing values that would change the query.
+
+    "^" separates the conditions of an encoded query and cannot be escaped, so a value
+    containing it (or a line break) could add conditions of its own.
+    """
+    value = str(value)
+    if any(character in value for character in "^\r\n"):
+        raise ValueError(f"{name} must not contain '^' or line breaks: {value!r}")
+    return value
+
+
+def _query_change_requests(query, fields, limit=1):
+    response = servicenow_request("GET", CHANGE_REQUEST_TABLE, params={
+        "sysparm_query": query,
+        "sysparm_fields": ",".join(fields),
+        "sysparm_limit": limit,
+        "sysparm_display_value": "false",
+        "sysparm_exclude_reference_link": "true",
+    })
+    if response.status_code != 200:
+        raise ValueError(f"ServiceNow query failed with HTTP {response.status_code}: {response.text[:200]}")
+    return response.json().get("result", [])
+
+
+def find_change_request(correlation_id, fields=CR_FIELDS):
+    """
+    Returns the open change request created for `correlation_id`, or None if there is none.
+
+    Closed, cancelled and rejected change requests are not returned, so a build retried
+    after a rejection gets a new change request instead of failing on the old one.
+    """
+    records = _query_change_requests(f"correlation_id={_query_value('correlation_id', correlation_id)}"
+                                     f"^active=true^approval!=rejected^ORDERBYDESCsys_created_on", fields)
+    return records[0] if records else None
+
+
+def create_change_request(payload, correlation_id):
+    """
+    Create a change request, or return the open one already created for `correlation_id`.
+
+    The correlation id (e.g. the Jenkins BUILD_TAG) is stored on the change request, so a
+    retried build finds its change request with one field-filtered lookup instead of
+    opening a duplicate.
+
+    Args:
+        payload (dict): The change request fields.
+        correlation_id (str): Identifies the build the change request belongs to.
+
+    Returns:
+        dict: The sys_id, number, state, approval and correlation_id of the change request.
+
+    Raises:
+        ValueError: If ServiceNow rejects the lookup or the creation, or the correlation id
+            contains "^".
+    """
+    existing = find_change_request(correlation_id)
+    if existing:
+        logger.info(f"Reusing change request {existing['number']} for {correlation_id}")
+        return existing
+
+    response = servicenow_request("POST", CHANGE_REQUEST_TABLE, params={"sysparm_fields": ",".join(CR_FIELDS)},
+                                  json={**payload, "correlation_id": correlation_id})
+    if response.status_code not in (200, 201):
+        raise ValueError(f"Creating the change request failed with HTTP {response.status_code}: "
+                         f"{response.text[:200]}")
+    change_request = response.json().get("result", {})
+    logger.info(f"Created change request {change_request.get('number')} for {correlation_id}")
+    return change_request
+
+
+def get_approval_change(sys_id, last_approval):
+    """
+    Returns the approval fields of a change request if its approval differs from `last_approval`.
+
+    The condition is part of the query, so an unchanged approval comes back as an empty
+    result rather than the record.
+    """
+    query = f"sys_id={_query_value('sys_id', sys_id)}"
+    if last_approval:
+        query += f"^approval!={_query_value('approval', last_approval)}"
+    records = _query_change_requests(query, APPROVAL_FIELDS)
+    return records[0] if records else None
+
+
+def wait_for_approval(sys_id, timeout=SERVICENOW_APPROVAL_TIMEOUT, on_change=None):
+    """
+    Wait until a change request is approved or rejected.
+
+    The poll interval starts at SERVICENOW_POLL_MIN_INTERVAL, grows by SERVICENOW_POLL_BACKOFF
+    while the approval does not change, and resets when it does.
+
+    Args:
+        sys_id (str): The change request's sys_id.
+        timeout (int): Seconds to wait.
+        on_change (callable): Optional callback receiving the approval fields on every change.
+
+    Returns:
+        str: "approved" or "rejected".
+
+    Raises:
+        TimeoutError: If the change request is still undecided after `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    approval = None
+    interval = SERVICENOW_POLL_MIN_INTERVAL
+    while True:
+        change = get_approval_change(sys_id, approval)
+        if change:
+            approval = change.get("approval")
+            logger.info(f"Change request {sys_id}: approval {approval}, state {change.get('state')}")
+            if on_change:
+                on_change(change)
+            if approval in FINAL_APPROVAL_STATES:
+                return approval
+            interval = SERVICENOW_POLL_MIN_INTERVAL
+        else:
+            interval = min(interval * SERVICENOW_POLL_BACKOFF, SERVICENOW_POLL_MAX_INTERVAL)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Change request {sys_id} not approved within {timeout}s (approval: {approval})")
+        time.sleep(min(interval, remaining))
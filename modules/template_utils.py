@@ -0,0 +1,129 @@
+# template_utils.py
+
+import json
+import os
+import re
+import threading
+
+from modules.custom_logger import setup_custom_logger
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_.]*)\s*\}\}")
+
+# Compiled template files: {(absolute path, bare_values): ((mtime_ns, size), Template)}
+_template_cache = {}
+_template_lock = threading.Lock()
+
+
+class MissingVariablesError(ValueError):
+    """Raised when a template is rendered without values for some of its placeholders."""
+
+    def __init__(self, missing):
+        self.missing = sorted(missing)
+        super().__init__(f"Missing template variables: {', '.join(self.missing)}")
+
+
+class Template:
+    """
+    A JSON payload template compiled into a render plan.
+
+    The template is walked once, when it is compiled. Every string holding a {{VAR}}
+    placeholder, either as the whole value or inline, becomes a small render function,
+    and everything without placeholders is kept as a constant, so rendering only
+    touches the parts of the payload that change.
+
+    Args:
+        data: The parsed JSON template: dicts, lists and scalars, nested to any depth.
+        bare_values (bool): Also replace string values that are exactly a variable name,
+            without braces, as ICE schemas are written. Such values are kept as they are
+            when the variable is not set, and are not reported as missing.
+    """
+
+    def __init__(self, data, bare_values=False):
+        self.bare_values = bare_values
+        self.variables = set()
+        self._render = self._compile(data)
+
+    def _compile(self, value):
+        if isinstance(value, dict):
+            items = [(key, self._compile(item)) for key, item in value.items()]
+            return lambda variables: {key: render(variables) for key, render in items}
+        if isinstance(value, list):
+            items = [self._compile(item) for item in value]
+            return lambda variables: [render(variables) for render in items]
+        if isinstance(value, str):
+            return self._compile_string(value)
+        return lambda variables: value
+
+    def _compile_string(self, value):
+        matches = list(PLACEHOLDER_PATTERN.finditer(value))
+        if not matches:
+            if self.bare_values:
+                return lambda variables: variables.get(value, value)
+            return lambda variables: value
+
+        self.variables.update(match.group(1) for match in matches)
+        if len(matches) == 1 and matches[0].group(0) == value:
+            name = matches[0].group(1)
+            return lambda variables: variables.get(name, value)
+
+        # (variable name or None, text): literal text, or the placeholder kept when a variable is unset
+        pieces, position = [], 0
+        for match in matches:
+            if match.start() > position:
+                pieces.append((None, value[position:match.start()]))
+            pieces.append((match.group(1), match.group(0)))
+            position = match.end()
+        if position < len(value):
+            pieces.append((None, value[position:]))
+        return lambda variables: "".join([text if name is None else str(variables.get(name, text))
+                                          for name, text in pieces])
+
+    def missing(self, variables):
+        """Returns the placeholders of the template that `variables` has no value for."""
+        return self.variables.difference(variables)
+
+    def render(self, variables, strict=True):
+        """
+        Render the template with one set of variables.
+
+        Args:
+            variables (dict): Values for the placeholders.
+            strict (bool): Raise if a placeholder has no value. Otherwise it is left in place.
+
+        Returns:
+            A new payload; the template itself is never modified.
+
+        Raises:
+            MissingVariablesError: If strict and some placeholders have no value.
+        """
+        if strict:
+            missing = self.missing(variables)
+            if missing:
+                raise MissingVariablesError(missing)
+        return self._render(variables)
+
+
+def load_template(file_path, bare_values=False):
+    """
+    Returns the compiled template of a JSON file, compiling it again only when the file changed.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not valid JSON.
+    """
+    cache_key = (os.path.abspath(file_path), bare_values)
+    file_stat = os.stat(file_path)
+    signature = (file_stat.st_mtime_ns, file_stat.st_size)
+
+    with _template_lock:
+        cached = _template_cache.get(cache_key)
+        if cached and cached[0] == signature:
+            return cached[1]
+        with open(file_path, 'r') as f:
+            template = Template(json.load(f), bare_values)
+        _template_cache[cache_key] = (signature, template)
+    logger.info(f"Compiled template {file_path} ({len(template.variables)} variable(s))")
+    return template
@@ -0,0 +1,117 @@
+# trace_utils.py
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import TRACE_ENABLED, TRACE_FILE_PATH
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; concurrent writers are then not serialised
+    fcntl = None
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+_events = []
+_events_lock = threading.Lock()
+
+# Returned by span() when tracing is disabled. Callers may add args to the yielded dict;
+# with tracing off those writes land in this throwaway dict and are never read.
+_NULL_SPAN = nullcontext({})
+
+
+@contextmanager
+def _span(name, category, args):
+    start = time.time_ns()
+    try:
+        yield args
+    finally:
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start // 1000,
+            "dur": (time.time_ns() - start) // 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        }
+        with _events_lock:
+            _events.append(event)
+
+
+def span(name, category="function", **args):
+    """
+    Time a block of code as a trace span.
+
+    Usage:
+        with span("npm ci", "subprocess", cwd=workspace_dir) as span_args:
+            ...
+            span_args["exit_code"] = 0
+
+    Returns a shared no-op context manager when tracing is disabled (BUILD_TRACE is not "true").
+    """
+    if not TRACE_ENABLED:
+        return _NULL_SPAN
+    return _span(name, category, args)
+
+
+def traced(category="function", name=None):
+    """Decorator recording every call of the function as a span. A no-op when tracing is disabled."""
+    def decorator(func):
+        if not TRACE_ENABLED:
+            return func
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _span(span_name, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def write_trace(file_path=TRACE_FILE_PATH):
+    """
+    Append the spans recorded by this process to the build's trace file.
+
+    Every stage runs as its own process, so the file is read, extended and atomically
+    replaced rather than overwritten, giving one trace per build.
+    """
+    with _events_lock:
+        events = list(_events)
+        _events.clear()
+    if not events:
+        return
+
+    events.insert(0, {"name": "process_name", "ph": "M", "pid": os.getpid(),
+                      "args": {"name": os.path.basename(sys.argv[0]) or "python"}})
+    try:
+        with open(f"{file_path}.lock", 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                with open(file_path, 'r') as file:
+                    trace = json.load(file)
+            except (OSError, ValueError):
+                trace = {"traceEvents": [], "displayTimeUnit": "ms"}
+            trace["traceEvents"].extend(events)
+            temp_path = f"{file_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as file:
+                json.dump(trace, file)
+            os.replace(temp_path, file_path)
+        logger.info(f"Wrote {len(events) - 1} trace span(s) to {file_path}")
+    except OSError as e:
+        logger.warning(f"Could not write build trace: {e}")
+
+
+if TRACE_ENABLED:
+    atexit.register(write_trace)
@@ -0,0 +1,254 @@
+# workspace_index.py
+
+import fnmatch
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import WORKSPACE_INDEX_IGNORES, WORKSPACE_INDEX_HASH
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+INDEX_FILE = os.path.join(".build-tools", "workspace-index.json")
+# Extra ignore globs, one per line, read from the workspace root
+IGNORE_FILE_NAME = ".buildignore"
+INDEX_VERSION = 2
+
+# Entry types
+FILE, DIRECTORY, SYMLINK = "f", "d", "l"
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def is_excluded(relative_path, exclude):
+    """Checks a workspace-relative path, and each of its components, against exclusion globs."""
+    relative_path = relative_path.replace(os.sep, "/")
+    parts = relative_path.split("/")
+    return any(fnmatch.fnmatch(relative_path, pattern) or any(fnmatch.fnmatch(part, pattern) for part in parts)
+               for pattern in exclude)
+
+
+def _hash_file(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def read_ignore_rules(root):
+    """Returns the configured ignore globs plus those listed in the workspace's .buildignore."""
+    ignore = list(WORKSPACE_INDEX_IGNORES)
+    try:
+        with open(os.path.join(root, IGNORE_FILE_NAME), 'r') as file:
+            ignore += [line.strip() for line in file if line.strip() and not line.startswith("#")]
+    except FileNotFoundError:
+        pass
+    return ignore
+
+
+class WorkspaceIndex:
+    """
+    Snapshot of a workspace tree: {relative path: {"type", "size", "mtime_ns", "hash"}}.
+
+    Paths use "/" separators and are relative to the root. Hashes are only present when
+    requested, and are carried over from the previous index for files whose size and
+    mtime did not change. Directories record their mtime, which changes whenever an entry
+    is created, removed or renamed in them, so is_current() can tell whether the snapshot
+    still lists the right files without rescanning.
+    """
+
+    def __init__(self, root, ignore, entries=None, build_id="", scanned_at=0.0, root_mtime_ns=None):
+        self.root = os.path.abspath(root)
+        self.ignore = ignore
+        self.entries = entries or {}
+        self.build_id = build_id
+        self.scanned_at = scanned_at
+        self.root_mtime_ns = root_mtime_ns
+
+    @property
+    def index_path(self):
+        return os.path.join(self.root, INDEX_FILE)
+
+    def scan(self, hash_files=False):
+        """
+        Rescan the tree with os.scandir, reusing the hashes of unchanged files.
+
+        Returns:
+            int: The number of files that are new or changed since the previous scan.
+        """
+        previous = self.entries
+        entries = {}
+        changed = 0
+        pending = [("", self.root)]
+        while pending:
+            relative_dir, directory = pending.pop()
+            try:
+                # Taken before listing, so entries added while listing show up as a change next time
+                mtime_ns = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as iterator:
+                    dir_entries = list(iterator)
+            except OSError as e:
+                logger.warning(f"Could not index {directory}: {e}")
+                continue
+            if relative_dir:
+                entries[relative_dir]["mtime_ns"] = mtime_ns
+            else:
+                self.root_mtime_ns = mtime_ns
+            for dir_entry in dir_entries:
+                relative_path = f"{relative_dir}/{dir_entry.name}" if relative_dir else dir_entry.name
+                # Ancestors were matched when their directory was entered; only the name and full path are left
+                if any(fnmatch.fnmatch(dir_entry.name, pattern) or fnmatch.fnmatch(relative_path, pattern)
+                       for pattern in self.ignore):
+                    continue
+                if dir_entry.is_symlink():
+                    entries[relative_path] = {"type": SYMLINK}
+                elif dir_entry.is_dir():
+                    entries[relative_path] = {"type": DIRECTORY}
+                    pending.append((relative_path, dir_entry.path))
+                else:
+                    stat_result = dir_entry.stat(follow_symlinks=False)
+                    entry = {"type": FILE, "size": stat_result.st_size, "mtime_ns": stat_result.st_mtime_ns}
+                    old_entry = previous.get(relative_path)
+                    unchanged = (old_entry is not None and old_entry.get("size") == entry["size"]
+                                 and old_entry.get("mtime_ns") == entry["mtime_ns"])
+                    if unchanged and old_entry.get("hash"):
+                        entry["hash"] = old_entry["hash"]
+                    elif hash_files:
+                        entry["hash"] = _hash_file(dir_entry.path)
+                    changed += not unchanged
+                    entries[relative_path] = entry
+        self.entries = entries
+        self.scanned_at = time.time()
+        return changed
+
+    def is_current(self):
+        """True if no entry was created, removed or renamed in any indexed directory since the scan."""
+        if self.root_mtime_ns is None:
+            return False
+        directories = [("", self.root_mtime_ns)] + [(path, entry.get("mtime_ns"))
+                                                    for path, entry in self.entries.items()
+                                                    if entry["type"] == DIRECTORY]
+        try:
+            return all(os.stat(os.path.join(self.root, path)).st_mtime_ns == mtime_ns
+                       for path, mtime_ns in directories)
+        except OSError:
+            return False
+
+    def exists(self, relative_path):
+        return relative_path.replace(os.sep, "/") in self.entries
+
+    def top_level_names(self):
+        """Returns the names directly under the root, like os.listdir."""
+        return {path for path in self.entries if "/" not in path}
+
+    def files(self, suffix=""):
+        """Returns the relative paths of regular files, optionally filtered by suffix, sorted."""
+        return sorted(path for path, entry in self.entries.items()
+                      if entry["type"] == FILE and path.endswith(suffix))
+
+    def file_hash(self, relative_path):
+        """
+        Returns a file's sha256, computing and recording it if the scan did not hash it.
+
+        A recorded hash is only reused while the file's size and mtime match the entry, since
+        the file may have been rewritten in place after the scan.
+        """
+        entry = self.entries[relative_path]
+        path = os.path.join(self.root, relative_path)
+        stat_result = os.stat(path)
+        if (stat_result.st_size, stat_result.st_mtime_ns) != (entry.get("size"), entry.get("mtime_ns")):
+            entry.update(size=stat_result.st_size, mtime_ns=stat_result.st_mtime_ns, hash=None)
+        if not entry.get("hash"):
+            entry["hash"] = _hash_file(path)
+        return entry["hash"]
+
+    def covers(self, exclude):
+        """True if every path this index ignores is also excluded by the given globs."""
+        return set(self.ignore) <= set(exclude)
+
+    def load(self):
+        """
+        Loads the persisted index if it was built with the same ignore rules.
+
+        Returns:
+            bool: True if an index was loaded.
+        """
+        try:
+            with open(self.index_path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("ignore") != self.ignore:
+            return False
+        self.entries = data.get("entries", {})
+        self.build_id = data.get("build_id", "")
+        self.scanned_at = data.get("scanned_at", 0.0)
+        self.root_mtime_ns = data.get("root_mtime_ns")
+        return True
+
+    def save(self):
+        """Persists the index atomically."""
+        directory = os.path.dirname(self.index_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".workspace-index.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump({"version": INDEX_VERSION, "root": self.root, "ignore": self.ignore,
+                           "build_id": self.build_id, "scanned_at": self.scanned_at,
+                           "root_mtime_ns": self.root_mtime_ns, "entries": self.entries}, file)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not save workspace index: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def get_workspace_index(root, refresh=False, hash_files=WORKSPACE_INDEX_HASH):
+    """
+    Return the index of a workspace, rescanning it only when it may have changed.
+
+    The index is kept in-process and persisted under .build-tools/ in the workspace. An
+    index from earlier in the same build (same BUILD_TAG) is used as is while no indexed
+    directory's mtime changed; otherwise, e.g. after the build wrote new files, or when
+    refresh is set, the tree is rescanned, reusing recorded hashes for unchanged files.
+
+    Args:
+        root (str): The workspace directory.
+        refresh (bool): Rescan even if the index is current for this build.
+        hash_files (bool): Record a sha256 for every file.
+
+    Returns:
+        WorkspaceIndex: The index.
+    """
+    root = os.path.abspath(root)
+    build_id = os.environ.get("BUILD_TAG", "")
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = WorkspaceIndex(root, read_ignore_rules(root))
+            loaded = index.load()
+            # Without a build id there is no way to tell whether the persisted index is current
+            refresh = refresh or not loaded or not build_id or index.build_id != build_id
+            _indexes[root] = index
+        # Stages that ran since the last scan (or in parallel with it) may have added or removed files
+        refresh = refresh or not index.is_current()
+        if hash_files and any(entry["type"] == FILE and not entry.get("hash") for entry in index.entries.values()):
+            refresh = True
+
+        if refresh:
+            # Created before the scan, so saving the index does not change the root's mtime afterwards
+            os.makedirs(os.path.dirname(index.index_path), exist_ok=True)
+            start = time.monotonic()
+            changed = index.scan(hash_files)
+            index.build_id = build_id
+            index.save()
+            logger.info(f"Indexed {len(index.entries)} workspace entries ({changed} new or changed) "
+                        f"in {time.monotonic() - start:.2f}s")
+        return index
@@ -1,14 +1,8 @@
-import json
-from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH
-from modules.request_utils import call_api
-
-
-# Function to read ServiceNow credentials
-def read_servicenow_credentials():
-    env_variables = read_properties_file(PROPERTIES_FILE_PATH)
-    servicenow_username = env_variables.get("SERVICENOW_USERNAME")
-    servicenow_password = env_variables.get("SERVICENOW_PASSWORD")
-    return servicenow_username, servicenow_password
+from modules.env_utils import (read_properties_file, add_variables_to_properties_file, PROPERTIES_FILE_PATH,
+                               check_variable)
+from modules.servicenow_utils import create_change_request, read_servicenow_credentials, wait_for_approval
+from modules.template_utils import load_template
+from modules.trace_utils import traced
 
 
 # Function to calculate CR_SCHEDULE_TIME
@@ -21,65 +15,51 @@ def calculate_cr_schedule_time(deploy_delay):
         return deploy_delay_value
 
 
-# Function to replace placeholders in JSON data with actual values
-def replace_placeholders(json_data, env_variables):
-    for key, value in json_data.items():
-        if isinstance(value, str) and value.startswith("{{") and value.endswith("}}"):
-            variable_name = value[2:-2]
-            if variable_name in env_variables:
-                json_data[key] = env_variables[variable_name]
-    return json_data
-
-
 # Function to create a change order in ServiceNow
 def create_change_order(json_file_path, deploy_delay):
     try:
-        # Read ServiceNow credentials
-        servicenow_username, servicenow_password = read_servicenow_credentials()
+        # Check the ServiceNow credentials are configured
+        if not all(read_servicenow_credentials()):
+            print("ServiceNow credentials are not set in env.properties")
+            return None
 
         # Calculate CR_SCHEDULE_TIME
         cr_schedule_time = calculate_cr_schedule_time(deploy_delay)
 
-        # Read JSON schema from file
-        with open(json_file_path, "r") as file:
-            json_data = json.load(file)
+        # Load the compiled JSON schema
+        template = load_template(json_file_path)
 
         # Read environment variables
         env_variables = read_properties_file(PROPERTIES_FILE_PATH)
 
         # Replace placeholders with actual values
-        json_data = replace_placeholders(json_data, env_variables)
-
-        # ServiceNow API endpoint
-        servicenow_api_url = "https://your-servicenow-instance.service-now.com/api/now/table/change_request"
-
-        # Make API call to create change order
-        response = call_api(servicenow_api_url, method='POST', data=json_data, headers={'Content-Type': 'application'
-                                                                                                        '/json'})
-
-        # Check response status
-        if response.get('status_code') == 200:
-            # Extract the change order number from the response JSON
-            change_order_number = response.get("result", {}).get("number")
-            if change_order_number:
-                print(f"Change order created successfully with number: {change_order_number}")
-                return change_order_number
-            else:
-                print("Failed to retrieve change order number from the response.")
-                return None
-        else:
-            # Print error message including status code and response text
-            print(
-                f"Failed to create change order. Status code: {response.get('status_code')}, "
-                f"Error: {response.get('text')}")
+        missing = template.missing(env_variables)
+        if missing:
+            print(f"Warning: no value for {', '.join(sorted(missing))}, leaving the placeholders in place")
+        json_data = template.render(env_variables, strict=False)
+
+        # Create the change order, or find the one a previous attempt of this build created
+        # BUILD_TAG identifies the build; without it unrelated builds would share change requests
+        correlation_id = env_variables.get("BUILD_TAG", "")
+        check_variable(correlation_id, "BUILD_TAG")
+        change_request = create_change_request(json_data, correlation_id)
+        change_order_number = change_request.get("number")
+        if not change_order_number:
+            print("Failed to retrieve change order number from the response.")
             return None
 
+        print(f"Change order {change_order_number} ready for {correlation_id}")
+        add_variables_to_properties_file({"CR_NUMBER": change_order_number, "CR_SYS_ID": change_request["sys_id"]},
+                                         PROPERTIES_FILE_PATH)
+        return change_order_number
+
     except Exception as e:
         print(f"An error occurred while creating change order: {e}")
         return None
 
 
 # Example usage
+@traced("stage", name="create_cr")
 def main():
     # JSON file containing schema for change order
     json_file_path = "config/cr_schema.json"
@@ -88,7 +68,20 @@ def main():
     deploy_delay = "2h"
 
     # Create change order
-    create_change_order(json_file_path, deploy_delay)
+    change_order_number = create_change_order(json_file_path, deploy_delay)
+
+    # Optionally gate the release on the change order's approval
+    env_variables = read_properties_file(PROPERTIES_FILE_PATH)
+    if change_order_number and env_variables.get("CR_WAIT_FOR_APPROVAL", "false").lower() == "true":
+        try:
+            approval = wait_for_approval(env_variables["CR_SYS_ID"])
+            add_variables_to_properties_file({"CR_APPROVAL": approval}, PROPERTIES_FILE_PATH)
+            if approval != "approved":
+                raise ValueError(f"Change order {change_order_number} was {approval}")
+        except Exception as e:
+            print(f"An error occurred while waiting for the change order approval: {e}")
+            exit_code = 1
+            exit(exit_code)
 
 
 if __name__ == "__main__":
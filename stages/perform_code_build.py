@@ -1,14 +1,45 @@
 # perform_code_build.py
 
 from modules.env_utils import (read_properties_file, PROPERTIES_FILE_PATH, WORKSPACE_DIR,
-                               add_variables_to_properties_file)
+                               add_variables_to_properties_file, BUILD_CACHE_ENABLED)
 from modules.custom_logger import setup_custom_logger
 from modules.build_utils import check_build_type
+from modules import build_cache
+from modules.trace_utils import traced
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
 
 
+def run_cached_build(build_function, branch_name, build_tag, env_variables):
+    """
+    Run the builder unless an identical build is already in the build cache.
+
+    The cache key covers the tracked sources, the builder and the tool versions. On a hit the
+    cached artifacts are restored (and re-published under the new tag where possible).
+
+    Returns:
+        dict: The variables to add to env.properties (empty when the build cache is disabled).
+    """
+    if not BUILD_CACHE_ENABLED:
+        build_function(branch_name, build_tag)  # Pass required variables explicitly
+        return {}
+
+    cache_key = build_cache.compute_cache_key(WORKSPACE_DIR, build_function.__name__, env_variables)
+    manifest = build_cache.lookup(cache_key)
+    hit = manifest is not None and build_cache.restore(manifest, branch_name, build_tag, env_variables)
+    build_cache.record_result(hit)
+
+    if hit:
+        logger.info(f"Skipped {build_function.__name__}: sources unchanged since build {manifest['build_tag']}")
+    else:
+        artifacts = build_function(branch_name, build_tag)  # Pass required variables explicitly
+        build_cache.store(cache_key, build_function.__name__, build_tag, artifacts)
+
+    return {"BUILD_CACHE_KEY": cache_key, "BUILD_CACHE_HIT": str(hit).lower()}
+
+
+@traced("stage", name="perform_code_build")
 def main():
     try:
         # Read environment variables from env.properties file
@@ -22,13 +53,12 @@ def main():
         build_function = check_build_type(WORKSPACE_DIR)
 
         if build_function is not None:
-            build_function(branch_name, build_tag)  # Pass required variables explicitly
+            new_variables = run_cached_build(build_function, branch_name, build_tag, env_variables)
 
-            # Pass required variables explicitly
-            # Update properties file with new values
-            env_variables["BRANCH_NAME"] = branch_name
-            env_variables["BUILD_TAG"] = build_tag
-            add_variables_to_properties_file(env_variables, PROPERTIES_FILE_PATH)
+            # Update properties file with the new values only, so variables written meanwhile by
+            # stages running alongside the build are not overwritten with this stage's snapshot
+            if new_variables:
+                add_variables_to_properties_file(new_variables, PROPERTIES_FILE_PATH)
         else:
             raise ValueError("Unknown build type detected")
 
@@ -1,9 +1,13 @@
+import asyncio
 import os
 
-from modules.build_utils import check_build_type
+from modules.build_utils import detect_build_type
 from modules.custom_logger import setup_custom_logger
 from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, add_variables_to_properties_file
-from modules.rundeck_utils import determine_rundeck_config
+from modules.deploy_fanout import fan_out, summary_to_properties
+from modules.request_utils import authenticate_with_rundeck, RUNDECK_USERNAME, RUNDECK_PASSWORD, RUNDECK_URL
+from modules.rundeck_utils import determine_rundeck_config, resolve_deployment
+from modules.trace_utils import traced
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
@@ -15,19 +19,17 @@ def trigger_deployment_job(rundeck_config, env_variables, build_type):
     if "RUNDECK_JOB" in env_variables and "RUNDECK_NODES" in env_variables:
         job_name = env_variables["RUNDECK_JOB"]
         nodes = env_variables["RUNDECK_NODES"].split(',')
-        job_results[''] = {"job_name": job_name, "nodes": [{"url": node, "token": ""} for node in nodes]}
+        job_results[''] = {"jobs": [job_name], "nodes": [{"url": node, "token": ""} for node in nodes]}
     elif rundeck_config:
-        for env_name, env_details in rundeck_config.items():
-            if env_name in env_variables.get("ENV_NAME", ""):
-                nodes = env_details.get(build_type, {}).get("nodes", [])
-                job_name = env_details.get(build_type, {}).get("job_name")
-                job_results[env_name] = {"job_name": job_name, "nodes": nodes}
+        for env_name in filter(None, env_variables.get("ENV_NAME", "").split(",")):
+            job_results[env_name] = resolve_deployment(rundeck_config, env_name, build_type)
     else:
         raise ValueError("No Rundeck configuration found.")
     return job_results
 
 
 # Main function
+@traced("stage", name="perform_code_deployment")
 def main():
     job_results = {}  # Initialize job_results as an empty dictionary
     try:
@@ -35,16 +37,27 @@ def main():
         env_variables = read_properties_file(PROPERTIES_FILE_PATH)
 
         # Determine build type dynamically
-        build_type = check_build_type(os.getcwd())
+        build_type = detect_build_type(os.getcwd())
 
         # Determine Rundeck configuration based on project or environment variables
         rundeck_config = determine_rundeck_config(env_variables)
 
-        # Trigger deployment job for each environment specified in ENV_NAME
+        # Collect the deployment job and nodes for each environment specified in ENV_NAME
         job_results = trigger_deployment_job(rundeck_config, env_variables, build_type)
 
-        # Add Rundeck job IDs to the properties file
-        add_variables_to_properties_file(job_results, PROPERTIES_FILE_PATH)
+        # Deploy node by node: canary first, then in waves, all environments at once
+        session = authenticate_with_rundeck(RUNDECK_USERNAME, RUNDECK_PASSWORD, RUNDECK_URL)
+        if not session:
+            raise ValueError("Failed to authenticate with Rundeck")
+        summaries = asyncio.run(fan_out(session, job_results, env_variables))
+
+        # Add the per-environment deployment results to the properties file
+        add_variables_to_properties_file(summary_to_properties(summaries), PROPERTIES_FILE_PATH)
+
+        failed = [env_name or "default" for env_name, summary in summaries.items()
+                  if summary["failed"] or summary["halted"]]
+        if failed:
+            raise ValueError(f"Deployment failed for environment(s): {', '.join(failed)}")
 
         logger.info("Code deployment process completed successfully")
 
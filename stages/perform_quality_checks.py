@@ -1,25 +1,133 @@
+import json
 import os
-import pylint.lint as pylint
+import sys
+from collections import defaultdict
 
 from modules.custom_logger import setup_custom_logger
+from modules.env_utils import PYLINT_INCREMENTAL, PYLINT_JOBS
+from modules import pylint_cache
+from modules.process_utils import run_process
+from modules.trace_utils import traced, span
+from modules.workspace_index import get_workspace_index
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
 
 
 def perform_pylint_checks(target_files):
-    """Runs Pylint on specified files."""
+    """
+    Runs Pylint on specified files and returns its exit status.
+
+    Pylint runs in its own process: it changes sys.path while checking, which would affect
+    the other pipeline stages running in this process.
+    """
     try:
-        pylint.Run(target_files)  # Updated invocation
+        return run_process([sys.executable, "-m", "pylint", *target_files], check=False).returncode
     except Exception as e:
         logger.error(f"Pylint checks failed: {e}")
         raise
 
 
-if __name__ == '__main__':
+def run_pylint_json(target_files, jobs=PYLINT_JOBS):
+    """
+    Runs Pylint in parallel jobs, in its own process, and returns its messages as dicts (pylint's JSON format).
+
+    Raises:
+        ValueError: If pylint did not produce a JSON report, e.g. because of a usage error.
+    """
+    with span("pylint", "quality", files=len(target_files), jobs=jobs):
+        result = run_process([sys.executable, "-m", "pylint", "--output-format=json", f"--jobs={jobs}",
+                              *target_files], check=False, capture_output=True, log_output=False)
+    try:
+        # A usage error (status 32) leaves the report empty, which must not pass as a clean run
+        if result.returncode & 32:
+            raise ValueError
+        return json.loads(result.stdout or "[]")
+    except ValueError:
+        raise ValueError(f"Pylint exited with status {result.returncode} without a report: "
+                         f"{result.stderr.strip()}") from None
+
+
+def print_report(messages):
+    """Prints messages grouped by module, in pylint's default text layout."""
+    current_module = None
+    for message in sorted(messages, key=lambda m: (m["path"], m["line"] or 0, m["column"] or 0, m["message-id"])):
+        if message["module"] != current_module:
+            current_module = message["module"]
+            print(f"************* Module {current_module}")
+        print(f"{message['path']}:{message['line']}:{message['column']}: {message['message-id']}: "
+              f"{message['message']} ({message['symbol']})")
+
+
+def perform_incremental_pylint_checks(target_files, source_directory, index):
+    """
+    Runs Pylint only on files whose results are not cached and merges in the cached results.
+
+    Results are cached per file, keyed on its path, its content and the pylint version and
+    configuration. Checks spanning several files (e.g. duplicate-code, or an import of a
+    module that changed) are only re-evaluated when the file itself changes; set
+    PYLINT_INCREMENTAL=false for a full run.
+
+    Returns:
+        int: Pylint's exit status for the merged messages.
+    """
+    # pylint is slow to import; only load it when there is something to check
+    import pylint
+
+    config_hash = pylint_cache.compute_config_hash(source_directory, pylint.__version__)
+    # Content hashes come from the workspace index, which reuses them for files unchanged since the last build
+    keys = {}
+    for file in target_files:
+        relative_path = os.path.relpath(file, source_directory).replace(os.sep, "/")
+        keys[os.path.abspath(file)] = pylint_cache.compute_file_key(config_hash, relative_path,
+                                                                     index.file_hash(relative_path))
+
+    messages = []
+    uncached_files = []
+    for file_path, key in keys.items():
+        cached_messages = pylint_cache.load(key, source_directory)
+        if cached_messages is None:
+            uncached_files.append(file_path)
+        else:
+            messages.extend(cached_messages)
+
+    logger.info(f"Pylint: {len(target_files) - len(uncached_files)} file(s) cached, "
+                f"{len(uncached_files)} to check")
+    if uncached_files:
+        fresh_messages = run_pylint_json(uncached_files, min(PYLINT_JOBS, len(uncached_files)))
+        messages_by_file = defaultdict(list)
+        for message in fresh_messages:
+            messages_by_file[os.path.abspath(message["path"])].append(message)
+        for file_path in uncached_files:
+            file_messages = messages_by_file.pop(file_path, [])
+            pylint_cache.store(keys[file_path], file_messages, source_directory)
+            messages.extend(file_messages)
+        # Messages not tied to a checked file (e.g. configuration problems) are reported but not cached
+        for file_messages in messages_by_file.values():
+            messages.extend(file_messages)
+
+    print_report(messages)
+    status = pylint_cache.compute_exit_status(messages)
+    logger.info(f"Pylint: {len(messages)} message(s) in {len(target_files)} file(s), exit status {status}")
+    return status
+
+
+@traced("stage", name="perform_quality_checks")
+def main():
     # Assuming source code will be in the workspace
     source_directory = os.path.join(os.environ.get("WORKSPACE", ""), "C:/Temp")
-    py_files = [os.path.join(root, file)
-                for root, _, files in os.walk(source_directory)
-                for file in files if file.endswith('.py')]
-    perform_pylint_checks(py_files)
+    index = get_workspace_index(source_directory)
+    py_files = [os.path.join(source_directory, path) for path in index.files('.py')]
+    if not py_files:
+        logger.info("No Python files found, skipping Pylint checks")
+        return
+    if not PYLINT_INCREMENTAL:
+        status = perform_pylint_checks(py_files)
+    else:
+        status = perform_incremental_pylint_checks(py_files, source_directory, index)
+    if status:
+        exit(status)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,39 @@
 import os
-import json
-from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, add_variables_to_properties_file
+import time
+from functools import partial
+from modules import scan_cache
+from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, add_variables_to_properties_file, \
+    SCAN_CACHE_ENABLED, SCAN_CACHE_TTL
 from modules.request_utils import call_api
 from modules.custom_logger import setup_custom_logger
+from modules.iqs_report import evaluate_report, parse_thresholds
+from modules.parallel_utils import run_tasks_concurrently
+from modules.process_utils import run_process
+from modules.trace_utils import traced
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
 
+# Scan execution defaults, overridable via env.properties
+DEFAULT_SCAN_MAX_PARALLEL = 5
+DEFAULT_SCAN_TIMEOUT = 3600  # seconds, per scan
+DEFAULT_GATING_SCANS = "SONARIQS,SONARQUBE"
+DEFAULT_IQS_THRESHOLDS = "total=10"  # per-severity limits too, e.g. "critical=0,high=5,total=50"
+
+
+def run_scanner(scan_type, command, env_variables, secrets=()):
+    """
+    Run a command-line scanner and return whether it exited successfully.
+
+    The scanner is killed once it exceeds the scan's timeout (<SCAN>_SCAN_TIMEOUT or
+    SCAN_TIMEOUT), so a hung scanner cannot hold the agent.
+
+    Raises:
+        ProcessTimeoutError: If the scanner was killed for exceeding its timeout.
+    """
+    _, timeouts, _ = get_scan_settings(env_variables, [scan_type])
+    return run_process(command, timeout=timeouts[scan_type], check=False, secrets=secrets).returncode == 0
+
 
 def perform_sast_scan(env_variables):
     # Perform SAST scan using relevant environment variables
@@ -76,22 +103,23 @@ def perform_sonar_iqs_scan(env_variables):
         logger.info("Performing Sonar IQS scan...")
         # Execute Sonar IQS scan command
         # Replace with actual command to run Sonar IQS scan
-        # Example command:
-        # cmd = "java -jar sonar-iqs.jar --api-key={}".format(sonar_iqs_api_key)
-        cmd = "java -jar sonar-iqs.jar --api-key={}".format(sonar_iqs_api_key)
-        response = os.system(cmd)
-        if response == 0:
+        command = ["java", "-jar", "sonar-iqs.jar", f"--api-key={sonar_iqs_api_key}"]
+        if run_scanner("SONARIQS", command, env_variables, secrets=[sonar_iqs_api_key]):
             # Check generated JSON report for vulnerabilities count
             json_report = "sonar-iqs-report.json"
             if os.path.exists(json_report):
-                with open(json_report, "r") as file:
-                    data = json.load(file)
-                    vulnerabilities_count = data.get("vulnerabilities", 0)
-                    # Adjust threshold as needed
-                    if vulnerabilities_count > 10:
-                        raise ValueError(f"Sonar IQS scan failed: Found {vulnerabilities_count} vulnerabilities.")
-                    else:
-                        logger.info("Sonar IQS scan completed successfully.")
+                # Stream the report: it can be hundreds of MB, and reading stops once the policy is breached
+                thresholds = get_iqs_thresholds(env_variables)
+                full_report = env_variables.get("SONAR_IQS_FULL_REPORT", "false").lower() == "true"
+                summary = evaluate_report(json_report, thresholds, stop_on_breach=not full_report)
+                severities = ", ".join(f"{count} {severity}" for severity, count in summary["by_severity"].items())
+                if summary["breaches"]:
+                    at_least = "" if summary["complete"] else "at least "
+                    raise scan_cache.ScanFailedError(
+                        f"Sonar IQS scan failed: Found {at_least}{'; '.join(summary['breaches'])}.")
+                logger.info(f"Sonar IQS scan completed successfully: {summary['total']} finding(s)"
+                            f"{f' ({severities})' if severities else ''}.")
+                return {"total": summary["total"], "by_severity": summary["by_severity"]}
             else:
                 logger.error("Sonar IQS scan failed: JSON report file not found.")
         else:
@@ -108,14 +136,12 @@ def perform_sonarqube_code_quality_scan(env_variables):
         logger.info("Performing SonarQube code quality scan...")
         # Execute SonarQube code quality scan command
         # Replace with actual command to run SonarQube scan
-        # Example command:
-        # cmd = "./sonarqube-scanner.sh -Dsonar.login={}".format(sonarqube_api_key)
-        cmd = "./sonarqube-scanner.sh -Dsonar.login={}".format(sonarqube_api_key)
-        response = os.system(cmd)
-        if response == 0:
+        command = ["./sonarqube-scanner.sh", f"-Dsonar.login={sonarqube_api_key}"]
+        if run_scanner("SONARQUBE", command, env_variables, secrets=[sonarqube_api_key]):
             # Check for SonarQube report file
             if os.path.exists("sonarqube-report.txt"):
                 logger.info("SonarQube code quality scan completed successfully.")
+                return {"status": scan_cache.PASSED, "report": "sonarqube-report.txt"}
             else:
                 raise ValueError("SonarQube code quality scan failed: Report file not found.")
         else:
@@ -124,32 +150,157 @@ def perform_sonarqube_code_quality_scan(env_variables):
         logger.warning("SonarQube URL or API key not provided. Skipping SonarQube code quality scan.")
 
 
+def get_scan_settings(env_variables, scan_types):
+    """
+    Read concurrency, timeout and gating settings for the selected scans.
+
+    Args:
+        env_variables (dict): The environment variables read from env.properties.
+        scan_types (iterable): The scan types that will be run.
+
+    Returns:
+        tuple: (max_parallel, timeouts, gating_scans)
+    """
+    max_parallel = int(env_variables.get("SCAN_MAX_PARALLEL", DEFAULT_SCAN_MAX_PARALLEL))
+    default_timeout = float(env_variables.get("SCAN_TIMEOUT", DEFAULT_SCAN_TIMEOUT))
+    timeouts = {scan_type: float(env_variables.get(f"{scan_type}_SCAN_TIMEOUT", default_timeout))
+                for scan_type in scan_types}
+    gating_scans = {scan_type.strip().upper()
+                    for scan_type in env_variables.get("GATING_SCANS", DEFAULT_GATING_SCANS).split(",")
+                    if scan_type.strip()}
+    return max_parallel, timeouts, gating_scans
+
+
+def get_scan_cache_settings(env_variables, scan_types):
+    """
+    Read the scan result cache settings.
+
+    FORCE_RESCAN is "true" (or "ALL") to rescan everything, or a comma-separated list of
+    scan types to rescan.
+
+    Returns:
+        tuple: (ttl, forced_scans)
+    """
+    ttl = float(env_variables.get("SCAN_CACHE_TTL", SCAN_CACHE_TTL))
+    force_rescan = {scan_type.strip().upper()
+                    for scan_type in env_variables.get("FORCE_RESCAN", "false").split(",") if scan_type.strip()}
+    if force_rescan & {"TRUE", "ALL"}:
+        force_rescan = set(scan_types)
+    return ttl, force_rescan
+
+
+def get_iqs_thresholds(env_variables):
+    """Returns the Sonar IQS threshold policy from SONAR_IQS_THRESHOLDS, or the default policy."""
+    return parse_thresholds(env_variables.get("SONAR_IQS_THRESHOLDS", DEFAULT_IQS_THRESHOLDS))
+
+
+def get_scan_policy(scan_type, env_variables):
+    """
+    Returns the normalised gate policy a scan's verdict depends on, or "" if it has none.
+
+    Part of the cache key, so tightening or relaxing the policy re-evaluates the commit.
+    """
+    if scan_type == "SONARIQS":
+        return ",".join(f"{name}={limit}" for name, limit in sorted(get_iqs_thresholds(env_variables).items()))
+    return ""
+
+
+def run_cached_scan(scan_type, scan_function, env_variables, repo, commit, ttl, force):
+    """
+    Run a scan unless its verdict for this commit, scanner version and gate policy is already stored.
+
+    A stored pass returns the stored result, so the same env.properties keys are written;
+    a stored failure raises the stored error again. Only verdicts are stored, i.e. results
+    and ScanFailedError: scans that were skipped, could not reach the scanner or failed on
+    their setup (a missing report, a bad threshold policy) run again next time.
+    """
+    scanner_version = scan_cache.get_scanner_version(scan_type, env_variables)
+    if not (SCAN_CACHE_ENABLED and repo and commit and scanner_version):
+        return scan_function(env_variables)
+
+    policy = get_scan_policy(scan_type, env_variables)
+    if policy:
+        scanner_version = f"{scanner_version} ({policy})"
+    key = scan_cache.compute_key(repo, commit, scan_type, scanner_version)
+    entry = None if force else scan_cache.load(key, ttl)
+    if entry:
+        logger.info(f"{scan_type} scan already {entry['verdict']} for {repo}@{commit[:12]} with scanner "
+                    f"{scanner_version}, reusing the stored verdict")
+        if entry["verdict"] == scan_cache.FAILED:
+            raise scan_cache.ScanFailedError(entry["error"])
+        return entry["result"]
+
+    details = {"repo": repo, "commit": commit, "scan_type": scan_type, "scanner_version": scanner_version}
+    try:
+        result = scan_function(env_variables)
+    except scan_cache.ScanFailedError as e:
+        scan_cache.store(key, {**details, "verdict": scan_cache.FAILED, "error": str(e)})
+        raise
+    if result is not None:
+        scan_cache.store(key, {**details, "verdict": scan_cache.PASSED, "result": result})
+    return result
+
+
+def run_scans(selected_scans, env_variables):
+    """
+    Run the selected scans concurrently and return their results keyed by lower-case scan type.
+
+    Scans whose verdict for the checked-out commit is cached are not run again.
+    A failing gating scan cancels the scans that have not started yet, stops the scanner
+    processes of the scans still running, and is re-raised. A scan that times out has its
+    scanner process stopped too.
+    """
+    max_parallel, timeouts, gating_scans = get_scan_settings(env_variables, selected_scans)
+    ttl, forced_scans = get_scan_cache_settings(env_variables, selected_scans)
+    repo = env_variables.get("REPO_NAME")
+    commit = scan_cache.get_commit(os.getcwd(), env_variables) if SCAN_CACHE_ENABLED else None
+    tasks = {scan_type: partial(run_cached_scan, scan_type, scan_function, env_variables, repo, commit, ttl,
+                                scan_type in forced_scans)
+             for scan_type, scan_function in selected_scans.items()}
+
+    logger.info(f"Running {len(tasks)} scan(s) with up to {max_parallel} in parallel: {', '.join(tasks)}")
+    wall_clock_start = time.monotonic()
+    results, durations, errors = run_tasks_concurrently(tasks, max_workers=max_parallel, timeouts=timeouts,
+                                                        gating=gating_scans)
+    wall_clock = time.monotonic() - wall_clock_start
+
+    for scan_type, duration in durations.items():
+        status = "failed" if scan_type in errors else "completed"
+        logger.info(f"{scan_type} scan {status} in {duration:.1f}s")
+    serial_time = sum(durations.values())
+    logger.info(f"Scans finished in {wall_clock:.1f}s wall-clock; running them in series would have taken "
+                f"{serial_time:.1f}s (saved {max(serial_time - wall_clock, 0):.1f}s)")
+
+    return {scan_type.lower(): result for scan_type, result in results.items()}
+
+
+@traced("stage", name="perform_scans")
 def main(main_scan_type):
     try:
         # Read environment variables from env.properties file
         env_variables = read_properties_file(PROPERTIES_FILE_PATH)
 
-        # Initialize scan result variables
+        # Map scan types to their scan functions
         scan_functions = {
             "SAST": perform_sast_scan,
             "DAST": perform_dast_scan,
             "SONAR": perform_sonar_scan,
             "SONARIQS": perform_sonar_iqs_scan,
             "SONARQUBE": perform_sonarqube_code_quality_scan,
-            "ALL": [perform_sast_scan, perform_dast_scan, perform_sonar_scan, perform_sonar_iqs_scan, perform_sonarqube_code_quality_scan]
         }
 
-        # Perform scans based on the specified type
-        results = {}
-        for scan_type, scan_function in scan_functions.items():
-            if main_scan_type == scan_type or main_scan_type == "ALL":
-                if isinstance(scan_function, list):
-                    for func in scan_function:
-                        results[scan_type.lower()] = func(env_variables)
-                else:
-                    results[scan_type.lower()] = scan_function(env_variables)
-
-        # Add scan results to the properties file
+        # Select the scans based on the specified type
+        if main_scan_type == "ALL":
+            selected_scans = scan_functions
+        elif main_scan_type in scan_functions:
+            selected_scans = {main_scan_type: scan_functions[main_scan_type]}
+        else:
+            raise ValueError(f"Unknown scan type: {main_scan_type}")
+
+        # Perform the scans concurrently
+        results = run_scans(selected_scans, env_variables)
+
+        # Add all scan results to the properties file in a single write
         add_variables_to_properties_file(results, PROPERTIES_FILE_PATH)
 
         logger.info("Scans performed successfully")
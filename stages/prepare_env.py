@@ -4,6 +4,7 @@ from modules.env_utils import PROPERTIES_FILE_PATH, run_dos2unix, FILES_TO_CONVE
     check_variable, MINION_TOKEN_URL, add_variables_to_properties_file, GIT_BASE_URL, JIRA_KEY_PATTERN
 from modules.request_utils import call_api
 from modules.custom_logger import setup_custom_logger
+from modules.trace_utils import traced
 import os
 import re
 
@@ -44,6 +45,7 @@ def fetch_git_info():
     return git_pull_request, git_release_version
 
 
+@traced("stage", name="prepare_env")
 def main():
     """Orchestrates the environment preparation steps."""
     exit_code = 0  # Default to success
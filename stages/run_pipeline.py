@@ -0,0 +1,155 @@
+# run_pipeline.py
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from modules.custom_logger import setup_custom_logger
+from modules.env_utils import WORKSPACE_DIR
+from stages import (prepare_env, perform_code_build, perform_scans, perform_quality_checks, create_cr,
+                    perform_code_deployment, schedule_deployment)
+
+# Setup custom logger
+logger = setup_custom_logger(__name__)
+
+PIPELINE_RESULTS_FILE = os.path.join(WORKSPACE_DIR, "pipeline-results.json")
+
+# Exit code recorded for stages skipped because a dependency failed
+SKIPPED_EXIT_CODE = -1
+
+
+def build_stage_graph(scan_type="ALL", deploy="now"):
+    """
+    Returns the pipeline as {stage name: (dependencies, callable)}.
+
+    Scans run after the build; quality checks and CR creation only need the prepared
+    environment, so they run alongside the build and the scans.
+    """
+    stages = {
+        "prepare_env": ([], prepare_env.main),
+        "perform_code_build": (["prepare_env"], perform_code_build.main),
+        "perform_scans": (["perform_code_build"], lambda: perform_scans.main(scan_type)),
+        "perform_quality_checks": (["prepare_env"], perform_quality_checks.main),
+        "create_cr": (["prepare_env"], create_cr.main),
+    }
+    deploy_dependencies = list(stages)
+    if deploy == "now":
+        stages["perform_code_deployment"] = (deploy_dependencies, perform_code_deployment.main)
+    elif deploy == "schedule":
+        stages["schedule_deployment"] = (deploy_dependencies, schedule_deployment.main)
+    return stages
+
+
+def run_stage(name, stage_function):
+    """
+    Run one stage in-process and return its exit code.
+
+    Stage mains report failure through exit(), so SystemExit is translated back into the exit
+    code the stage would have had as a separate `python stages/<name>.py` process.
+    """
+    logger.info(f"########## Stage {name} started ##########")
+    try:
+        stage_function()
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        logger.exception(f"Stage {name} failed: {e}")
+        return 1
+
+
+def run_pipeline(stages, max_parallel=None, skip=()):
+    """
+    Run the stage graph in one process, starting each stage as soon as its dependencies succeed.
+
+    Stages share the interpreter, imported modules and the in-process env.properties cache.
+    They must therefore leave process-wide state alone: tools get their environment through
+    run_process(env=...) and their paths relative to the workspace rather than os.environ and
+    the working directory, tools that change sys.path (pylint) run in their own process, and
+    stages write back only the env.properties variables they set. A failed stage causes every
+    stage depending on it, directly or not, to be skipped.
+
+    Returns:
+        dict: {stage name: {"exit_code", "status", "duration"}} in completion order.
+    """
+    results = {}
+    for name in skip:
+        results[name] = {"exit_code": 0, "status": "skipped", "duration": 0.0}
+
+    remaining = {name: stage for name, stage in stages.items() if name not in results}
+    running = {}
+    started = {}
+
+    with ThreadPoolExecutor(max_workers=max_parallel or len(stages)) as executor:
+        while remaining or running:
+            progressed = False
+            for name, (dependencies, stage_function) in list(remaining.items()):
+                if any(results.get(dependency, {}).get("exit_code") not in (None, 0) for dependency in dependencies):
+                    logger.warning(f"Skipping stage {name}: a dependency failed")
+                    results[name] = {"exit_code": SKIPPED_EXIT_CODE, "status": "skipped", "duration": 0.0}
+                    del remaining[name]
+                    progressed = True
+                elif all(dependency in results for dependency in dependencies):
+                    started[name] = time.monotonic()
+                    running[executor.submit(run_stage, name, stage_function)] = name
+                    del remaining[name]
+                    progressed = True
+
+            if not running:
+                if not progressed:
+                    raise ValueError(f"Stages with unknown dependencies: {', '.join(remaining)}")
+                # Stages skipped in this pass may unblock (or skip) others on the next one
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                exit_code = future.result()
+                duration = time.monotonic() - started[name]
+                results[name] = {"exit_code": exit_code, "status": "succeeded" if exit_code == 0 else "failed",
+                                 "duration": round(duration, 3)}
+                log = logger.info if exit_code == 0 else logger.error
+                log(f"########## Stage {name} {results[name]['status']} in {duration:.1f}s "
+                    f"(exit code {exit_code}) ##########")
+    return results
+
+
+def write_results(results, file_path=PIPELINE_RESULTS_FILE):
+    """Writes the per-stage exit codes for Jenkins (e.g. readJSON) to pick up."""
+    with open(file_path, 'w') as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Pipeline results written to {file_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the build pipeline stages in a single process.")
+    parser.add_argument("--scan-type", default="ALL", help="Scan type passed to perform_scans (default: ALL)")
+    parser.add_argument("--deploy", choices=["now", "schedule", "none"], default="now",
+                        help="Deploy immediately, schedule the deployment, or stop before deploying")
+    parser.add_argument("--skip", default="", help="Comma-separated stages to skip")
+    parser.add_argument("--max-parallel", type=int, default=None, help="Maximum number of stages run at once")
+    parser.add_argument("--results-file", default=PIPELINE_RESULTS_FILE, help="Where to write per-stage results")
+    args = parser.parse_args()
+
+    stages = build_stage_graph(args.scan_type.upper(), args.deploy)
+    skip = [name.strip() for name in args.skip.split(",") if name.strip()]
+    unknown = [name for name in skip if name not in stages]
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(unknown)}")
+
+    results = run_pipeline(stages, args.max_parallel, skip)
+    write_results(results, args.results_file)
+
+    # Exit with the first failing stage's code, in pipeline order, like a sequential Jenkins run would
+    for name in stages:
+        if results[name]["status"] == "failed":
+            exit(results[name]["exit_code"])
+    exit(0)
+
+
+if __name__ == "__main__":
+    main()
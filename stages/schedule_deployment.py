@@ -1,10 +1,14 @@
+import asyncio
 import os
 from datetime import datetime, timedelta
 
-from modules.build_utils import check_build_type
+from modules.build_utils import detect_build_type
 from modules.custom_logger import setup_custom_logger
 from modules.env_utils import read_properties_file, PROPERTIES_FILE_PATH, add_variables_to_properties_file
-from modules.rundeck_utils import determine_rundeck_config
+from modules.deploy_fanout import schedule_fan_out, deployment_start_time
+from modules.request_utils import authenticate_with_rundeck, RUNDECK_USERNAME, RUNDECK_PASSWORD, RUNDECK_URL
+from modules.rundeck_utils import determine_rundeck_config, resolve_deployment
+from modules.trace_utils import traced
 
 # Setup custom logger
 logger = setup_custom_logger(__name__)
@@ -16,24 +20,23 @@ def schedule_deployment_job(rundeck_config, env_variables, deploy_delay, build_t
     if "RUNDECK_JOB" in env_variables and "RUNDECK_NODES" in env_variables:
         job_name = env_variables["RUNDECK_JOB"]
         nodes = env_variables["RUNDECK_NODES"].split(',')
-        job_results[''] = {"job_name": job_name, "nodes": [{"url": node, "token": ""} for node in nodes]}
+        job_results[''] = {"jobs": [job_name], "nodes": [{"url": node, "token": ""} for node in nodes]}
     elif rundeck_config:
         deploy_time = datetime.now() + timedelta(hours=int(deploy_delay))
-        for env_name, env_details in rundeck_config.items():
-            nodes = env_details.get(build_type, {}).get("nodes", [])
-            job_name = env_details.get(build_type, {}).get("job_name")
+        for env_name in filter(None, env_variables.get("ENV_NAME", "").split(",")):
             job_params = {
                 "BUILD_TAG": env_variables.get("BUILD_TAG", ""),
                 "REPO_NAME": env_variables.get("REPO_NAME", ""),
                 "AT": deploy_time.strftime("%Y-%m-%dT%H:%M:%S")
             }
-            job_results[env_name] = {"job_name": job_name, "nodes": nodes}
+            job_results[env_name] = resolve_deployment(rundeck_config, env_name, build_type)
     else:
         raise ValueError("No Rundeck configuration found.")
     return job_results
 
 
 # Main function
+@traced("stage", name="schedule_deployment")
 def main():
     job_results = {}  # Initialize job_results as an empty dictionary
     try:
@@ -41,7 +44,7 @@ def main():
         env_variables = read_properties_file(PROPERTIES_FILE_PATH)
 
         # Determine build type dynamically
-        build_type = check_build_type(os.getcwd())
+        build_type = detect_build_type(os.getcwd())
 
         # Determine Rundeck configuration based on project or environment variables
         rundeck_config = determine_rundeck_config(env_variables)
@@ -49,11 +52,26 @@ def main():
         # Get deploy delay from environment variables
         deploy_delay = env_variables.get("DEPLOY_DELAY", "0")
 
-        # Schedule deployment job for each environment specified in ENV_NAME
+        # Collect the deployment job and nodes for each environment specified in ENV_NAME
         job_results = schedule_deployment_job(rundeck_config, env_variables, deploy_delay, build_type)
 
+        # Schedule one execution per node: the canary at the deploy time, later waves staggered after it
+        session = authenticate_with_rundeck(RUNDECK_USERNAME, RUNDECK_PASSWORD, RUNDECK_URL)
+        if not session:
+            raise ValueError("Failed to authenticate with Rundeck")
+        scheduled = asyncio.run(schedule_fan_out(session, job_results, env_variables,
+                                                 deployment_start_time(deploy_delay)))
+
         # Add Rundeck job IDs to the properties file
-        add_variables_to_properties_file(job_results, PROPERTIES_FILE_PATH)
+        add_variables_to_properties_file({f"RUNDECK_EXECUTIONS_{env_name or 'DEFAULT'}":
+                                          ",".join(str(execution_id) for execution_ids in executions.values()
+                                                   for execution_id in execution_ids or [])
+                                          for env_name, executions in scheduled.items()}, PROPERTIES_FILE_PATH)
+
+        not_scheduled = [f"{env_name}/{node}" for env_name, executions in scheduled.items()
+                         for node, execution_id in executions.items() if not execution_id]
+        if not_scheduled:
+            raise ValueError(f"Could not schedule deployment on: {', '.join(not_scheduled)}")
 
         logger.info("Code deployment scheduled successfully")
 
@@ -0,0 +1,62 @@
+# test_archive_utils.py
+
+import gzip
+import os
+import tarfile
+import tempfile
+import unittest
+
+from modules.archive_utils import (DEFAULT_EXCLUDES, ParallelGzipWriter, archive_extension, create_archive,
+                                   get_archive_excludes, iter_archive_members)
+
+
+class ArchiveUtilsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source_dir = os.path.join(self.temp_dir.name, "workspace")
+        for relative_path in ["src/app.py", "node_modules/lib/index.js", ".git/HEAD", "env.properties",
+                              "sub/env.properties"]:
+            path = os.path.join(self.source_dir, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as file:
+                file.write(relative_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_members_skip_excludes_and_root_properties_file(self):
+        members = [relative_path for _, relative_path in iter_archive_members(self.source_dir, DEFAULT_EXCLUDES)]
+        self.assertEqual(sorted(members), ["src", os.path.join("src", "app.py"), "sub",
+                                           os.path.join("sub", "env.properties")])
+
+    def test_archive_round_trip(self):
+        archive_path, checksums = create_archive(os.path.join(self.temp_dir.name, "repo-1"), self.source_dir,
+                                                 workers=2)
+        self.assertEqual(archive_extension(archive_path), ".tar.gz")
+        with tarfile.open(archive_path, "r:gz") as tar:
+            self.assertNotIn("env.properties", tar.getnames())
+            self.assertEqual(tar.extractfile("src/app.py").read(), b"src/app.py")
+        for name, digest in checksums.items():
+            with open(f"{archive_path}.{name}", 'r') as file:
+                self.assertEqual(file.read(), digest)
+
+    def test_parallel_gzip_matches_input(self):
+        data = os.urandom(1000) * 300
+        path = os.path.join(self.temp_dir.name, "data.gz")
+        with open(path, 'wb') as file:
+            writer = ParallelGzipWriter(file, workers=3, block_size=64 * 1024)
+            writer.write(data)
+            writer.close()
+        with gzip.open(path, 'rb') as file:
+            self.assertEqual(file.read(), data)
+
+    def test_excludes_cover_earlier_archives(self):
+        exclude = get_archive_excludes({"REPO_NAME": "repo", "ARCHIVE_EXCLUDES": ".git"})
+        self.assertIn(".git", exclude)
+        self.assertIn("repo-*.tar.gz*", exclude)
+        self.assertEqual(get_archive_excludes({}), DEFAULT_EXCLUDES)
+
+
+if __name__ == '__main__':
+    unittest.main()
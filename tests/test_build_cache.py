@@ -0,0 +1,82 @@
+# test_build_cache.py
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from modules import build_cache
+
+
+class BuildCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        self.workspace = os.path.join(self.temp_dir.name, "workspace")
+        os.makedirs(os.path.join(self.workspace, "src"))
+        self.write("src/app.py", "print('hello')")
+        self.env_variables = {"WORKSPACE_DIR": self.workspace, "REPO_NAME": "repo"}
+        patcher = mock.patch.object(build_cache, "BUILD_CACHE_DIR", self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, relative_path, content):
+        with open(os.path.join(self.workspace, relative_path), 'w') as file:
+            file.write(content)
+
+    def key(self, builder_name="perform_tar_build"):
+        return build_cache.compute_cache_key(self.workspace, builder_name, self.env_variables)
+
+    def test_archive_key_follows_archived_files(self):
+        key = self.key()
+        self.assertEqual(key, self.key())
+        self.write("untracked.txt", "generated")
+        changed = self.key()
+        self.assertNotEqual(key, changed)
+        self.write("env.properties", "BUILD_TAG=2")
+        self.assertEqual(changed, self.key())
+        self.write("repo-1.tar.gz", "earlier archive")
+        self.assertEqual(changed, self.key())
+
+    def test_key_depends_on_builder_and_tool_versions(self):
+        key = self.key("perform_maven_build")
+        self.assertNotEqual(key, self.key("perform_npm_build"))
+        self.env_variables["JAVA_VERSION"] = "21"
+        self.assertNotEqual(key, self.key("perform_maven_build"))
+
+    def test_store_and_restore_under_new_tag(self):
+        artifact = os.path.join(self.temp_dir.name, "repo-build-1.tar.gz")
+        with open(artifact, 'w') as file:
+            file.write("archive")
+        build_cache.store("key", "perform_tar_build", "build-1", [artifact])
+        manifest = build_cache.lookup("key")
+        self.assertEqual(manifest["build_tag"], "build-1")
+
+        with mock.patch.object(build_cache, "upload_files") as upload_files, \
+                mock.patch.object(build_cache, "get_coordinates"), mock.patch.object(build_cache, "get_nexus_url"):
+            self.assertTrue(build_cache.restore(manifest, "main", "build-2", self.env_variables))
+        restored = os.path.join(self.temp_dir.name, "repo-build-2.tar.gz")
+        self.assertEqual(upload_files.call_args[0][0], [restored])
+        with open(restored, 'r') as file:
+            self.assertEqual(file.read(), "archive")
+
+    def test_only_archive_builds_are_retagged(self):
+        manifest = {"key": "key", "builder": "perform_maven_build", "build_tag": "build-1", "artifacts": []}
+        self.assertFalse(build_cache.restore(manifest, "main", "build-2", self.env_variables))
+
+    def test_concurrent_results_are_all_counted(self):
+        threads = [threading.Thread(target=build_cache.record_result, args=(index % 2 == 0,)) for index in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(build_cache.record_result(True), {"hits": 11, "misses": 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
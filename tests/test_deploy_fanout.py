@@ -0,0 +1,83 @@
+# test_deploy_fanout.py
+
+import asyncio
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from modules import deploy_fanout
+from modules.deploy_fanout import fan_out, plan_waves, schedule_fan_out, summary_to_properties
+
+FAST_SETTINGS = {"DEPLOY_RATE_LIMIT": "0", "DEPLOY_WAVE_SIZE": "2"}
+
+
+class PlanWavesTest(unittest.TestCase):
+
+    def test_canary_then_percentage_waves(self):
+        nodes = [f"node-{n}" for n in range(8)]
+        self.assertEqual([len(wave) for wave in plan_waves(nodes, 1, "25%")], [1, 2, 2, 2, 1])
+        self.assertEqual(sum(plan_waves(nodes, 1, "25%"), []), nodes)
+
+    def test_fixed_size_without_canary(self):
+        self.assertEqual(plan_waves(["a", "b", "c"], 0, 2), [["a", "b"], ["c"]])
+        self.assertEqual(plan_waves(["a", "b", "c"], 1, 0), [["a"], ["b", "c"]])
+        self.assertEqual(plan_waves([], 1, "25%"), [])
+
+
+class FanOutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.failing = set()
+        self.triggered = []
+        patchers = [mock.patch.object(deploy_fanout, "trigger_rundeck_job", self.trigger),
+                    mock.patch.object(deploy_fanout, "watch_rundeck_execution", self.watch)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def trigger(self, session, job_id, node, run_at=None):
+        self.triggered.append((job_id, node, run_at))
+        return f"{job_id}@{node}"
+
+    async def watch(self, session, execution_id, label):
+        return "failed" if execution_id.split("@")[1] in self.failing else deploy_fanout.SUCCEEDED
+
+    def test_all_nodes_run_every_job_in_order(self):
+        plan = {"UAT": {"jobs": ["stop", "deploy"], "nodes": ["a", "b", "c"]}}
+        summaries = asyncio.run(fan_out(None, plan, FAST_SETTINGS))
+        self.assertEqual(summaries["UAT"]["succeeded"], 3)
+        self.assertEqual([job for job, node, _ in self.triggered if node == "b"], ["stop", "deploy"])
+        self.assertEqual(summary_to_properties(summaries), {"DEPLOY_UAT_STATUS": "succeeded",
+                                                           "DEPLOY_UAT_SUCCEEDED": 3, "DEPLOY_UAT_FAILED": 0,
+                                                           "DEPLOY_UAT_SKIPPED": 0})
+
+    def test_failed_canary_halts_the_rollout(self):
+        self.failing = {"a"}
+        summaries = asyncio.run(fan_out(None, {"UAT": {"job_name": "deploy", "nodes": ["a", "b", "c"]}},
+                                        FAST_SETTINGS))
+        summary = summaries["UAT"]
+        self.assertTrue(summary["halted"])
+        self.assertEqual((summary["failed"], summary["skipped"]), (1, 2))
+        self.assertEqual(summary_to_properties(summaries)["DEPLOY_UAT_STATUS"], "halted")
+
+    def test_tolerated_failures_continue_the_rollout(self):
+        self.failing = {"b"}
+        settings = {**FAST_SETTINGS, "DEPLOY_MAX_FAILURES": "1"}
+        summary = asyncio.run(fan_out(None, {"UAT": {"job_name": "deploy", "nodes": ["a", "b", "c", "d"]}},
+                                      settings))["UAT"]
+        self.assertFalse(summary["halted"])
+        self.assertEqual((summary["succeeded"], summary["failed"]), (3, 1))
+
+    def test_scheduled_waves_are_staggered(self):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        settings = {**FAST_SETTINGS, "DEPLOY_WAVE_INTERVAL": "10"}
+        scheduled = asyncio.run(schedule_fan_out(None, {"UAT": {"job_name": "deploy", "nodes": ["a", "b", "c"]}},
+                                                 settings, start))
+        self.assertEqual(scheduled, {"UAT": {"a": ["deploy@a"], "b": ["deploy@b"], "c": ["deploy@c"]}})
+        run_times = {node: run_at for _, node, run_at in self.triggered}
+        self.assertEqual(run_times["a"], "2026-01-01T00:00:00+00:00")
+        self.assertEqual(run_times["c"], "2026-01-01T00:10:00+00:00")
+
+
+if __name__ == '__main__':
+    unittest.main()
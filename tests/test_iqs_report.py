@@ -0,0 +1,75 @@
+# test_iqs_report.py
+
+import json
+import os
+import tempfile
+import unittest
+
+from modules.iqs_report import evaluate_report, iter_report, parse_thresholds
+
+
+class IqsReportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "sonar-iqs-report.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, report):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(report, file)
+
+    def findings(self, *severities):
+        return [{"severity": severity, "rule": f"rule-{n}", "component": "src/app.py",
+                 "message": 'quoted "text" with {braces} and [brackets]'}
+                for n, severity in enumerate(severities)]
+
+    def test_parse_thresholds(self):
+        self.assertEqual(parse_thresholds("critical=0, High=5,total=50"), {"critical": 0, "high": 5, "total": 50})
+        with self.assertRaises(ValueError):
+            parse_thresholds("critical")
+        with self.assertRaises(ValueError):
+            parse_thresholds("critical=-1")
+
+    def test_stream_matches_json_for_nested_findings(self):
+        report = {"metadata": {"skipped": [1, {"issues": "not a list"}]},
+                  "results": {"issues": self.findings("high", "low")}, "vulnerabilities": 2}
+        self.write(report)
+        streamed = list(iter_report(self.path, chunk_size=7))
+        self.assertEqual(streamed, [("finding", finding) for finding in report["results"]["issues"]] + [("count", 2)])
+
+    def test_summary_by_severity_rule_and_component(self):
+        self.write({"issues": self.findings("high", "high", "low")})
+        summary = evaluate_report(self.path, {"high": 5})
+        self.assertEqual(summary["total"], 3)
+        self.assertEqual(summary["by_severity"], {"high": 2, "low": 1})
+        self.assertEqual(summary["by_component"], {"src/app.py": 3})
+        self.assertEqual(summary["breaches"], [])
+        self.assertTrue(summary["complete"])
+
+    def test_stops_at_first_breach(self):
+        self.write({"issues": self.findings("critical", "critical", "critical", "low")})
+        summary = evaluate_report(self.path, {"critical": 0})
+        self.assertFalse(summary["complete"])
+        self.assertEqual(summary["breaches"], ["1 critical finding(s), limit 0"])
+        full = evaluate_report(self.path, {"critical": 0}, stop_on_breach=False)
+        self.assertEqual(full["breaches"], ["3 critical finding(s), limit 0"])
+        self.assertTrue(full["complete"])
+
+    def test_plain_vulnerability_count(self):
+        self.write({"vulnerabilities": 12})
+        summary = evaluate_report(self.path, {"total": 10})
+        self.assertEqual(summary["total"], 12)
+        self.assertEqual(summary["breaches"], ["12 total finding(s), limit 10"])
+
+    def test_malformed_report(self):
+        with open(self.path, 'w') as file:
+            file.write('{"issues": [{"severity": "high"')
+        with self.assertRaises(ValueError):
+            evaluate_report(self.path, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# test_nexus_index.py
+
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from modules import nexus_index
+from modules.nexus_index import get_versions, is_snapshot, refresh_index, version_key
+
+
+class FakeResponse:
+
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = str(payload)
+
+    def json(self):
+        return self.payload
+
+
+class VersionKeyTest(unittest.TestCase):
+
+    def test_maven_ordering(self):
+        versions = ["1.0.1", "1.0", "1.0-SNAPSHOT", "1.0-rc1", "1.10", "1.9", "1.0-alpha"]
+        self.assertEqual(sorted(versions, key=version_key),
+                         ["1.0-alpha", "1.0-rc1", "1.0-SNAPSHOT", "1.0", "1.0.1", "1.9", "1.10"])
+        self.assertEqual(version_key("1.0"), version_key("1"))
+
+    def test_is_snapshot(self):
+        self.assertTrue(is_snapshot("2.0-snapshot"))
+        self.assertFalse(is_snapshot("2.0"))
+
+
+class NexusIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(nexus_index, "NEXUS_INDEX_DIR", self.temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pages = {None: {"items": [{"version": "2.0"}, {"version": "1.10"}], "continuationToken": "next"},
+                      "next": {"items": [{"version": "1.9"}, {"version": "1.2.1"}]}}
+        self.requests = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def send_request(self, method, url, params=None, auth=None):
+        self.requests.append(dict(params))
+        return FakeResponse(self.pages[params.get("continuationToken")])
+
+    def test_refresh_walks_every_page(self):
+        with mock.patch.object(nexus_index, "send_request", self.send_request):
+            index = refresh_index("maven-release", "com.example", "service")
+        self.assertEqual(index["versions"], ["1.2.1", "1.9", "1.10", "2.0"])
+        self.assertEqual(len(self.requests), 2)
+
+    def test_fresh_index_is_answered_locally(self):
+        with mock.patch.object(nexus_index, "send_request", self.send_request):
+            self.assertEqual(get_versions("maven-release", "com.example", "service")[0], "2.0")
+            self.pages["next"]["items"].append({"version": "1.2.2"})
+            self.assertNotIn("1.2.2", get_versions("maven-release", "com.example", "service", max_age=3600))
+            self.assertIn("1.2.2", get_versions("maven-release", "com.example", "service", refresh=True))
+        self.assertEqual(len(self.requests), 4)
+
+    def test_stale_index_is_refreshed(self):
+        with mock.patch.object(nexus_index, "send_request", self.send_request):
+            get_versions("maven-release", "com.example", "service")
+            with mock.patch.object(nexus_index.time, "time", return_value=time.time() + 7200):
+                get_versions("maven-release", "com.example", "service", max_age=3600)
+        self.assertEqual(len(self.requests), 4)
+
+    def test_failed_search_raises(self):
+        with mock.patch.object(nexus_index, "send_request", return_value=FakeResponse({}, 500)):
+            with self.assertRaises(ValueError):
+                refresh_index("maven-release", "com.example", "service")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# test_npm_cache.py
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from modules import npm_cache
+
+
+class NpmCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.entries_dir = os.path.join(self.temp_dir.name, "entries")
+        self.workspace = os.path.join(self.temp_dir.name, "workspace")
+        os.makedirs(os.path.join(self.workspace, "node_modules", "lib"))
+        self.write("node_modules/lib/index.js", "module.exports = 1")
+        self.write("package-lock.json", '{"lockfileVersion": 3}')
+        patcher = mock.patch.object(npm_cache, "ENTRIES_DIR", self.entries_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, relative_path, content):
+        with open(os.path.join(self.workspace, relative_path), 'w') as file:
+            file.write(content)
+
+    def test_key_covers_lock_file_and_tool_versions(self):
+        lock_file = os.path.join(self.workspace, "package-lock.json")
+        key = npm_cache.compute_cache_key(lock_file, "20.1.0", "10.2.0")
+        self.assertEqual(key, npm_cache.compute_cache_key(lock_file, "20.1.0", "10.2.0"))
+        self.assertNotEqual(key, npm_cache.compute_cache_key(lock_file, "22.0.0", "10.2.0"))
+        self.write("package-lock.json", '{"lockfileVersion": 2}')
+        self.assertNotEqual(key, npm_cache.compute_cache_key(lock_file, "20.1.0", "10.2.0"))
+
+    def test_store_and_restore_round_trip(self):
+        npm_cache.store("key", self.workspace)
+        with open(os.path.join(self.entries_dir, "key", npm_cache.META_FILE_NAME), 'r') as file:
+            self.assertEqual(json.load(file)["key"], "key")
+
+        # Writes in the workspace must not reach the cache entry
+        self.write("node_modules/lib/index.js", "patched")
+        self.assertTrue(npm_cache.restore("key", self.workspace))
+        with open(os.path.join(self.workspace, "node_modules", "lib", "index.js"), 'r') as file:
+            self.assertEqual(file.read(), "module.exports = 1")
+
+    def test_missing_metadata_is_a_miss(self):
+        npm_cache.store("key", self.workspace)
+        os.remove(os.path.join(self.entries_dir, "key", npm_cache.META_FILE_NAME))
+        self.assertFalse(npm_cache.restore("key", self.workspace))
+        self.assertFalse(os.path.exists(os.path.join(self.workspace, "node_modules")))
+        self.assertFalse(npm_cache.restore("other", self.workspace))
+
+    def test_evict_removes_least_recently_used(self):
+        for key, used in (("old", 1), ("new", 2)):
+            npm_cache.store(key, self.workspace)
+            meta_path = os.path.join(self.entries_dir, key, npm_cache.META_FILE_NAME)
+            os.utime(meta_path, (used, used))
+        npm_cache.evict(max_bytes=len("module.exports = 1"))
+        self.assertEqual(sorted(os.listdir(self.entries_dir)), ["new"])
+
+
+if __name__ == '__main__':
+    unittest.main()
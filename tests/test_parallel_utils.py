@@ -0,0 +1,77 @@
+# test_parallel_utils.py
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from modules import parallel_utils
+from modules.parallel_utils import TaskTimeoutError, run_tasks_concurrently
+from modules.process_utils import ProcessCancelledError, run_process
+
+
+class ParallelUtilsTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(parallel_utils, "POLL_INTERVAL", 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_results_and_errors_by_name(self):
+        def fail():
+            raise ValueError("broken")
+
+        results, durations, errors = run_tasks_concurrently({"ok": lambda: 1, "fail": fail})
+        self.assertEqual(results, {"ok": 1, "fail": None})
+        self.assertIsInstance(errors["fail"], ValueError)
+        self.assertEqual(set(durations), {"ok", "fail"})
+
+    def test_timeout_stops_the_task_process(self):
+        outcome = {}
+
+        def sleeper():
+            try:
+                run_process(["sleep", "30"], log_output=False)
+            except ProcessCancelledError as e:
+                outcome["cancelled"] = e
+
+        start = time.monotonic()
+        _, _, errors = run_tasks_concurrently({"sleep": sleeper}, timeouts={"sleep": 0.2})
+        self.assertIsInstance(errors["sleep"], TaskTimeoutError)
+        deadline = time.monotonic() + 10
+        while "cancelled" not in outcome and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertIn("cancelled", outcome)
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_timeout_counts_from_start_not_submission(self):
+        tasks = {"first": lambda: time.sleep(0.3), "second": lambda: time.sleep(0.1)}
+        _, _, errors = run_tasks_concurrently(tasks, max_workers=1, default_timeout=0.25 + 0.2)
+        self.assertEqual(errors, {})
+
+    def test_gating_failure_cancels_other_tasks(self):
+        started = threading.Event()
+        outcome = {}
+
+        def sleeper():
+            started.set()
+            try:
+                run_process(["sleep", "30"], log_output=False)
+            except ProcessCancelledError:
+                outcome["cancelled"] = True
+
+        def gate():
+            started.wait(5)
+            raise ValueError("gate failed")
+
+        with self.assertRaises(ValueError):
+            run_tasks_concurrently({"sleep": sleeper, "gate": gate, "queued": lambda: outcome.setdefault("ran", 1)},
+                                   max_workers=2, gating=["gate"])
+        deadline = time.monotonic() + 10
+        while "cancelled" not in outcome and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(outcome, {"cancelled": True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# test_process_utils.py
+
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from modules.process_utils import ProcessCancelledError, ProcessTimeoutError, cancellation_scope, run_process
+
+PYTHON = sys.executable
+
+
+class ProcessUtilsTest(unittest.TestCase):
+
+    def test_captures_output_and_streams_lines(self):
+        lines = []
+
+        def on_line(stream, line):
+            lines.append((stream, line))
+
+        result = run_process([PYTHON, "-c", "import sys; print('out'); print('err', file=sys.stderr)"],
+                             capture_output=True, log_output=False, on_line=on_line)
+        self.assertEqual((result.returncode, result.stdout, result.stderr), (0, "out", "err"))
+        self.assertEqual(sorted(lines), [("stderr", "err"), ("stdout", "out")])
+
+    def test_non_zero_exit_status(self):
+        command = [PYTHON, "-c", "raise SystemExit(3)"]
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            run_process(command, log_output=False)
+        self.assertEqual(context.exception.returncode, 3)
+        self.assertEqual(run_process(command, check=False, log_output=False).returncode, 3)
+
+    def test_secrets_are_redacted(self):
+        result = run_process([PYTHON, "-c", "print('token=s3cret')"], capture_output=True, log_output=False,
+                             secrets=["s3cret"])
+        self.assertEqual(result.stdout, "token=****")
+        self.assertNotIn("s3cret", result.args)
+
+    def test_environment_is_added(self):
+        result = run_process([PYTHON, "-c", "import os; print(os.environ['PIPELINE_TEST'])"],
+                             env={"PIPELINE_TEST": "value"}, capture_output=True, log_output=False)
+        self.assertEqual(result.stdout, "value")
+
+    def test_timeout_kills_the_process(self):
+        start = time.monotonic()
+        with self.assertRaises(ProcessTimeoutError):
+            run_process(["sleep", "30"], timeout=0.3, log_output=False)
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_cancellation_scope_stops_the_process(self):
+        cancel_event = threading.Event()
+        threading.Timer(0.3, cancel_event.set).start()
+        with cancellation_scope(cancel_event):
+            with self.assertRaises(ProcessCancelledError):
+                run_process(["sleep", "30"], log_output=False)
+            # Nothing starts once the scope is cancelled
+            with self.assertRaises(ProcessCancelledError):
+                run_process(["true"], log_output=False)
+        run_process(["true"], log_output=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
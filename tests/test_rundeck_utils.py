@@ -0,0 +1,74 @@
+# test_rundeck_utils.py
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from modules import rundeck_utils
+from modules.rundeck_utils import (ALL_ENVIRONMENTS, RundeckConfigError, compile_rundeck_config,
+                                   load_rundeck_config, resolve_deployment)
+
+
+class CompileRundeckConfigTest(unittest.TestCase):
+
+    def test_build_types_at_top_level_apply_to_all_environments(self):
+        index = compile_rundeck_config({"maven": {"job_name": "deploy", "nodes": ["a"]}})
+        self.assertEqual(index, {(ALL_ENVIRONMENTS, "maven"): {"jobs": ["deploy"], "nodes": ["a"]}})
+
+    def test_environment_entry_is_preferred(self):
+        index = compile_rundeck_config({"UAT": {"npm": {"jobs": ["stop", "deploy"], "nodes": [{"url": "u"}]}},
+                                        ALL_ENVIRONMENTS: {"npm": {"job_name": "deploy", "nodes": ["a"]}}})
+        self.assertEqual(resolve_deployment(index, "UAT", "npm")["jobs"], ["stop", "deploy"])
+        self.assertEqual(resolve_deployment(index, "DEV", "npm")["nodes"], ["a"])
+        with self.assertRaises(RundeckConfigError):
+            resolve_deployment(index, "DEV", "maven")
+
+    def test_invalid_configs(self):
+        for config in [{}, {"maven": []}, {"maven": {"nodes": ["a"]}},
+                       {"maven": {"job_name": "deploy", "jobs": ["deploy"], "nodes": ["a"]}},
+                       {"maven": {"job_name": "deploy", "nodes": []}},
+                       {"maven": {"job_name": "deploy", "nodes": [{"token": "t"}]}},
+                       {"maven": {"job_name": "deploy", "nodes": ["a"], "extra": 1}},
+                       {"UAT": {"gradle": {"job_name": "deploy", "nodes": ["a"]}}}]:
+            with self.assertRaises(RundeckConfigError, msg=config):
+                compile_rundeck_config(config, "project.json")
+
+
+class LoadRundeckConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        patchers = [mock.patch.object(rundeck_utils, "RUNDECK_CONFIG_DIR", self.temp_dir.name),
+                    mock.patch.object(rundeck_utils, "_config_index", {})]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, content, mtime):
+        path = os.path.join(self.temp_dir.name, "project.json")
+        with open(path, 'w') as file:
+            file.write(content)
+        os.utime(path, (mtime, mtime))
+
+    def test_recompiled_only_when_file_changes(self):
+        self.write(json.dumps({"tar": {"job_name": "deploy", "nodes": ["a"]}}), 1000)
+        index = load_rundeck_config("project")
+        self.assertIs(load_rundeck_config("project"), index)
+        self.write(json.dumps({"tar": {"job_name": "deploy", "nodes": ["a", "b"]}}), 2000)
+        self.assertEqual(resolve_deployment(load_rundeck_config("project"), "UAT", "tar")["nodes"], ["a", "b"])
+
+    def test_missing_and_invalid_files(self):
+        with self.assertRaises(FileNotFoundError):
+            load_rundeck_config("other")
+        self.write("{not json", 1000)
+        with self.assertRaises(RundeckConfigError):
+            load_rundeck_config("project")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# test_scan_cache.py
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from modules import scan_cache
+
+
+class ScanCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(scan_cache, "SCAN_CACHE_DIR", self.temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_key_covers_every_component(self):
+        key = scan_cache.compute_key("repo", "abc123", "SONARIQS", "9.1")
+        self.assertEqual(key, scan_cache.compute_key("repo", "abc123", "SONARIQS", "9.1"))
+        for other in [("other", "abc123", "SONARIQS", "9.1"), ("repo", "def456", "SONARIQS", "9.1"),
+                      ("repo", "abc123", "SONARQUBE", "9.1"), ("repo", "abc123", "SONARIQS", "9.2")]:
+            self.assertNotEqual(key, scan_cache.compute_key(*other))
+
+    def test_scanner_version(self):
+        self.assertIsNone(scan_cache.get_scanner_version("SAST", {}))
+        self.assertEqual(scan_cache.get_scanner_version("SAST", {"SAST_SCANNER_VERSION": "2"}), "2")
+        self.assertEqual(scan_cache.get_scanner_version("SAST", {"SAST_SCANNER_VERSION": "2",
+                                                                 "SAST_RULESET_VERSION": "7"}), "2/7")
+
+    def test_store_and_load_round_trip(self):
+        entry = {"verdict": scan_cache.PASSED, "result": {"total": 3}}
+        scan_cache.store("ab" * 32, entry)
+        loaded = scan_cache.load("ab" * 32, ttl=60)
+        self.assertEqual(loaded["result"], {"total": 3})
+        self.assertIsNone(scan_cache.load("cd" * 32, ttl=60))
+
+    def test_expired_entry_is_a_miss(self):
+        scan_cache.store("ab" * 32, {"verdict": scan_cache.FAILED, "error": "too many findings"})
+        with mock.patch.object(scan_cache.time, "time", return_value=time.time() + 120):
+            self.assertIsNone(scan_cache.load("ab" * 32, ttl=60))
+
+    def test_unserialisable_result_is_not_stored(self):
+        scan_cache.store("ab" * 32, {"verdict": scan_cache.PASSED, "result": object()})
+        self.assertIsNone(scan_cache.load("ab" * 32, ttl=60))
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir.name, "ab")), [])
+
+    def test_commit_outside_git_falls_back_to_jenkins(self):
+        self.assertEqual(scan_cache.get_commit(self.temp_dir.name, {"GIT_COMMIT": "abc123"}), "abc123")
+        self.assertIsNone(scan_cache.get_commit(self.temp_dir.name, {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# test_template_utils.py
+
+import json
+import os
+import tempfile
+import unittest
+
+from modules.template_utils import MissingVariablesError, Template, load_template
+
+
+class TemplateTest(unittest.TestCase):
+
+    def test_whole_and_inline_placeholders(self):
+        template = Template({"number": "{{ BUILD_NUMBER }}", "title": "Release {{REPO_NAME}} {{BUILD_TAG}}",
+                             "items": [{"tag": "{{BUILD_TAG}}"}, 3], "fixed": True})
+        payload = template.render({"BUILD_NUMBER": 7, "REPO_NAME": "service", "BUILD_TAG": "build-7"})
+        self.assertEqual(payload, {"number": 7, "title": "Release service build-7",
+                                   "items": [{"tag": "build-7"}, 3], "fixed": True})
+        self.assertEqual(template.variables, {"BUILD_NUMBER", "REPO_NAME", "BUILD_TAG"})
+
+    def test_missing_variables(self):
+        template = Template({"title": "{{REPO_NAME}}-{{BUILD_TAG}}"})
+        with self.assertRaises(MissingVariablesError) as context:
+            template.render({"REPO_NAME": "service"})
+        self.assertEqual(context.exception.missing, ["BUILD_TAG"])
+        self.assertEqual(template.render({"REPO_NAME": "service"}, strict=False), {"title": "service-{{BUILD_TAG}}"})
+
+    def test_bare_values(self):
+        template = Template({"version": "BUILD_TAG", "name": "unknown"}, bare_values=True)
+        self.assertEqual(template.render({"BUILD_TAG": "build-7"}), {"version": "build-7", "name": "unknown"})
+
+    def test_render_does_not_share_state(self):
+        template = Template({"items": ["{{A}}"]})
+        first = template.render({"A": 1})
+        first["items"].append(2)
+        self.assertEqual(template.render({"A": 1}), {"items": [1]})
+
+
+class LoadTemplateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "schema.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, data, mtime):
+        with open(self.path, 'w') as file:
+            json.dump(data, file)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_recompiled_only_when_file_changes(self):
+        self.write({"a": "{{A}}"}, 1000)
+        template = load_template(self.path)
+        self.assertIs(load_template(self.path), template)
+        self.write({"b": "{{B}}"}, 2000)
+        changed = load_template(self.path)
+        self.assertIsNot(changed, template)
+        self.assertEqual(changed.variables, {"B"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# test_workspace_index.py
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from modules import workspace_index
+from modules.workspace_index import WorkspaceIndex, get_workspace_index, is_excluded
+
+
+class WorkspaceIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.write("src/app.py", "print('hello')")
+        self.write("node_modules/lib.js", "")
+        patchers = [mock.patch.object(workspace_index, "_indexes", {}),
+                    mock.patch.dict(os.environ, {"BUILD_TAG": "build-1"})]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, relative_path, content):
+        path = os.path.join(self.root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+
+    def test_scan_skips_ignored_paths(self):
+        index = WorkspaceIndex(self.root, ["node_modules", ".build-tools"])
+        index.scan()
+        self.assertEqual(index.files(), ["src/app.py"])
+        self.assertEqual(index.top_level_names(), {"src"})
+
+    def test_persisted_index_round_trip(self):
+        os.makedirs(os.path.join(self.root, ".build-tools"))
+        index = WorkspaceIndex(self.root, ["node_modules", ".build-tools"], build_id="build-1")
+        index.scan(hash_files=True)
+        index.save()
+        loaded = WorkspaceIndex(self.root, ["node_modules", ".build-tools"])
+        self.assertTrue(loaded.load())
+        self.assertEqual(loaded.entries, index.entries)
+        self.assertTrue(loaded.is_current())
+        self.assertFalse(WorkspaceIndex(self.root, ["other"]).load())
+
+    def test_new_file_invalidates_index_of_same_build(self):
+        self.assertEqual(get_workspace_index(self.root).files(".py"), ["src/app.py"])
+        time.sleep(0.01)
+        self.write("src/generated.py", "")
+        self.assertEqual(get_workspace_index(self.root).files(".py"), ["src/app.py", "src/generated.py"])
+
+    def test_file_hash_follows_rewritten_file(self):
+        index = get_workspace_index(self.root)
+        first = index.file_hash("src/app.py")
+        time.sleep(0.01)
+        self.write("src/app.py", "print('changed')")
+        self.assertNotEqual(index.file_hash("src/app.py"), first)
+
+    def test_is_excluded_matches_components(self):
+        self.assertTrue(is_excluded("a/node_modules/b.js", ["node_modules"]))
+        self.assertTrue(is_excluded("repo-1.tar.gz", ["repo-*.tar.gz*"]))
+        self.assertFalse(is_excluded("src/app.py", ["node_modules"]))
+
+
+if __name__ == '__main__':
+    unittest.main()